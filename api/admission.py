@@ -0,0 +1,191 @@
+from flask import g, jsonify, request
+from api.metrics import Counter, register_metric, register_stats
+from api.resilience import OPEN, db_breaker
+import math
+import os
+import threading
+import time
+
+# ✅ Admission control: each heavy route gets a concurrency limit and a short bounded wait queue,
+# so a spike gets a fast 503 + Retry-After instead of piling up on DB connections until
+# gunicorn's timeout kills the worker. Limits are per worker process, so they only shed with
+# threaded workers (gunicorn.conf.py defaults to gthread; with sync workers nothing ever queues).
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", 2))
+# Once this many heavy requests are in flight in the worker, writes are shed before reads
+ADMISSION_SHED_WRITES_AT = int(os.getenv("ADMISSION_SHED_WRITES_AT", 12))
+
+# Cheap endpoints served from memory / the reference caches: never queued or shed
+UNLIMITED_ENDPOINTS = {
+    "home", "test", "healthz", "static", "serve_static", "metrics_routes.get_metrics",
+    "wizard_routes.get_majors",
+    "wizard_routes.get_subject_categories",
+    "wizard_routes.get_subjects_by_categories",
+    "wizard_routes.get_technical_skills_grouped",
+    "wizard_routes.get_non_technical_skills",
+    "wizard_routes.get_advanced_preferences",
+    "wizard_routes.get_wizard_bootstrap",
+    "recommendation.get_prerequisite_names",
+    "recommendation.preview_recommendations",
+    "prerequisite_search.search_prerequisites",
+    "recommendation.fallback_test"
+}
+
+# Heavy writes: smallest limits, shed first under pressure or while the DB breaker is open
+WRITE_ENDPOINTS = {
+    "user_routes.save_user_results",
+    "user_routes.save_user_trial",
+    "user_routes.delete_user_result",
+    "wizard_routes.submit_wizard"
+}
+
+# (concurrency limit, queue size, max queue wait in seconds)
+CLASS_LIMITS = {
+    "read": (int(os.getenv("ADMISSION_READ_LIMIT", 8)), int(os.getenv("ADMISSION_READ_QUEUE", 16)),
+             float(os.getenv("ADMISSION_READ_WAIT", 2.0))),
+    "write": (int(os.getenv("ADMISSION_WRITE_LIMIT", 4)), int(os.getenv("ADMISSION_WRITE_QUEUE", 4)),
+              float(os.getenv("ADMISSION_WRITE_WAIT", 0.5)))
+}
+
+def parse_route_limits(raw):
+    # "recommendation.get_recommendations=6/12,user_routes.save_user_results=2/0"
+    limits = {}
+    for part in (raw or "").split(","):
+        endpoint, _, spec = part.strip().partition("=")
+        if not endpoint or not spec:
+            continue
+        limit, _, queue = spec.partition("/")
+        limits[endpoint] = (int(limit), int(queue or 0))
+    return limits
+
+ROUTE_LIMITS = parse_route_limits(os.getenv("ADMISSION_ROUTE_LIMITS"))
+
+SHED_REQUESTS = register_metric(Counter(
+    "http_requests_shed_total", "Requests rejected by admission control.", ("route", "reason")
+))
+
+class RouteLimiter:
+    def __init__(self, route, limit, queue_size, max_wait):
+        self.route = route
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Returns None when admitted, otherwise the reason the request was rejected."""
+        with self._cond:
+            if self.active < self.limit:
+                self.active += 1
+                return None
+            if self.waiting >= self.queue_size:
+                return "queue_full"
+            self.waiting += 1
+            try:
+                deadline = time.monotonic() + self.max_wait
+                while self.active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return "queue_timeout"
+                    self._cond.wait(remaining)
+                self.active += 1
+                return None
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+_limiters = {}
+_lock = threading.Lock()
+_in_flight = {"heavy": 0}
+
+def route_class(endpoint):
+    if endpoint is None or endpoint in UNLIMITED_ENDPOINTS:
+        return None
+    return "write" if endpoint in WRITE_ENDPOINTS else "read"
+
+def _limiter(endpoint, kind):
+    limiter = _limiters.get(endpoint)
+    if limiter is None:
+        with _lock:
+            limiter = _limiters.get(endpoint)
+            if limiter is None:
+                limit, queue_size, max_wait = CLASS_LIMITS[kind]
+                limit, queue_size = ROUTE_LIMITS.get(endpoint, (limit, queue_size))
+                limiter = _limiters[endpoint] = RouteLimiter(endpoint, limit, queue_size, max_wait)
+    return limiter
+
+def admission_stats():
+    with _lock:
+        limiters = list(_limiters.values())
+        stats = {"in_flight": _in_flight["heavy"]}
+    stats["waiting"] = sum(limiter.waiting for limiter in limiters)
+    return stats
+
+register_stats("admission", admission_stats)
+
+def _reject(endpoint, reason, retry_after):
+    SHED_REQUESTS.inc(endpoint, reason)
+    response = jsonify({"success": False, "message": "Server is busy, please retry shortly."})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+def _admit():
+    if request.method == "OPTIONS":
+        return None
+    endpoint = request.endpoint
+    kind = route_class(endpoint)
+    if kind is None:
+        return None
+
+    if kind == "write":
+        breaker = db_breaker.snapshot()
+        if breaker["state"] == OPEN:
+            return _reject(endpoint, "db_unavailable", max(math.ceil(breaker["retry_in_seconds"]), 1))
+        if _in_flight["heavy"] >= ADMISSION_SHED_WRITES_AT:
+            return _reject(endpoint, "write_shed", ADMISSION_RETRY_AFTER)
+
+    limiter = _limiter(endpoint, kind)
+    reason = limiter.acquire()
+    if reason is not None:
+        return _reject(endpoint, reason, ADMISSION_RETRY_AFTER)
+    with _lock:
+        _in_flight["heavy"] += 1
+    g._admission_limiter = limiter
+    return None
+
+def _release_limiter(limiter):
+    limiter.release()
+    with _lock:
+        _in_flight["heavy"] -= 1
+
+def _release_after(response):
+    # Streamed responses (exports, SSE) are still running when the request is torn down: their
+    # slot is returned once the WSGI server closes the response
+    limiter = g.pop("_admission_limiter", None)
+    if limiter is not None:
+        if response.is_streamed:
+            response.call_on_close(lambda: _release_limiter(limiter))
+        else:
+            _release_limiter(limiter)
+    return response
+
+def _release(exc=None):
+    # Only still set when no response was produced (after_request didn't run)
+    limiter = g.pop("_admission_limiter", None)
+    if limiter is not None:
+        _release_limiter(limiter)
+
+def init_admission(app):
+    if not ADMISSION_ENABLED:
+        return
+    app.before_request(_admit)
+    app.after_request(_release_after)
+    # teardown as well, so the slot is returned even when the view raises
+    app.teardown_request(_release)
@@ -0,0 +1,311 @@
+from flask import Blueprint, request, jsonify, current_app
+from api.db import get_db_connection
+from api.export import export_token_error
+from api.resilience import is_transient
+from api.result_index import result_index_ready
+from collections import Counter
+import atexit
+import logging
+import os
+import threading
+import time
+
+analytics_routes = Blueprint('analytics_routes', __name__)
+
+ANALYTICS_FLUSH_SECONDS = float(os.getenv("ANALYTICS_FLUSH_SECONDS", 30))
+# major_id comes from the client; anything that doesn't fit the INT column is counted under 0
+MYSQL_INT_MIN, MYSQL_INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+# ✅ Rollup tables: one row per position / fit level / major, so their size never grows with history
+ROLLUP_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS analytics_position_rollup (
+        position_id INT NOT NULL PRIMARY KEY,
+        recommended_count BIGINT NOT NULL DEFAULT 0,
+        top_count BIGINT NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS analytics_fit_level_rollup (
+        fit_level VARCHAR(32) NOT NULL PRIMARY KEY,
+        scored_count BIGINT NOT NULL DEFAULT 0,
+        top_count BIGINT NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS analytics_major_rollup (
+        major_id INT NOT NULL PRIMARY KEY,
+        run_count BIGINT NOT NULL DEFAULT 0,
+        fallback_count BIGINT NOT NULL DEFAULT 0
+    )
+    """
+]
+
+# ✅ In-process deltas, flushed into the rollup tables every ANALYTICS_FLUSH_SECONDS
+_lock = threading.Lock()
+_pending = {
+    "recommended": Counter(),
+    "top": Counter(),
+    "fit_scored": Counter(),
+    "fit_top": Counter(),
+    "major_runs": Counter(),
+    "major_fallbacks": Counter()
+}
+_tables_ready = False
+_flusher = {"thread": None, "pid": None}
+
+def record_recommendation(major_id, results, recommended, fallback_returned):
+    try:
+        major_id = int(major_id or 0)
+    except (TypeError, ValueError, OverflowError):
+        major_id = 0
+    if not MYSQL_INT_MIN <= major_id <= MYSQL_INT_MAX:
+        major_id = 0
+
+    with _lock:
+        for r in results:
+            _pending["fit_scored"][r["fit_level"]] += 1
+        for r in recommended:
+            _pending["recommended"][r["position_id"]] += 1
+        if recommended:
+            _pending["top"][recommended[0]["position_id"]] += 1
+            _pending["fit_top"][recommended[0]["fit_level"]] += 1
+        _pending["major_runs"][major_id] += 1
+        if fallback_returned:
+            _pending["major_fallbacks"][major_id] += 1
+
+    _ensure_flusher()
+
+def _ensure_flusher():
+    # gunicorn forks workers, so each process needs its own flusher thread
+    pid = os.getpid()
+    if _flusher["pid"] == pid and _flusher["thread"].is_alive():
+        return
+    with _lock:
+        if _flusher["pid"] == pid and _flusher["thread"].is_alive():
+            return
+        thread = threading.Thread(target=_flush_loop, name="analytics-flusher", daemon=True)
+        _flusher.update(thread=thread, pid=pid)
+        thread.start()
+
+def _flush_loop():
+    while True:
+        time.sleep(ANALYTICS_FLUSH_SECONDS)
+        flush_rollups()
+
+def _take_pending():
+    with _lock:
+        taken = {name: counter.copy() for name, counter in _pending.items()}
+        for counter in _pending.values():
+            counter.clear()
+    return taken
+
+def _restore_pending(taken):
+    with _lock:
+        for name, counter in taken.items():
+            _pending[name].update(counter)
+
+def ensure_rollup_tables(cursor):
+    global _tables_ready
+    if _tables_ready:
+        return
+    for ddl in ROLLUP_TABLES:
+        cursor.execute(ddl)
+    _tables_ready = True
+
+# (pending counters, upsert) per rollup table
+ROLLUP_UPSERTS = [
+    (("recommended", "top"), """
+        INSERT INTO analytics_position_rollup (position_id, recommended_count, top_count)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            recommended_count = recommended_count + VALUES(recommended_count),
+            top_count = top_count + VALUES(top_count)
+    """),
+    (("fit_scored", "fit_top"), """
+        INSERT INTO analytics_fit_level_rollup (fit_level, scored_count, top_count)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            scored_count = scored_count + VALUES(scored_count),
+            top_count = top_count + VALUES(top_count)
+    """),
+    (("major_runs", "major_fallbacks"), """
+        INSERT INTO analytics_major_rollup (major_id, run_count, fallback_count)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            run_count = run_count + VALUES(run_count),
+            fallback_count = fallback_count + VALUES(fallback_count)
+    """)
+]
+
+def _upsert_rollup(cursor, query, rows):
+    try:
+        cursor.executemany(query, rows)
+        return len(rows)
+    except Exception as e:
+        if is_transient(e):
+            raise
+    # A row the table rejects (e.g. out of range) must not block the batch forever: write the
+    # rows one by one and drop the ones that fail
+    written = 0
+    for row in rows:
+        try:
+            cursor.execute(query, row)
+            written += 1
+        except Exception as e:
+            if is_transient(e):
+                raise
+            logging.error("❌ Dropping analytics rollup row %s: %s", row, e)
+    return written
+
+def flush_rollups():
+    taken = _take_pending()
+    if not any(taken.values()):
+        return 0
+
+    connection = None
+    pending = list(ROLLUP_UPSERTS)
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        ensure_rollup_tables(cursor)
+
+        while pending:
+            (counted, extra), query = pending[0]
+            keys = set(taken[counted]) | set(taken[extra])
+            if keys:
+                _upsert_rollup(cursor, query, [(key, taken[counted][key], taken[extra][key]) for key in keys])
+                connection.commit()
+            pending.pop(0)
+        return sum(taken["major_runs"].values())
+
+    except Exception as e:
+        # Keep the deltas of the tables not written yet for the next flush (connections
+        # autocommit, so the tables already written must not be counted twice)
+        _restore_pending({name: taken[name] for names, _ in pending for name in names})
+        logging.error("❌ Failed to flush analytics rollups: %s", e)
+        return 0
+
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+atexit.register(flush_rollups)
+
+# ✅ Same token as /export/user-results: these routes return per-user ids
+@analytics_routes.before_request
+def require_export_token():
+    return export_token_error()
+
+# ✅ Summary: reads only the rollup tables, so it costs the same however many results are stored
+@analytics_routes.route('/summary', methods=['GET'])
+def get_analytics_summary():
+    connection = None
+    try:
+        limit = min(max(int(request.args.get("limit", 10)), 1), 100)
+
+        connection = get_db_connection()
+        cursor = connection.cursor(dictionary=True)
+        ensure_rollup_tables(cursor)
+
+        cursor.execute("""
+            SELECT r.position_id, p.name AS position_name, r.recommended_count, r.top_count
+            FROM analytics_position_rollup r
+            LEFT JOIN positions p ON r.position_id = p.id
+            ORDER BY r.recommended_count DESC
+            LIMIT %s
+        """, (limit,))
+        top_positions = cursor.fetchall()
+
+        cursor.execute("""
+            SELECT fit_level, scored_count, top_count
+            FROM analytics_fit_level_rollup
+            ORDER BY scored_count DESC
+        """)
+        fit_levels = cursor.fetchall()
+
+        cursor.execute("""
+            SELECT major_id, run_count, fallback_count
+            FROM analytics_major_rollup
+            ORDER BY major_id
+        """)
+        majors = [{
+            "major_id": row["major_id"],
+            "run_count": row["run_count"],
+            "fallback_count": row["fallback_count"],
+            "fallback_rate": round(row["fallback_count"] / row["run_count"], 4) if row["run_count"] else 0
+        } for row in cursor.fetchall()]
+
+        return jsonify({
+            "success": True,
+            "data": {
+                "top_positions": top_positions,
+                "fit_levels": fit_levels,
+                "fallback_by_major": majors,
+                "flush_interval_seconds": ANALYTICS_FLUSH_SECONDS
+            }
+        }), 200
+
+    except ValueError:
+        return jsonify({"success": False, "message": "limit must be an integer."}), 400
+
+    except Exception as e:
+        current_app.logger.error("❌ Error fetching analytics summary: %s", e)
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+# ✅ Result lookups on the columns extracted from result_data (api/result_index.py): index
+# lookups instead of parsing every stored result, e.g. ?top_position_id=12 or ?fit_level=Fallback
+@analytics_routes.route('/results', methods=['GET'])
+def find_results():
+    connection = None
+    try:
+        limit = min(max(int(request.args.get("limit", 50)), 1), 500)
+        filters, params = [], []
+        if request.args.get("top_position_id"):
+            filters.append("top_position_id = %s")
+            params.append(int(request.args["top_position_id"]))
+        if request.args.get("fit_level"):
+            filters.append("top_fit_level = %s")
+            params.append(request.args["fit_level"])
+        if request.args.get("fallback") in ("0", "1"):
+            filters.append("fallback_triggered = %s")
+            params.append(int(request.args["fallback"]))
+        if request.args.get("catalog_version"):
+            filters.append("catalog_version = %s")
+            params.append(request.args["catalog_version"])
+        if not filters:
+            return jsonify({"success": False, "message": "Filter by top_position_id, fit_level, fallback or catalog_version."}), 400
+
+        connection = get_db_connection()
+        cursor = connection.cursor(dictionary=True)
+        if not result_index_ready(cursor):
+            return jsonify({"success": False, "message": "Result columns are not migrated yet (flask migrate)."}), 503
+
+        cursor.execute(f"""
+            SELECT id, user_id, top_position_id, top_fit_level, fallback_triggered, catalog_version, submitted_at
+            FROM user_results
+            WHERE {" AND ".join(filters)}
+            ORDER BY submitted_at DESC
+            LIMIT %s
+        """, (*params, limit))
+        rows = cursor.fetchall()
+        return jsonify({
+            "success": True,
+            "data": rows,
+            "user_ids": sorted({row["user_id"] for row in rows})
+        }), 200
+
+    except ValueError:
+        return jsonify({"success": False, "message": "limit and top_position_id must be integers."}), 400
+
+    except Exception as e:
+        current_app.logger.error("❌ Error searching results: %s", e)
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
@@ -0,0 +1,188 @@
+from flask import g, request
+from urllib.parse import urlencode
+from api.metrics import register_stats
+from api import json_codec
+import hashlib
+import hmac
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+
+# ✅ Opt-in traffic capture: sanitized request/response pairs with timings, one JSON line per
+# request, for bench/replay.py. Off unless CAPTURE_ENABLED=1; the request thread only builds
+# the record and hands it to a per-process writer thread (dropped if the queue is full).
+CAPTURE_ENABLED = os.getenv("CAPTURE_ENABLED", "0") == "1"
+CAPTURE_DIR = os.getenv("CAPTURE_DIR", "/tmp/train-track-capture")
+CAPTURE_SAMPLE_RATE = float(os.getenv("CAPTURE_SAMPLE_RATE", 1.0))
+CAPTURE_MAX_BODY_BYTES = int(os.getenv("CAPTURE_MAX_BODY_BYTES", 262144))
+CAPTURE_QUEUE_SIZE = int(os.getenv("CAPTURE_QUEUE_SIZE", 10000))
+# Pseudonyms are an HMAC of the id, so the same student maps to the same pseudonym across
+# workers and restarts; defaults to the app's secret key
+CAPTURE_SALT = os.getenv("CAPTURE_SALT")
+
+# Never captured: credentials, session plumbing and the operational endpoints
+EXCLUDED_ENDPOINTS = {
+    "user_routes.google_login", "user_routes.logout", "recommendation.set_debug_session",
+    "metrics_routes.get_metrics", "healthz", "static", "serve_static"
+}
+
+# Values that are replaced outright / replaced by a stable pseudonym, wherever they appear
+REDACTED_KEYS = {
+    "full_name", "email", "gender", "date_of_birth", "avatar", "picture", "phone",
+    "credential", "token", "id_token", "access_token", "password"
+}
+PSEUDONYMIZED_KEYS = {"user_id", "google_user_id"}
+# Objects whose "id" is a user id (the /user/profile payload)
+USER_OBJECT_KEYS = {"user"}
+REQUEST_HEADERS = ("Content-Type", "Accept", "Accept-Encoding")
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PSEUDONYM_PREFIXES = ("guest_anon", "anon")
+
+_salt = {"value": b""}
+_stats = {"captured": 0, "dropped": 0, "skipped_bodies": 0}
+_writer = {"queue": None, "thread": None, "pid": None}
+_writer_lock = threading.Lock()
+
+def configure_salt(secret):
+    _salt["value"] = secret.encode("utf-8")
+
+def pseudonym(value):
+    value = str(value)
+    if value.startswith(PSEUDONYM_PREFIXES):
+        return value
+    digest = hmac.new(_salt["value"], value.encode("utf-8"), hashlib.sha256).hexdigest()[:12]
+    # Keep the guest prefix: several routes branch on it
+    return f"guest_anon{digest}" if value.startswith("guest_") else f"anon{digest}"
+
+def sanitize(value, key=None):
+    if isinstance(value, dict):
+        sanitized = {k: sanitize(v, k) for k, v in value.items()}
+        if key in USER_OBJECT_KEYS and sanitized.get("id") is not None:
+            sanitized["id"] = pseudonym(sanitized["id"])
+        return sanitized
+    if isinstance(value, list):
+        return [sanitize(v, key) for v in value]
+    if value is None:
+        return None
+    if key in REDACTED_KEYS:
+        return "[redacted]"
+    if key in PSEUDONYMIZED_KEYS:
+        return pseudonym(value)
+    if isinstance(value, str):
+        # Stored blobs (submission_data, result_data, saved_data) come back as JSON strings
+        if value[:1] in ("{", "[") and value[-1:] in ("}", "]"):
+            try:
+                return json_codec.dumps(sanitize(json_codec.loads(value)))
+            except ValueError:
+                pass
+        if "@" in value:
+            return EMAIL_PATTERN.sub("[email]", value)
+    return value
+
+def body_digest(sanitized):
+    # Stable across key order so the replay tool can compare bodies it did not keep in full
+    return hashlib.sha1(json_codec.dumps_bytes(sanitized, sort_keys=True)).hexdigest()
+
+def _sanitized_path():
+    path = request.path
+    for key, value in (request.view_args or {}).items():
+        if key in PSEUDONYMIZED_KEYS:
+            path = path.replace(f"/{value}", f"/{pseudonym(value)}")
+    return path
+
+def _sanitized_body(data, mimetype):
+    if not data:
+        return {}
+    if mimetype != "application/json":
+        return {"size": len(data), "sha1": hashlib.sha1(data).hexdigest()}
+    try:
+        sanitized = sanitize(json_codec.loads(data))
+    except ValueError:
+        return {"size": len(data), "invalid_json": True}
+    body = {"size": len(data), "sha1": body_digest(sanitized)}
+    if len(data) <= CAPTURE_MAX_BODY_BYTES:
+        body["json"] = sanitized
+    else:
+        _stats["skipped_bodies"] += 1
+    return body
+
+def _build_record(response, elapsed):
+    query = sanitize(request.args.to_dict(flat=False))
+    record = {
+        "ts": round(g._capture_started_wall, 6),
+        "pid": os.getpid(),
+        "client": pseudonym(request.cookies.get("session") or request.remote_addr or "-"),
+        "route": request.endpoint or "unmatched",
+        "method": request.method,
+        "path": _sanitized_path(),
+        "query": urlencode([(k, v) for k, values in query.items() for v in values]),
+        "headers": {h: request.headers[h] for h in REQUEST_HEADERS if h in request.headers},
+        "request": _sanitized_body(request.get_data(cache=True), request.mimetype),
+        "status": response.status_code,
+        "ms": round(elapsed * 1000, 3)
+    }
+    if response.is_streamed or response.direct_passthrough:
+        record["response"] = {"streamed": True}
+    else:
+        record["response"] = _sanitized_body(response.get_data(), response.mimetype)
+    return record
+
+def _write_loop(records):
+    os.makedirs(CAPTURE_DIR, exist_ok=True)
+    path = os.path.join(CAPTURE_DIR, f"capture-{int(time.time())}-{os.getpid()}.jsonl")
+    with open(path, "ab") as f:
+        while True:
+            record = records.get()
+            f.write(json_codec.dumps_bytes(record) + b"\n")
+            if records.empty():
+                f.flush()
+
+def _ensure_writer():
+    # gunicorn workers are forked, so the writer thread (and its file) is per process
+    if _writer["pid"] == os.getpid():
+        return _writer["queue"]
+    with _writer_lock:
+        if _writer["pid"] != os.getpid():
+            records = queue.Queue(CAPTURE_QUEUE_SIZE)
+            thread = threading.Thread(target=_write_loop, args=(records,), name="capture-writer", daemon=True)
+            thread.start()
+            _writer.update(queue=records, thread=thread, pid=os.getpid())
+    return _writer["queue"]
+
+def _start_capture():
+    if request.endpoint in EXCLUDED_ENDPOINTS or request.method == "OPTIONS":
+        return
+    if CAPTURE_SAMPLE_RATE < 1.0 and random.random() >= CAPTURE_SAMPLE_RATE:
+        return
+    g._capture_started_wall = time.time()
+    g._capture_started = time.perf_counter()
+
+def _finish_capture(response):
+    started = g.pop("_capture_started", None)
+    if started is None:
+        return response
+    try:
+        record = _build_record(response, time.perf_counter() - started)
+        _ensure_writer().put_nowait(record)
+        _stats["captured"] += 1
+    except queue.Full:
+        _stats["dropped"] += 1
+    except Exception as e:
+        logging.error("❌ Failed to capture request: %s", e)
+    return response
+
+def capture_stats():
+    return dict(_stats)
+
+def init_capture(app):
+    if not CAPTURE_ENABLED:
+        return
+    configure_salt(CAPTURE_SALT or app.secret_key)
+    register_stats("capture", capture_stats)
+    app.before_request(_start_capture)
+    # Registered after init_compression, so this after_request hook runs before compression
+    app.after_request(_finish_capture)
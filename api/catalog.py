@@ -0,0 +1,543 @@
+from api.db import get_db_connection
+from api.metrics import register_stats
+from api.catalog_version import current_catalog_version, last_version_check, read_catalog_version, subscribe
+from flask.cli import with_appcontext
+import click
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+
+# ✅ Compiled catalog snapshot: positions + weighted prerequisites + the company index,
+# packed into one versioned binary file that every worker memory-maps read-only.
+# The first worker to need it (or `flask build-catalog`) builds it; the rest just map it,
+# so the page cache holds a single copy and worker startup skips the DB load.
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", "/tmp/train-track-catalog.bin")
+CATALOG_MAX_AGE_SECONDS = float(os.getenv("CATALOG_MAX_AGE_SECONDS", 600))
+CATALOG_QUERY_TIMEOUT_MS = int(os.getenv("CATALOG_QUERY_TIMEOUT_MS", 30000))
+CATALOG_RETRY_SECONDS = float(os.getenv("CATALOG_RETRY_SECONDS", 10))
+CATALOG_STAT_INTERVAL = 1.0
+
+MAGIC = b"TTCAT001"
+HEADER = struct.Struct("<8sI")
+
+PREREQUISITE_KINDS = {"Subject": 0, "Technical Skill": 1, "Non-Technical Skill": 2, "Major": 3}
+KIND_KEYS = {0: "subjects", 1: "technical_skills", 2: "non_technical_skills"}
+MAJOR_KIND = 3
+
+COMPANY_FIELDS = [
+    ("position_id", "i64"), ("company_id", "i64"), ("company_name", "str"),
+    ("company_size", "str"), ("industry", "str"), ("training_mode", "str"),
+    ("location", "str"), ("address", "str"), ("website_link", "str"),
+    ("training_mode_id", "i64"), ("company_sizes_id", "i64"), ("industry_id", "i64")
+]
+COMPANY_OUTPUT_FIELDS = [
+    "position_id", "company_id", "company_name", "company_size", "industry",
+    "training_mode", "location", "address", "website_link"
+]
+
+# ✅ Packing: each section is a set of columns; numbers are raw arrays, strings are
+# utf-8 blobs with an offsets array and a null mask
+def _pack_column(kind, values):
+    if kind == "i64":
+        return {"i64": array("q", [int(v) if v is not None else 0 for v in values]).tobytes()}
+    if kind == "f64":
+        return {"f64": array("d", [float(v) if v is not None else 0.0 for v in values]).tobytes()}
+    blob = bytearray()
+    offsets = array("q", [0])
+    nulls = bytearray(len(values))
+    for i, value in enumerate(values):
+        if value is None:
+            nulls[i] = 1
+        else:
+            blob += str(value).encode("utf-8")
+        offsets.append(len(blob))
+    return {"offsets": offsets.tobytes(), "nulls": bytes(nulls), "blob": bytes(blob)}
+
+def pack_snapshot(sections, version=None, source_version=None):
+    directory = {}
+    chunks = []
+    position = 0
+    for name, (schema, rows) in sections.items():
+        columns = {}
+        for index, (column, kind) in enumerate(schema):
+            parts = {}
+            for part, data in _pack_column(kind, [row[index] for row in rows]).items():
+                padding = (-position) % 8
+                chunks.append(b"\0" * padding)
+                position += padding
+                parts[part] = [position, len(data)]
+                chunks.append(data)
+                position += len(data)
+            columns[column] = {"kind": kind, "parts": parts}
+        directory[name] = {"rows": len(rows), "columns": columns}
+
+    body = b"".join(chunks)
+    if version is None:
+        version = hashlib.sha1(body).hexdigest()[:16]
+    header = json.dumps({
+        "version": version,
+        "source_version": source_version,
+        "built_at": time.time(),
+        "sections": directory
+    }).encode("utf-8")
+    header += b" " * ((-(HEADER.size + len(header))) % 8)
+    # Offsets in the directory are relative to the start of the body
+    return HEADER.pack(MAGIC, len(header)) + header + body, version
+
+class _StrColumn:
+    def __init__(self, offsets, nulls, blob):
+        self.offsets = offsets
+        self.nulls = nulls
+        self.blob = blob
+
+    def __getitem__(self, i):
+        if self.nulls[i]:
+            return None
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.nulls)
+
+class _Section:
+    def __init__(self, body, meta):
+        self.rows = meta["rows"]
+        self.columns = {}
+        for name, column in meta["columns"].items():
+            parts = {part: body[start:start + length] for part, (start, length) in column["parts"].items()}
+            if column["kind"] == "i64":
+                self.columns[name] = parts["i64"].cast("q")
+            elif column["kind"] == "f64":
+                self.columns[name] = parts["f64"].cast("d")
+            else:
+                self.columns[name] = _StrColumn(parts["offsets"].cast("q"), parts["nulls"], parts["blob"])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+def _parse_header(path, view):
+    magic, header_length = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a catalog snapshot")
+    return json.loads(bytes(view[HEADER.size:HEADER.size + header_length])), HEADER.size + header_length
+
+def read_snapshot_header(path):
+    with open(path, "rb") as f:
+        prefix = f.read(HEADER.size)
+        _, header_length = HEADER.unpack(prefix)
+        header, _ = _parse_header(path, prefix + f.read(header_length))
+    return header
+
+class CatalogSnapshot:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.stat = os.fstat(f.fileno())
+        view = memoryview(self.mmap)
+        header, body_start = _parse_header(path, view)
+        body = view[body_start:]
+
+        self.path = path
+        self.version = header["version"]
+        self.source_version = header.get("source_version")
+        self.built_at = header["built_at"]
+        self.size = len(self.mmap)
+        self.positions = _Section(body, header["sections"]["positions"])
+        self.edges = _Section(body, header["sections"]["edges"])
+        self.companies = _Section(body, header["sections"]["companies"])
+        self.culture = _Section(body, header["sections"]["company_culture"])
+        self._company_rows_by_position = None
+        self._companies_by_keyword = None
+        self._rows_by_position = None
+        self._positions_by_major = None
+        self._open_positions = None
+        self._prerequisites_by_major = {}
+        self._postings = None
+        self._lock = threading.Lock()
+
+    # ✅ Same dict shape get_recommendations used to build from the raw query.
+    # position_ids limits it to those positions (kept in snapshot order, so ties break the same way).
+    def position_prerequisites(self, skip_zero_weight=True, position_ids=None):
+        positions = {}
+        ids = self.positions["id"]
+        names = self.positions["name"]
+        min_fit_scores = self.positions["min_fit_score"]
+        starts = self.positions["edge_start"]
+        ends = self.positions["edge_end"]
+        prereq_ids = self.edges["prerequisite_id"]
+        kinds = self.edges["kind"]
+        weights = self.edges["weight"]
+
+        if position_ids is None:
+            rows = range(self.positions.rows)
+        else:
+            self.build_major_index()
+            rows = sorted(self._rows_by_position[pid] for pid in position_ids if pid in self._rows_by_position)
+        # Zero-weight edges included: the order follows the first edge of any weight instead
+        if not skip_zero_weight and "all_rank" in self.positions.columns:
+            ranks = self.positions["all_rank"]
+            rows = sorted(rows, key=lambda i: ranks[i])
+
+        for i in rows:
+            entry = None
+            for e in range(starts[i], ends[i]):
+                kind = kinds[e]
+                weight = as_number(weights[e])
+                if kind == MAJOR_KIND or (skip_zero_weight and weight <= 0):
+                    continue
+                if entry is None:
+                    entry = positions[ids[i]] = {
+                        "position_name": names[i],
+                        "min_fit_score": as_number(min_fit_scores[i]),
+                        "subjects": [],
+                        "technical_skills": [],
+                        "non_technical_skills": []
+                    }
+                entry[KIND_KEYS[kind]].append((prereq_ids[e], weight))
+        return positions
+
+    # ✅ Worker warmup: fault the mapped pages in and build the lazy company index up front
+    def warm(self):
+        if hasattr(mmap, "MADV_WILLNEED"):
+            self.mmap.madvise(mmap.MADV_WILLNEED)
+        self.build_company_index()
+        self.build_major_index()
+        self.build_prerequisite_index()
+
+    # ✅ Major → eligible positions, from the Major edges position_prerequisites() leaves out.
+    # A position without any Major prerequisite is open to every major.
+    def build_major_index(self):
+        with self._lock:
+            if self._positions_by_major is not None:
+                return
+            rows_by_position, by_major, open_positions = {}, {}, []
+            ids = self.positions["id"]
+            starts = self.positions["edge_start"]
+            ends = self.positions["edge_end"]
+            prereq_ids = self.edges["prerequisite_id"]
+            kinds = self.edges["kind"]
+            for i in range(self.positions.rows):
+                rows_by_position[ids[i]] = i
+                majors = [prereq_ids[e] for e in range(starts[i], ends[i]) if kinds[e] == MAJOR_KIND]
+                if not majors:
+                    open_positions.append(ids[i])
+                for major_id in majors:
+                    by_major.setdefault(major_id, set()).add(ids[i])
+            self._rows_by_position = rows_by_position
+            self._open_positions = frozenset(open_positions)
+            self._positions_by_major = {major_id: frozenset(pids) for major_id, pids in by_major.items()}
+
+    def eligible_positions(self, major_id):
+        """Position ids open to students of major_id: its own positions plus the unrestricted ones."""
+        self.build_major_index()
+        return self._open_positions | self._positions_by_major.get(major_id, frozenset())
+
+    def major_position_prerequisites(self, major_id):
+        """position_prerequisites() for eligible_positions(major_id), built once per major per snapshot."""
+        positions = self._prerequisites_by_major.get(major_id)
+        if positions is None:
+            positions = self.position_prerequisites(position_ids=self.eligible_positions(major_id))
+            # Only majors that appear in the catalog are kept, so junk ids can't grow the cache
+            if major_id in self._positions_by_major:
+                self._prerequisites_by_major[major_id] = positions
+        return positions
+
+    # ✅ Inverted index for the live preview: (kind, prerequisite id) → [(position row, weight)],
+    # so a selection only touches the positions it can match. Same edges score_positions() sees:
+    # weighted, non-Major, on positions with a min_fit_score.
+    def build_prerequisite_index(self):
+        with self._lock:
+            if self._postings is not None:
+                return
+            postings = {}
+            min_fit_scores = self.positions["min_fit_score"]
+            starts = self.positions["edge_start"]
+            ends = self.positions["edge_end"]
+            prereq_ids = self.edges["prerequisite_id"]
+            kinds = self.edges["kind"]
+            weights = self.edges["weight"]
+            for i in range(self.positions.rows):
+                if not min_fit_scores[i]:
+                    continue
+                for e in range(starts[i], ends[i]):
+                    weight = as_number(weights[e])
+                    if kinds[e] != MAJOR_KIND and weight > 0:
+                        postings.setdefault((kinds[e], prereq_ids[e]), []).append((i, weight))
+            self._postings = postings
+
+    def matched_weights(self, selections):
+        """{position row: matched weight} for selections = {kind: prerequisite ids}."""
+        self.build_prerequisite_index()
+        matched = {}
+        for kind, prerequisite_ids in selections.items():
+            for prerequisite_id in prerequisite_ids:
+                for row, weight in self._postings.get((kind, prerequisite_id), ()):
+                    matched[row] = matched.get(row, 0) + weight
+        return matched
+
+    # ✅ Company index (mirrors the /companies-for-positions join and filters)
+    def build_company_index(self):
+        with self._lock:
+            if self._company_rows_by_position is not None:
+                return
+            by_position = {}
+            position_ids = self.companies["position_id"]
+            for i in range(self.companies.rows):
+                by_position.setdefault(position_ids[i], []).append(i)
+            by_keyword = {}
+            keyword_ids = self.culture["keyword_id"]
+            company_ids = self.culture["company_id"]
+            for i in range(self.culture.rows):
+                by_keyword.setdefault(keyword_ids[i], set()).add(company_ids[i])
+            self._companies_by_keyword = by_keyword
+            self._company_rows_by_position = by_position
+
+    def companies_for_positions(self, position_ids, training_mode_ids=None, company_size_ids=None,
+                                industry_ids=None, culture_ids=None):
+        self.build_company_index()
+        allowed_companies = None
+        if culture_ids:
+            allowed_companies = set()
+            for keyword_id in culture_ids:
+                allowed_companies |= self._companies_by_keyword.get(keyword_id, set())
+
+        columns = self.companies.columns
+        filters = [
+            (columns["training_mode_id"], set(training_mode_ids or ())),
+            (columns["company_sizes_id"], set(company_size_ids or ())),
+            (columns["industry_id"], set(industry_ids or ()))
+        ]
+        rows = []
+        seen = set()
+        for position_id in dict.fromkeys(position_ids):
+            for i in self._company_rows_by_position.get(position_id, ()):
+                if any(wanted and column[i] not in wanted for column, wanted in filters):
+                    continue
+                if allowed_companies is not None and columns["company_id"][i] not in allowed_companies:
+                    continue
+                row = {field: columns[field][i] for field in COMPANY_OUTPUT_FIELDS}
+                key = tuple(row.values())
+                if key not in seen:
+                    seen.add(key)
+                    rows.append(row)
+        return rows
+
+def as_number(value):
+    return int(value) if float(value).is_integer() else value
+
+# ✅ DB load → packed sections. Positions keep the order the old per-request load created them
+# in, so ties break the same way: /recommendations created a position at its first weighted
+# non-Major edge (the section order), /recommendations/fallback-prerequisites at its first
+# non-Major edge of any weight (the all_rank column).
+def load_catalog_sections(cursor):
+    cursor.execute("SELECT id, type FROM prerequisites")
+    types = {int(row["id"]): row["type"] for row in cursor.fetchall()}
+
+    cursor.execute("""
+        SELECT pp.position_id, pp.prerequisite_id, pp.weight,
+               p.name AS position_name, p.min_fit_score
+        FROM position_prerequisites pp
+        JOIN positions p ON pp.position_id = p.id
+    """)
+    grouped = {}
+    scored_order, all_order = {}, {}
+    for row in cursor.fetchall():
+        preq_id = int(row["prerequisite_id"])
+        kind = PREREQUISITE_KINDS.get(types.get(preq_id))
+        if kind is None:
+            continue
+        if kind != MAJOR_KIND:
+            all_order.setdefault(row["position_id"], len(all_order))
+            if (row["weight"] or 0) > 0:
+                scored_order.setdefault(row["position_id"], len(scored_order))
+        entry = grouped.setdefault(row["position_id"], {
+            "name": row["position_name"],
+            "min_fit_score": row["min_fit_score"] or 0,
+            "edges": []
+        })
+        entry["edges"].append((preq_id, kind, row["weight"] or 0))
+
+    # Positions without a scorable edge go last (position_prerequisites() skips them anyway)
+    unseen = len(grouped)
+    ordered = sorted(grouped, key=lambda pid: (scored_order.get(pid, unseen), all_order.get(pid, unseen)))
+    position_rows, edge_rows = [], []
+    for pid in ordered:
+        entry = grouped[pid]
+        start = len(edge_rows)
+        edge_rows.extend(entry["edges"])
+        position_rows.append((pid, entry["name"], entry["min_fit_score"], start, len(edge_rows), all_order.get(pid, unseen)))
+
+    cursor.execute("""
+        SELECT DISTINCT
+            cp.position_id,
+            c.id AS company_id,
+            c.company_name,
+            cs.description AS company_size,
+            i.name AS industry,
+            tm.description AS training_mode,
+            b.city AS location,
+            b.address,
+            b.website_link,
+            c.training_mode_id,
+            c.company_sizes_id,
+            c.industry_id
+        FROM companies c
+        JOIN company_positions cp ON c.id = cp.company_id
+        JOIN company_sizes cs ON c.company_sizes_id = cs.id
+        JOIN industries i ON c.industry_id = i.id
+        JOIN training_modes tm ON c.training_mode_id = tm.id
+        JOIN branches b ON c.id = b.company_id AND b.is_main_branch = 1
+    """)
+    company_rows = [tuple(row[field] for field, _ in COMPANY_FIELDS) for row in cursor.fetchall()]
+
+    cursor.execute("SELECT company_id, keyword_id FROM company_culture")
+    culture_rows = [(row["company_id"], row["keyword_id"]) for row in cursor.fetchall()]
+
+    return {
+        "positions": ([("id", "i64"), ("name", "str"), ("min_fit_score", "f64"), ("edge_start", "i64"), ("edge_end", "i64"),
+                       ("all_rank", "i64")], position_rows),
+        "edges": ([("prerequisite_id", "i64"), ("kind", "i64"), ("weight", "f64")], edge_rows),
+        "companies": (COMPANY_FIELDS, company_rows),
+        "company_culture": ([("company_id", "i64"), ("keyword_id", "i64")], culture_rows)
+    }
+
+def build_snapshot_file(path=CATALOG_SNAPSHOT_PATH):
+    connection = get_db_connection(query_timeout_ms=CATALOG_QUERY_TIMEOUT_MS)
+    try:
+        cursor = connection.cursor(dictionary=True)
+        # Read the catalog version first: a change that lands mid-load shows up as a newer
+        # version on the next poll and triggers another rebuild
+        source_version = read_catalog_version(cursor)
+        sections = load_catalog_sections(cursor)
+    finally:
+        if connection.is_connected():
+            connection.close()
+
+    data, version = pack_snapshot(sections, source_version=source_version)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    logging.info("📦 Catalog snapshot %s (catalog %s) written to %s (%d bytes)", version, source_version, path, len(data))
+    return version
+
+def _snapshot_is_fresh(path, wanted_version=None):
+    try:
+        header = read_snapshot_header(path)
+    except (FileNotFoundError, ValueError, struct.error):
+        return False
+    if time.time() - header["built_at"] >= CATALOG_MAX_AGE_SECONDS:
+        return False
+    # A file another worker built after our last poll is at least as new as what we have seen
+    return (wanted_version is None or header.get("source_version") == wanted_version
+            or header["built_at"] >= last_version_check())
+
+# ✅ Per-process handle on the shared snapshot
+_state = {"snapshot": None, "next_check": 0.0, "refresh_errors": 0}
+_state_lock = threading.Lock()
+
+def _ensure_snapshot_file(path, wanted_version=None, wait=True):
+    if _snapshot_is_fresh(path, wanted_version):
+        return
+    # Only one worker rebuilds. Workers that already have a snapshot mapped don't queue
+    # behind it; they keep serving what they have and pick the new file up on a later check.
+    with open(f"{path}.lock", "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+        try:
+            if not _snapshot_is_fresh(path, wanted_version):
+                build_snapshot_file(path)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _refresh_snapshot(path):
+    # Called with _state_lock held
+    snapshot = _state["snapshot"]
+    if snapshot is not None and time.monotonic() < _state["next_check"]:
+        return snapshot
+    try:
+        _ensure_snapshot_file(path, current_catalog_version(), wait=snapshot is None)
+    except Exception as e:
+        # Stale-while-revalidate: if MySQL is unreachable keep serving the mapped snapshot,
+        # or the last file on disk, and retry after CATALOG_RETRY_SECONDS
+        _state["refresh_errors"] += 1
+        _state["next_check"] = time.monotonic() + CATALOG_RETRY_SECONDS
+        if snapshot is None and not os.path.exists(path):
+            raise
+        logging.warning("⚠️ Catalog snapshot refresh failed, serving the previous snapshot: %s", e)
+        if snapshot is not None:
+            return snapshot
+
+    stat = os.stat(path)
+    if snapshot is None or (stat.st_ino, stat.st_mtime_ns) != (snapshot.stat.st_ino, snapshot.stat.st_mtime_ns):
+        snapshot = CatalogSnapshot(path)
+        _state["snapshot"] = snapshot
+    _state["next_check"] = max(_state["next_check"], time.monotonic() + CATALOG_STAT_INTERVAL)
+    return snapshot
+
+def _background_refresh(path):
+    try:
+        _refresh_snapshot(path)
+    except Exception:
+        logging.exception("❌ Background catalog refresh failed")
+    finally:
+        _state_lock.release()
+
+def get_catalog(path=CATALOG_SNAPSHOT_PATH):
+    snapshot = _state["snapshot"]
+    if snapshot is not None and time.monotonic() < _state["next_check"]:
+        return snapshot
+
+    # The first load in a process happens inline (there is nothing to serve yet); concurrent
+    # first callers wait for it
+    if snapshot is None:
+        with _state_lock:
+            return _refresh_snapshot(path)
+
+    # Single flight, off the request path: one background thread re-checks (and maybe rebuilds)
+    # the snapshot while every request, this one included, keeps serving the mapped one
+    if _state_lock.acquire(blocking=False):
+        try:
+            threading.Thread(target=_background_refresh, args=(path,), name="catalog-refresh", daemon=True).start()
+        except Exception:
+            _state_lock.release()
+            raise
+    return snapshot
+
+# A version change forces the next request to re-check the file instead of waiting out the stat interval
+@subscribe
+def _on_catalog_version_change(old, new):
+    _state["next_check"] = 0.0
+
+def catalog_stats():
+    snapshot = _state["snapshot"]
+    if snapshot is None:
+        return {"loaded": 0}
+    return {
+        "loaded": 1,
+        "bytes": snapshot.size,
+        "positions": snapshot.positions.rows,
+        "edges": snapshot.edges.rows,
+        "company_rows": snapshot.companies.rows,
+        "majors_indexed": len(snapshot._positions_by_major or ()),
+        "age_seconds": round(time.time() - snapshot.built_at, 1),
+        "refresh_errors": _state["refresh_errors"]
+    }
+
+register_stats("catalog_snapshot", catalog_stats)
+
+@click.command("build-catalog")
+@with_appcontext
+def build_catalog_command():
+    version = build_snapshot_file()
+    click.echo(f"✅ Catalog snapshot {version} written to {CATALOG_SNAPSHOT_PATH}")
@@ -0,0 +1,345 @@
+from api.db import get_db_connection
+from api.metrics import register_stats
+from cachetools import LRUCache
+from collections import OrderedDict
+from flask import g, has_request_context
+from flask.cli import with_appcontext
+import click
+import hashlib
+import logging
+import mysql.connector
+import os
+import threading
+import time
+
+# ✅ Catalog version: tells every worker when the reference tables changed, without a restart.
+# Admin writes bump a row in `catalog_version` (created and seeded by `flask migrate`). Each
+# worker polls that row, a primary-key read over one kept-open connection, on a background
+# thread and publishes changes on an in-process bus that the caches subscribe to.
+# CHECKSUM TABLE scans every catalog table under a read lock, so it is opt-in only:
+# CATALOG_VERSION_MODE=checksum always uses it, CATALOG_VERSION_CHECKSUM_FALLBACK=1 uses it
+# while the table has not been migrated yet.
+CATALOG_VERSION_MODE = os.getenv("CATALOG_VERSION_MODE", "table")
+CATALOG_VERSION_CHECKSUM_FALLBACK = os.getenv("CATALOG_VERSION_CHECKSUM_FALLBACK", "0") == "1"
+CATALOG_VERSION_POLL_SECONDS = float(os.getenv("CATALOG_VERSION_POLL_SECONDS", 5))
+# Reported until the table exists: caches then only refresh on their TTL
+UNMIGRATED_VERSION = "v0"
+ER_NO_SUCH_TABLE = 1146
+
+CATALOG_TABLES = [
+    "positions", "position_prerequisites", "prerequisites", "categories", "category_skill_map",
+    "companies", "company_positions", "company_culture", "company_culture_keywords",
+    "company_sizes", "industries", "training_modes", "branches"
+]
+
+VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS catalog_version (
+        name VARCHAR(32) NOT NULL PRIMARY KEY,
+        version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )
+"""
+SEED_VERSION = "INSERT IGNORE INTO catalog_version (name, version) VALUES ('catalog', 1)"
+
+_unmigrated_warned = {"value": False}
+
+def checksum_catalog_version(cursor):
+    cursor.execute(f"CHECKSUM TABLE {', '.join(CATALOG_TABLES)}")
+    digest = hashlib.sha1()
+    for row in cursor.fetchall():
+        values = list(row.values()) if isinstance(row, dict) else list(row)
+        digest.update(repr(values).encode("utf-8"))
+    return f"c{digest.hexdigest()[:12]}"
+
+def read_catalog_version(cursor):
+    if CATALOG_VERSION_MODE == "checksum":
+        return checksum_catalog_version(cursor)
+    try:
+        cursor.execute("SELECT version FROM catalog_version WHERE name = 'catalog'")
+        rows = cursor.fetchall()
+    except mysql.connector.errors.ProgrammingError as e:
+        # Only a missing table means "not migrated"; any other error (lost connection, query
+        # timeout) propagates, so the poller keeps the last known version instead of publishing v0
+        if e.errno != ER_NO_SUCH_TABLE:
+            raise
+        rows = []
+    if rows:
+        row = rows[0]
+        version = row["version"] if isinstance(row, dict) else row[0]
+        return f"v{version}"
+    if CATALOG_VERSION_CHECKSUM_FALLBACK:
+        return checksum_catalog_version(cursor)
+    if not _unmigrated_warned["value"]:
+        _unmigrated_warned["value"] = True
+        logging.warning("⚠️ No catalog_version row: run `flask migrate`; catalog caches only refresh on their TTL until then")
+    return UNMIGRATED_VERSION
+
+def bump_catalog_version(cursor):
+    # Call from any admin write to the catalog tables, inside the same transaction
+    cursor.execute(VERSION_TABLE)
+    cursor.execute("""
+        INSERT INTO catalog_version (name, version) VALUES ('catalog', 1)
+        ON DUPLICATE KEY UPDATE version = version + 1
+    """)
+
+# ✅ In-process invalidation bus
+_subscribers = []
+_state = {"version": None, "checked_at": 0.0, "changes": 0, "errors": 0}
+_lock = threading.Lock()
+_poller = {"thread": None, "pid": None}
+_first_poll = threading.Event()
+
+def subscribe(callback):
+    # callback(old_version, new_version) runs on the poller thread; keep it cheap
+    _subscribers.append(callback)
+    return callback
+
+def publish(version):
+    with _lock:
+        old = _state["version"]
+        if old == version:
+            return
+        _state["version"] = version
+        _state["changes"] += 1
+    if old is not None:
+        logging.info("🔄 Catalog version changed %s -> %s", old, version)
+    for callback in list(_subscribers):
+        try:
+            callback(old, version)
+        except Exception:
+            logging.exception("❌ Catalog version subscriber failed")
+
+# The poll reuses one connection per process (reopened after an error or a fork)
+_poll_connection = {"connection": None, "pid": None}
+_poll_lock = threading.Lock()
+
+def _read_polled_version():
+    with _poll_lock:
+        connection = _poll_connection["connection"]
+        if connection is None or _poll_connection["pid"] != os.getpid() or not connection.is_connected():
+            connection = get_db_connection()
+            _poll_connection.update(connection=connection, pid=os.getpid())
+        try:
+            return read_catalog_version(connection.cursor(dictionary=True))
+        except Exception:
+            _poll_connection.update(connection=None, pid=None)
+            if connection.is_connected():
+                connection.close()
+            raise
+
+def poll_catalog_version():
+    try:
+        version = _read_polled_version()
+    except Exception as e:
+        with _lock:
+            _state["errors"] += 1
+        logging.warning("⚠️ Catalog version poll failed: %s", e)
+        return _state["version"]
+    with _lock:
+        _state["checked_at"] = time.time()
+    publish(version)
+    return version
+
+def _poll_loop():
+    while True:
+        time.sleep(CATALOG_VERSION_POLL_SECONDS)
+        poll_catalog_version()
+
+def _ensure_poller():
+    # gunicorn forks workers, so each process needs its own poller thread
+    pid = os.getpid()
+    if _poller["pid"] == pid and _poller["thread"].is_alive():
+        return False
+    with _lock:
+        if _poller["pid"] == pid and _poller["thread"].is_alive():
+            return False
+        thread = threading.Thread(target=_poll_loop, name="catalog-version-poller", daemon=True)
+        _poller.update(thread=thread, pid=pid)
+        thread.start()
+        return True
+
+def last_version_check():
+    return _state["checked_at"]
+
+def current_catalog_version():
+    # Pinned for the rest of the request (see VersionedCache)
+    if has_request_context():
+        pinned = g.get("_catalog_version")
+        if pinned is not None:
+            return pinned
+    # The first call in a process reads the version synchronously (concurrent first callers wait
+    # for it rather than caching under an unknown version); after that it is the poller's job
+    if _ensure_poller():
+        if _state["version"] is None:
+            poll_catalog_version()
+        _first_poll.set()
+    elif not _first_poll.is_set():
+        _first_poll.wait(CATALOG_VERSION_POLL_SECONDS)
+    version = _state["version"]
+    if has_request_context() and version is not None:
+        g._catalog_version = version
+    return version
+
+def _tag_response(response):
+    version = g.get("_catalog_version")
+    if version is not None:
+        response.headers["X-Catalog-Version"] = version
+    return response
+
+def init_catalog_version(app):
+    app.after_request(_tag_response)
+
+def catalog_version_stats():
+    with _lock:
+        return {
+            "changes": _state["changes"],
+            "poll_errors": _state["errors"],
+            "seconds_since_poll": round(time.time() - _state["checked_at"], 1) if _state["checked_at"] else -1
+        }
+
+register_stats("catalog_version", catalog_version_stats)
+
+REFERENCE_CACHE_TTL_SECONDS = float(os.getenv("REFERENCE_CACHE_TTL_SECONDS", 300))
+SINGLE_FLIGHT_WAIT_SECONDS = float(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", 15))
+
+# ✅ One in-progress load per key; followers wait on it instead of issuing the same query
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+# ✅ Version-scoped cache: every entry belongs to one catalog version, and a request only ever
+# reads one version: the version is pinned on the request's first current_catalog_version() call
+# and sent back as X-Catalog-Version. The generation of the previous version is kept until the
+# next bump, so requests that started before a bump finish on the entries they started with.
+#
+# Expired keys are reloaded by a single thread per process while the others keep serving the
+# last good value of the same version (stale-while-revalidate); if the reload fails, e.g. MySQL
+# is unreachable, that value keeps being served until a reload succeeds. A stale value is never
+# served across a version bump: the first reader of a new version waits for it to load.
+# With background_refresh, the reload runs in its own thread and no reader waits for an expired key.
+class VersionedCache:
+    GENERATIONS_KEPT = 2
+
+    def __init__(self, name, maxsize=256, ttl=REFERENCE_CACHE_TTL_SECONDS, background_refresh=False):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.background_refresh = background_refresh
+        self._lock = threading.Lock()
+        self._generations = OrderedDict()  # version -> LRUCache, oldest first
+        self._last_good = LRUCache(maxsize=maxsize)  # (version, key) -> value
+        self._flights = {}  # (version, key) -> _Flight
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "stale_served": 0, "waits": 0, "load_errors": 0}
+        subscribe(self._on_version_change)
+        register_stats(f"cache_{name}", self.stats)
+
+    def _generation_for(self, version):
+        # Called with the lock held
+        entries = self._generations.get(version)
+        if entries is not None:
+            return entries
+        if self._generations and version != _state["version"]:
+            # A request pinned to a version that has already been dropped: don't evict the
+            # current generation for it, give it a private one
+            return LRUCache(maxsize=self.maxsize)
+        if self._generations:
+            self._stats["invalidations"] += 1
+        entries = self._generations[version] = LRUCache(maxsize=self.maxsize)
+        while len(self._generations) > self.GENERATIONS_KEPT:
+            self._generations.popitem(last=False)
+        return entries
+
+    def _on_version_change(self, old, new):
+        with self._lock:
+            self._generation_for(new)
+
+    def generation(self):
+        version = current_catalog_version()
+        with self._lock:
+            return version, self._generation_for(version)
+
+    def get(self, key, loader):
+        version, entries = self.generation()
+        versioned_key = (version, key)
+        now = time.monotonic()
+        with self._lock:
+            entry = entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._stats["hits"] += 1
+                return entry[0]
+            self._stats["misses"] += 1
+            stale = self._last_good.get(versioned_key)
+            flight = self._flights.get(versioned_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[versioned_key] = _Flight()
+            elif stale is not None:
+                self._stats["stale_served"] += 1
+                return stale
+            else:
+                self._stats["waits"] += 1
+
+        if not leader:
+            if not flight.done.wait(SINGLE_FLIGHT_WAIT_SECONDS):
+                raise TimeoutError(f"Timed out waiting for {self.name} {key!r} to load")
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        if self.background_refresh and stale is not None:
+            # The leader doesn't wait either: the reload runs in a thread, stale is served meanwhile
+            with self._lock:
+                self._stats["stale_served"] += 1
+            threading.Thread(target=self._load, args=(key, versioned_key, entries, loader, flight, stale),
+                             name=f"refresh-{self.name}", daemon=True).start()
+            return stale
+        return self._load(key, versioned_key, entries, loader, flight, stale)
+
+    def _load(self, key, versioned_key, entries, loader, flight, stale):
+        try:
+            value = loader()
+            with self._lock:
+                # Stored in the generation it was requested for; if the version moved on meanwhile,
+                # only requests pinned to that version still read it
+                entries[key] = (value, time.monotonic())
+                self._last_good[versioned_key] = value
+            flight.value = value
+            return value
+        except Exception as e:
+            with self._lock:
+                self._stats["load_errors"] += 1
+                if stale is not None:
+                    self._stats["stale_served"] += 1
+            if stale is None:
+                flight.error = e
+                raise
+            logging.warning("⚠️ Reload of %s %r failed, serving the last good value: %s", self.name, key, e)
+            flight.value = stale
+            return stale
+        finally:
+            with self._lock:
+                self._flights.pop(versioned_key, None)
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._generations.get(_state["version"], ()))
+            stats["loading"] = len(self._flights)
+        return stats
+
+@click.command("bump-catalog-version")
+@with_appcontext
+def bump_catalog_version_command():
+    connection = get_db_connection()
+    try:
+        cursor = connection.cursor(dictionary=True)
+        bump_catalog_version(cursor)
+        connection.commit()
+        version = read_catalog_version(cursor)
+    finally:
+        if connection.is_connected():
+            connection.close()
+    click.echo(f"✅ Catalog version is now {version}")
@@ -0,0 +1,171 @@
+from flask import request
+from api.metrics import Counter, Histogram, record_phase, register_metric, register_stats
+from cachetools import LRUCache
+import gzip
+import hashlib
+import os
+import threading
+import time
+
+# ✅ Brotli is optional; without it we only negotiate gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", 5))
+COMPRESS_CACHE_SIZE = int(os.getenv("COMPRESS_CACHE_SIZE", 256))
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/plain", "text/css", "application/javascript"}
+
+# ✅ Reference data changes rarely, so its compressed bodies are cached (keyed by content hash)
+# instead of being recompressed on every request
+PRECOMPRESSED_ENDPOINTS = {
+    "wizard_routes.get_majors",
+    "wizard_routes.get_subject_categories",
+    "wizard_routes.get_subjects_by_categories",
+    "wizard_routes.get_technical_skills_grouped",
+    "wizard_routes.get_non_technical_skills",
+    "wizard_routes.get_advanced_preferences",
+    "wizard_routes.get_wizard_bootstrap",
+    "recommendation.get_prerequisite_names"
+}
+
+COMPRESSION_RATIO = register_metric(Histogram(
+    "http_response_compression_ratio", "Compressed size / original size.", ("route", "encoding"),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 1.0)
+))
+COMPRESSION_CPU_SECONDS = register_metric(Histogram(
+    "http_response_compression_cpu_seconds", "CPU time spent compressing a response.", ("route", "encoding"),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+))
+PRECOMPRESSED_HITS = register_metric(Counter(
+    "http_response_precompressed_hits_total", "Responses served from the compressed-body cache.", ("route",)
+))
+
+_cache = LRUCache(maxsize=COMPRESS_CACHE_SIZE)
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+def compression_cache_stats():
+    with _cache_lock:
+        return {"entries": len(_cache), "hits": _cache_stats["hits"], "misses": _cache_stats["misses"]}
+
+register_stats("compression_cache", compression_cache_stats)
+
+def _accepted_encodings(header):
+    accepted = {}
+    for part in (header or "").split(","):
+        pieces = part.strip().split(";")
+        name = pieces[0].strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in pieces[1:]:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+def choose_encoding(header):
+    accepted = _accepted_encodings(header)
+    # An explicit entry wins over the "*" wildcard (so "*, gzip;q=0" still rules gzip out)
+    wildcard = accepted.get("*", 0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+# ✅ Each encoding is a different representation, so it gets its own validator: "v1" → "v1-gzip"
+def encoded_etag(etag, encoding):
+    if not etag or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+def _compress_cached(body, encoding):
+    key = (encoding, hashlib.sha1(body).digest())
+    with _cache_lock:
+        cached = _cache.get(key)
+        _cache_stats["hits" if cached is not None else "misses"] += 1
+    if cached is not None:
+        return cached, True
+    compressed = compress(body, encoding)
+    with _cache_lock:
+        _cache[key] = compressed
+    return compressed, False
+
+def etag_matches(etag, if_none_match):
+    """Weak comparison of If-None-Match against etag, in any of its encoded variants."""
+    if not etag or not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")[:-1]
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate == opaque + '"' or any(candidate == f'{opaque}-{encoding}"' for encoding in ("gzip", "br")):
+            return True
+    return False
+
+def _compress_response(response):
+    # A 304 must repeat the validator the client holds, i.e. the encoded one it was sent
+    if response.status_code == 304 and response.headers.get("ETag"):
+        encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+        if encoding:
+            encoded = encoded_etag(response.headers["ETag"], encoding)
+            if encoded.removeprefix("W/") in request.headers.get("If-None-Match", ""):
+                response.headers["ETag"] = encoded
+        response.vary.add("Accept-Encoding")
+        return response
+
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+    if encoding is None:
+        return response
+
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+
+    route = request.endpoint or "unmatched"
+    started_wall = time.perf_counter()
+    started_cpu = time.thread_time()
+    if route in PRECOMPRESSED_ENDPOINTS:
+        compressed, hit = _compress_cached(body, encoding)
+        if hit:
+            PRECOMPRESSED_HITS.inc(route)
+    else:
+        compressed = compress(body, encoding)
+    cpu_seconds = time.thread_time() - started_cpu
+    record_phase("compress", time.perf_counter() - started_wall)
+
+    COMPRESSION_RATIO.observe(len(compressed) / len(body), route, encoding)
+    COMPRESSION_CPU_SECONDS.observe(cpu_seconds, route, encoding)
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    if response.headers.get("ETag"):
+        response.headers["ETag"] = encoded_etag(response.headers["ETag"], encoding)
+    return response
+
+def init_compression(app):
+    # Registered after init_metrics so it runs first and "compress" lands in Server-Timing
+    app.after_request(_compress_response)
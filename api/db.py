@@ -1,7 +1,11 @@
 import mysql.connector
 import os
 import logging
+import threading
+import time
 from dotenv import load_dotenv
+from api.metrics import observe_db_connect, observe_db_query, register_stats
+from api.resilience import DB_CONNECT_TIMEOUT, DB_QUERY_TIMEOUT_MS, connect_with_retries, db_breaker, is_transient
 
 # ✅ Load environment variables from .env.local file
 env_file = ".env.local"
@@ -10,24 +14,115 @@ if os.environ.get("ENV") == "remote":
 
 load_dotenv(env_file)
 
-# ✅ Improved and safe DB connection
-def get_db_connection():
+# ✅ Connection counters exposed on /metrics
+_connection_stats = {"opened": 0, "closed": 0, "failed": 0}
+_stats_lock = threading.Lock()
+
+def _count(stat):
+    with _stats_lock:
+        _connection_stats[stat] += 1
+
+def connection_stats():
+    with _stats_lock:
+        stats = dict(_connection_stats)
+    stats["open"] = stats["opened"] - stats["closed"]
+    return stats
+
+register_stats("db_connections", connection_stats)
+
+# ✅ Cursor wrapper: times execute + fetch so query latency is attributed to the current route
+class InstrumentedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _timed(self, method, statements, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except Exception as e:
+            if is_transient(e):
+                db_breaker.record_failure(e)
+            raise
+        finally:
+            observe_db_query(time.perf_counter() - started, statements)
+
+    def execute(self, *args, **kwargs):
+        return self._timed(self._cursor.execute, 1, *args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self._timed(self._cursor.executemany, 1, *args, **kwargs)
+
+    def fetchone(self):
+        return self._timed(self._cursor.fetchone, 0)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed(self._cursor.fetchmany, 0, *args, **kwargs)
+
+    def fetchall(self):
+        return self._timed(self._cursor.fetchall, 0)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class InstrumentedConnection:
+    def __init__(self, connection):
+        self._connection = connection
+        self._closed = False
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs))
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            _count("closed")
+        return self._connection.close()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+def _connect():
+    connection = mysql.connector.connect(
+        host=os.environ.get("DB_HOST"),
+        user=os.environ.get("DB_USER"),
+        password=os.environ.get("DB_PASSWORD"),
+        database=os.environ.get("DB_NAME"),
+        port=int(os.environ.get("DB_PORT", 3306)),
+        connection_timeout=DB_CONNECT_TIMEOUT,
+        autocommit=True
+    )
+    if not connection.is_connected():
+        raise mysql.connector.errors.InterfaceError(msg="Connection closed right after connect")
+    return connection
+
+def set_query_timeout(connection, timeout_ms):
+    # Per-query deadline enforced by MySQL (applies to SELECTs); 0 disables it
+    cursor = connection.cursor()
     try:
-        connection = mysql.connector.connect(
-            host=os.environ.get("DB_HOST"),
-            user=os.environ.get("DB_USER"),
-            password=os.environ.get("DB_PASSWORD"),
-            database=os.environ.get("DB_NAME"),
-            port=int(os.environ.get("DB_PORT", 3306)),
-            connection_timeout=10,
-            autocommit=True
-        )
+        cursor.execute("SET SESSION max_execution_time = %s", (int(timeout_ms),))
+    except mysql.connector.errors.DatabaseError as err:
+        if is_transient(err):
+            raise
+        logging.debug("max_execution_time not supported by this server: %s", err)
+    finally:
+        cursor.close()
 
-        if not connection.is_connected():
-            connection.reconnect(attempts=3, delay=2)
+# ✅ Improved and safe DB connection (retries, deadlines and the circuit breaker live in api/resilience.py)
+def get_db_connection(query_timeout_ms=DB_QUERY_TIMEOUT_MS):
+    started = time.perf_counter()
+    try:
+        connection = connect_with_retries(_connect)
+        set_query_timeout(connection, query_timeout_ms)
 
-        return connection
+        observe_db_connect(time.perf_counter() - started)
+        _count("opened")
+        return InstrumentedConnection(connection)
 
     except mysql.connector.Error as err:
-        logging.error(f"❌ Database connection failed: {err}")
+        observe_db_connect(time.perf_counter() - started, failed=True)
+        _count("failed")
+        logging.error("❌ Database connection failed: %s", err)
         raise
@@ -0,0 +1,280 @@
+from flask import Blueprint, request, jsonify, current_app, Response
+from api.db import get_db_connection
+from api import json_codec
+from api.result_index import summarize_result_data
+import hmac
+import os
+import json
+import logging
+import click
+
+export_routes = Blueprint('export_routes', __name__, cli_group=None)
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 500))
+EXPORT_ROWS_PER_FILE = int(os.getenv("EXPORT_ROWS_PER_FILE", 50000))
+
+# ✅ Stream user_results in id order with an unbuffered cursor (rows are read from
+# the socket as we fetch them, so memory stays bounded by the chunk size)
+def iter_user_result_chunks(after_id=0, limit=None, chunk_size=EXPORT_CHUNK_SIZE):
+    # Long streaming reads: no per-query deadline
+    connection = get_db_connection(query_timeout_ms=0)
+    cursor = None
+    try:
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        query = """
+            SELECT id, user_id, submission_data, result_data, submitted_at
+            FROM user_results
+            WHERE id > %s
+            ORDER BY id
+        """
+        params = [after_id]
+        if limit:
+            query += " LIMIT %s"
+            params.append(int(limit))
+
+        cursor.execute(query, tuple(params))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [decode_result_row(row) for row in rows]
+    finally:
+        # A client that disconnects mid-stream closes this generator with rows still unread, and
+        # then both close() and is_connected() raise "Unread result found": close each regardless
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception as e:
+                logging.debug("Export cursor close failed: %s", e)
+        try:
+            connection.close()
+        except Exception as e:
+            logging.warning("⚠️ Closing the export connection failed: %s", e)
+
+def _load_blob(raw):
+    if raw is None:
+        return None
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode("utf-8")
+    try:
+        return json_codec.loads(raw)
+    except (TypeError, ValueError):
+        return None
+
+def decode_result_row(row):
+    submission = _load_blob(row["submission_data"])
+    result = _load_blob(row["result_data"])
+    submitted_at = row["submitted_at"]
+    record = {
+        "id": row["id"],
+        "user_id": row["user_id"],
+        "submitted_at": submitted_at.isoformat() if submitted_at else None,
+        "submission_data": submission,
+        "result_data": result
+    }
+    record.update(summarize_result_data(result))
+    return record
+
+# ✅ NDJSON: one decoded row per line
+def ndjson_lines(chunks):
+    for chunk in chunks:
+        yield b"".join(json_codec.dumps_bytes(record) + b"\n" for record in chunk)
+
+# ✅ Parquet: flat columns, JSON blobs kept as strings for the analysts to unpack
+def parquet_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.int64()),
+        ("user_id", pa.string()),
+        ("submitted_at", pa.string()),
+        ("top_position_id", pa.int64()),
+        ("top_fit_level", pa.string()),
+        ("fallback_triggered", pa.bool_()),
+        ("result_count", pa.int32()),
+        ("submission_data", pa.string()),
+        ("result_data", pa.string())
+    ])
+
+def parquet_batch(chunk):
+    import pyarrow as pa
+
+    def as_int(value):
+        try:
+            return int(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    columns = {
+        "id": [r["id"] for r in chunk],
+        "user_id": [r["user_id"] for r in chunk],
+        "submitted_at": [r["submitted_at"] for r in chunk],
+        "top_position_id": [as_int(r["top_position_id"]) for r in chunk],
+        "top_fit_level": [r["top_fit_level"] for r in chunk],
+        "fallback_triggered": [r["fallback_triggered"] for r in chunk],
+        "result_count": [r["result_count"] for r in chunk],
+        "submission_data": [json_codec.dumps(r["submission_data"]) for r in chunk],
+        "result_data": [json_codec.dumps(r["result_data"]) for r in chunk]
+    }
+    return pa.RecordBatch.from_pydict(columns, schema=parquet_schema())
+
+# ✅ File-like sink that hands back whatever the Parquet writer has produced so far
+class _ChunkSink:
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.buffer += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+def parquet_stream(chunks):
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, parquet_schema(), compression="zstd")
+    try:
+        for chunk in chunks:
+            writer.write_batch(parquet_batch(chunk))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+        data = sink.drain()
+        if data:
+            yield data
+
+# ✅ Checkpoints: last exported id (+ byte offset for NDJSON so a crash mid-chunk can be truncated away)
+def read_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return {"last_id": 0, "offset": 0, "part": 0}
+    with open(path) as f:
+        return json.load(f)
+
+def write_checkpoint(path, checkpoint):
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def export_ndjson_file(output, checkpoint_path, limit=None):
+    checkpoint = read_checkpoint(checkpoint_path)
+    exported = 0
+
+    if not os.path.exists(output):
+        checkpoint["offset"] = 0
+    with open(output, "r+b" if checkpoint["offset"] else "wb") as f:
+        f.seek(checkpoint["offset"])
+        f.truncate()
+        for chunk in iter_user_result_chunks(checkpoint["last_id"], limit):
+            f.write(b"".join(json_codec.dumps_bytes(r) + b"\n" for r in chunk))
+            f.flush()
+            os.fsync(f.fileno())
+            exported += len(chunk)
+            checkpoint.update(last_id=chunk[-1]["id"], offset=f.tell())
+            write_checkpoint(checkpoint_path, checkpoint)
+    return exported, checkpoint
+
+def export_parquet_files(output, checkpoint_path, limit=None, rows_per_file=EXPORT_ROWS_PER_FILE):
+    import pyarrow.parquet as pq
+
+    checkpoint = read_checkpoint(checkpoint_path)
+    os.makedirs(output, exist_ok=True)
+    exported = 0
+    writer = None
+    rows_in_file = 0
+    pending_last_id = checkpoint["last_id"]
+
+    # Checkpoint only moves when a part file is closed, since an unclosed Parquet file is unreadable
+    def close_part():
+        nonlocal writer, rows_in_file
+        writer.close()
+        writer = None
+        rows_in_file = 0
+        checkpoint.update(last_id=pending_last_id, part=checkpoint["part"] + 1)
+        write_checkpoint(checkpoint_path, checkpoint)
+
+    try:
+        for chunk in iter_user_result_chunks(checkpoint["last_id"], limit):
+            if writer is None:
+                part_path = os.path.join(output, f"part-{checkpoint['part']:05d}.parquet")
+                writer = pq.ParquetWriter(part_path, parquet_schema(), compression="zstd")
+            writer.write_batch(parquet_batch(chunk))
+            rows_in_file += len(chunk)
+            exported += len(chunk)
+            pending_last_id = chunk[-1]["id"]
+            if rows_in_file >= rows_per_file:
+                close_part()
+        if writer is not None:
+            close_part()
+    finally:
+        if writer is not None:
+            writer.close()
+    return exported, checkpoint
+
+# ✅ CLI: flask export-results --format ndjson --output results.ndjson --checkpoint results.ckpt
+@export_routes.cli.command("export-results")
+@click.option("--format", "fmt", type=click.Choice(["ndjson", "parquet"]), default="ndjson")
+@click.option("--output", required=True, help="NDJSON file, or directory of Parquet part files.")
+@click.option("--checkpoint", "checkpoint_path", default=None, help="Resume from / record progress in this file.")
+@click.option("--limit", type=int, default=None, help="Export at most this many rows in this run.")
+def export_results_command(fmt, output, checkpoint_path, limit):
+    if fmt == "ndjson":
+        exported, checkpoint = export_ndjson_file(output, checkpoint_path, limit)
+    else:
+        exported, checkpoint = export_parquet_files(output, checkpoint_path, limit)
+    click.echo(f"✅ Exported {exported} rows (last id {checkpoint['last_id']})")
+
+# ✅ Per-user data (exports, analytics lookups) needs the X-Export-Token header; None when it checks out
+def export_token_error():
+    token = os.getenv("EXPORT_TOKEN")
+    if not token:
+        return jsonify({"success": False, "message": "Export is disabled."}), 404
+    if not hmac.compare_digest(request.headers.get("X-Export-Token", ""), token):
+        return jsonify({"success": False, "message": "Invalid export token."}), 403
+    return None
+
+# ✅ HTTP: GET /export/user-results?format=ndjson&after_id=123
+@export_routes.route('/user-results', methods=['GET'])
+def export_user_results():
+    error = export_token_error()
+    if error:
+        return error
+
+    fmt = request.args.get("format", "ndjson")
+    try:
+        after_id = int(request.args.get("after_id", 0))
+        limit = int(request.args["limit"]) if request.args.get("limit") else None
+    except ValueError:
+        return jsonify({"success": False, "message": "after_id and limit must be integers."}), 400
+
+    current_app.logger.info("📤 Exporting user_results as %s after id %s", fmt, after_id)
+    chunks = iter_user_result_chunks(after_id, limit)
+
+    if fmt == "ndjson":
+        return Response(ndjson_lines(chunks), mimetype="application/x-ndjson")
+    if fmt == "parquet":
+        return Response(parquet_stream(chunks), mimetype="application/vnd.apache.parquet", headers={
+            "Content-Disposition": f"attachment; filename=user_results_after_{after_id}.parquet"
+        })
+    return jsonify({"success": False, "message": "Invalid format. Use ndjson or parquet."}), 400
@@ -0,0 +1,76 @@
+from flask.json.provider import JSONProvider
+from api.metrics import timed
+from werkzeug.http import http_date
+import dataclasses
+import datetime
+import decimal
+import json
+import os
+import uuid
+
+# ✅ One codec for HTTP responses and the JSON blobs we store in MySQL.
+# orjson when available (JSON_BACKEND=stdlib forces the standard library).
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = os.getenv("JSON_BACKEND", "orjson" if orjson else "stdlib")
+if JSON_BACKEND == "orjson" and orjson is None:
+    JSON_BACKEND = "stdlib"
+
+# ✅ Same conversions Flask's default provider applies, plus the extra types
+# mysql-connector returns (TIME columns come back as timedelta)
+def default(o):
+    if isinstance(o, datetime.date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID, datetime.timedelta)):
+        return str(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+def dumps_bytes(obj, sort_keys=False):
+    if JSON_BACKEND == "orjson":
+        options = _ORJSON_OPTIONS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=default, option=options)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits; the standard library copes with those
+            pass
+    return json.dumps(obj, default=default, sort_keys=sort_keys, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def dumps(obj, sort_keys=False):
+    return dumps_bytes(obj, sort_keys).decode("utf-8")
+
+def loads(data):
+    if JSON_BACKEND == "orjson":
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+# ✅ Flask provider backed by the codec (keys sorted like Flask's default provider)
+class FastJSONProvider(JSONProvider):
+    sort_keys = True
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs):
+        with timed("json"):
+            return dumps(obj, sort_keys=kwargs.get("sort_keys", self.sort_keys))
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        with timed("json"):
+            body = dumps_bytes(obj, sort_keys=self.sort_keys)
+        return self._app.response_class(body, mimetype=self.mimetype)
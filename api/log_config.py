@@ -0,0 +1,121 @@
+from flask import has_request_context, request
+from logging.handlers import QueueHandler, QueueListener
+from api.metrics import register_stats
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+# ✅ Per-route sampling for INFO/DEBUG, e.g. LOG_SAMPLE_RATES="recommendation.get_recommendations=0.1,*=1"
+def parse_sample_rates(raw):
+    rates = {}
+    for part in (raw or "").split(","):
+        if "=" not in part:
+            continue
+        route, rate = part.split("=", 1)
+        try:
+            rates[route.strip()] = max(0.0, min(1.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+LOG_SAMPLE_RATES = parse_sample_rates(os.getenv("LOG_SAMPLE_RATES"))
+
+class RequestContextFilter(logging.Filter):
+    # Runs on the request thread: tags the record with the route and drops sampled-out records
+    # before anything is formatted or queued. Warnings and errors are never sampled.
+    def __init__(self, sample_rates):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.default_rate = sample_rates.get("*", 1.0)
+
+    def filter(self, record):
+        route = None
+        if has_request_context():
+            route = request.endpoint
+            record.route = route
+            record.method = request.method
+            record.path = request.path
+
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.sample_rates.get(route, self.default_rate) if route else self.default_rate
+        return rate >= 1.0 or random.random() < rate
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process
+        }
+        for field in ("route", "method", "path"):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class LazyQueueHandler(QueueHandler):
+    # The stock QueueHandler formats the message on the calling thread; we only render the
+    # traceback here (frames are gone later) and leave msg % args to the listener thread.
+    def prepare(self, record):
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped["count"] += 1
+
+_dropped = {"count": 0}
+_listener = {"instance": None, "pid": None}
+
+def configure_logging():
+    # gunicorn workers are forked, so the listener thread is (re)started per process
+    if _listener["pid"] == os.getpid():
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter(LOG_SAMPLE_RATES))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    _listener.update(instance=listener, pid=os.getpid())
+
+def log_stats():
+    return {"dropped_records": _dropped["count"]}
+
+register_stats("logging", log_stats)
+
+def _stop_listener():
+    if _listener["instance"] is not None and _listener["pid"] == os.getpid():
+        _listener["instance"].stop()
+
+atexit.register(_stop_listener)
@@ -0,0 +1,185 @@
+from flask import Blueprint, Response, g, request, has_request_context
+from contextlib import contextmanager
+import os
+import threading
+import time
+
+metrics_routes = Blueprint('metrics_routes', __name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# ✅ Minimal Prometheus-style histogram (per worker process)
+class Histogram:
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for labels, series in sorted(self.series.items()):
+                label_str = _format_labels(self.label_names, labels)
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f"{self.name}_bucket{_join_labels(label_str, _le(bound))} {count}")
+                lines.append(f"{self.name}_bucket{_join_labels(label_str, _le('+Inf'))} {series['count']}")
+                lines.append(f"{self.name}_sum{{{label_str}}} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{{{label_str}}} {series['count']}")
+        return lines
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{{{_format_labels(self.label_names, labels)}}} {value}")
+        return lines
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names, values):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+def _le(bound):
+    return 'le="%s"' % bound
+
+def _join_labels(label_str, extra):
+    return "{" + (f"{label_str},{extra}" if label_str else extra) + "}"
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Request latency by route.", ("route", "method", "status"))
+PHASE_SECONDS = Histogram("http_request_phase_seconds", "Time spent per request phase.", ("route", "phase"))
+DB_CONNECT_SECONDS = Histogram("db_connect_duration_seconds", "Time to open a MySQL connection.", ("route",))
+DB_QUERY_SECONDS = Histogram("db_query_duration_seconds", "MySQL query latency (execute + fetch).", ("route",))
+DB_QUERIES = Counter("db_queries_total", "MySQL statements executed.", ("route",))
+DB_CONNECT_FAILURES = Counter("db_connect_failures_total", "Failed MySQL connection attempts.", ("route",))
+
+METRICS = [REQUEST_SECONDS, PHASE_SECONDS, DB_CONNECT_SECONDS, DB_QUERY_SECONDS, DB_QUERIES, DB_CONNECT_FAILURES]
+
+# ✅ Other modules can add their own histograms / counters to the scrape
+def register_metric(metric):
+    METRICS.append(metric)
+    return metric
+
+# ✅ Caches (and anything else with live counters) register a callback returning {stat: value}
+_gauge_sources = {}
+
+def register_stats(name, stats_fn):
+    _gauge_sources[name] = stats_fn
+
+def current_route():
+    if has_request_context():
+        return request.endpoint or "unmatched"
+    return "offline"
+
+# ✅ Per-request phase accounting (feeds both Server-Timing and the histograms)
+def _request_timings():
+    if not has_request_context():
+        return None
+    timings = getattr(g, "_phase_timings", None)
+    if timings is None:
+        timings = g._phase_timings = {}
+    return timings
+
+def record_phase(phase, seconds, count=1):
+    timings = _request_timings()
+    if timings is None:
+        return
+    total, calls = timings.get(phase, (0.0, 0))
+    timings[phase] = (total + seconds, calls + count)
+
+@contextmanager
+def timed(phase):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - started)
+
+def observe_db_connect(seconds, failed=False):
+    route = current_route()
+    if failed:
+        DB_CONNECT_FAILURES.inc(route)
+    else:
+        DB_CONNECT_SECONDS.observe(seconds, route)
+    record_phase("db-connect", seconds)
+
+def observe_db_query(seconds, statements=0):
+    route = current_route()
+    DB_QUERY_SECONDS.observe(seconds, route)
+    if statements:
+        DB_QUERIES.inc(route, amount=statements)
+    record_phase("db", seconds, statements)
+
+def _start_timer():
+    g._request_started = time.perf_counter()
+
+def _finish_timer(response):
+    started = getattr(g, "_request_started", None)
+    if started is None:
+        return response
+
+    elapsed = time.perf_counter() - started
+    route = request.endpoint or "unmatched"
+    REQUEST_SECONDS.observe(elapsed, route, request.method, str(response.status_code))
+
+    timings = getattr(g, "_phase_timings", {})
+    entries = []
+    for phase, (seconds, calls) in timings.items():
+        PHASE_SECONDS.observe(seconds, route, phase)
+        desc = f';desc="{calls} queries"' if phase == "db" else ""
+        entries.append(f"{phase};dur={seconds * 1000:.2f}{desc}")
+    entries.append(f"total;dur={elapsed * 1000:.2f}")
+    response.headers["Server-Timing"] = ", ".join(entries)
+    return response
+
+def init_metrics(app):
+    app.before_request(_start_timer)
+    app.after_request(_finish_timer)
+    app.register_blueprint(metrics_routes)
+
+# ✅ Prometheus scrape endpoint
+@metrics_routes.route('/metrics', methods=['GET'])
+def get_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+
+    for source, stats_fn in sorted(_gauge_sources.items()):
+        try:
+            stats = stats_fn()
+        except Exception:
+            continue
+        for stat, value in sorted(stats.items()):
+            name = f"{source}_{stat}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+
+    lines.append("# TYPE process_worker_pid gauge")
+    lines.append(f"process_worker_pid {os.getpid()}")
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
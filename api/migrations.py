@@ -0,0 +1,256 @@
+from api.db import get_db_connection
+from api.catalog_version import SEED_VERSION, VERSION_TABLE
+from api.result_index import RESULT_INDEX_MIGRATION, BackfillResultColumns
+from flask.cli import with_appcontext
+import click
+import logging
+
+# ✅ Versioned schema migrations. Each migration is a list of idempotent steps; applied versions
+# are recorded in `schema_migrations`, so `flask migrate` only runs what is new. Index steps check
+# information_schema first and skip an index whose columns are already the leading columns of an
+# existing one (e.g. a primary key), and build online (INPLACE, no table lock).
+MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT NOT NULL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+class AddIndex:
+    def __init__(self, table, name, columns):
+        self.table = table
+        self.name = name
+        self.columns = list(columns)
+
+    def describe(self):
+        return f"index {self.name} on {self.table}({', '.join(self.columns)})"
+
+    def apply(self, cursor):
+        existing = table_indexes(cursor, self.table)
+        if self.name in existing:
+            return "exists"
+        for index, columns in existing.items():
+            if [c.lower() for c in columns[:len(self.columns)]] == [c.lower() for c in self.columns]:
+                return f"covered by {index}"
+        cursor.execute(
+            f"ALTER TABLE `{self.table}` ADD INDEX `{self.name}` ({', '.join(f'`{c}`' for c in self.columns)}), "
+            "ALGORITHM=INPLACE, LOCK=NONE"
+        )
+        return "created"
+
+class AddColumns:
+    def __init__(self, table, columns):
+        self.table = table
+        self.columns = list(columns)  # [(name, definition)]
+
+    def describe(self):
+        return f"columns {', '.join(name for name, _ in self.columns)} on {self.table}"
+
+    def apply(self, cursor):
+        cursor.execute("""
+            SELECT column_name AS column_name FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s
+        """, (self.table,))
+        existing = {(row["column_name"] if isinstance(row, dict) else row[0]).lower() for row in cursor.fetchall()}
+        missing = [(name, definition) for name, definition in self.columns if name.lower() not in existing]
+        if not missing:
+            return "exists"
+        # One ALTER for all of them; nullable columns at the end are an instant change on MySQL 8
+        cursor.execute(f"ALTER TABLE `{self.table}` " + ", ".join(f"ADD COLUMN `{name}` {definition}" for name, definition in missing))
+        return "created"
+
+class RunStatements:
+    def __init__(self, description, statements):
+        self.description = description
+        self.statements = list(statements)  # each must be safe to re-run
+
+    def describe(self):
+        return self.description
+
+    def apply(self, cursor):
+        for statement in self.statements:
+            cursor.execute(statement)
+        return "done"
+
+RESULT_INDEX_COLUMN_DDL = [
+    ("top_position_id", "INT NULL"),
+    ("top_fit_level", "VARCHAR(32) NULL"),
+    ("fallback_triggered", "TINYINT(1) NULL"),
+    ("catalog_version", "VARCHAR(64) NULL")
+]
+
+# (version, name, steps) in order; never edit an applied migration, add a new one
+MIGRATIONS = [
+    (1, "covering indexes for hot queries", [
+        # /user/results/<user_id>: WHERE user_id ORDER BY submitted_at DESC
+        AddIndex("user_results", "idx_user_results_user_submitted", ["user_id", "submitted_at"]),
+        # save_user_results: UPDATE ... WHERE user_id AND is_submitted = FALSE ORDER BY created_at DESC LIMIT 1
+        # and /user/profile/trials/<user_id>
+        AddIndex("user_trials", "idx_user_trials_user_submitted_created", ["user_id", "is_submitted", "created_at"]),
+        # /user/profile/<user_id>: latest submitted trial, ORDER BY last_updated DESC LIMIT 1
+        AddIndex("user_trials", "idx_user_trials_user_submitted_updated", ["user_id", "is_submitted", "last_updated"]),
+        # google_login and /user/profile lookups (covers SELECT id: InnoDB appends the primary key)
+        AddIndex("users", "idx_users_google_user_id", ["google_user_id"]),
+        # main branch per company (catalog build, /company/<id>)
+        AddIndex("branches", "idx_branches_company_main", ["company_id", "is_main_branch"]),
+        # companies per culture keyword, and keywords per company
+        AddIndex("company_culture", "idx_company_culture_keyword_company", ["keyword_id", "company_id"]),
+        AddIndex("company_culture", "idx_company_culture_company_keyword", ["company_id", "keyword_id"]),
+        # wizard technical skills by subject category
+        AddIndex("category_skill_map", "idx_category_skill_map_category_skill", ["category_id", "skill_id"])
+    ]),
+    (RESULT_INDEX_MIGRATION, "indexed columns extracted from result_data", [
+        AddColumns("user_results", RESULT_INDEX_COLUMN_DDL),
+        AddColumns("user_trials", RESULT_INDEX_COLUMN_DDL),
+        # Backfill before indexing, so the updates don't also maintain the new indexes
+        BackfillResultColumns("user_results"),
+        BackfillResultColumns("user_trials"),
+        AddIndex("user_results", "idx_user_results_top_position", ["top_position_id", "submitted_at"]),
+        AddIndex("user_results", "idx_user_results_fit_level", ["top_fit_level", "submitted_at"]),
+        AddIndex("user_trials", "idx_user_trials_top_position", ["top_position_id", "is_submitted"]),
+        AddIndex("user_trials", "idx_user_trials_fit_level", ["top_fit_level", "is_submitted"])
+    ]),
+    (3, "catalog version row", [
+        # Workers poll this row by primary key (api/catalog_version.py) instead of checksumming the catalog
+        RunStatements("table catalog_version with its 'catalog' row", [VERSION_TABLE, SEED_VERSION])
+    ])
+]
+
+def table_indexes(cursor, table):
+    # Aliased: MySQL 8 returns information_schema column names in upper case
+    cursor.execute("""
+        SELECT index_name AS index_name, column_name AS column_name
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+        ORDER BY index_name, seq_in_index
+    """, (table,))
+    indexes = {}
+    for row in cursor.fetchall():
+        name, column = (row["index_name"], row["column_name"]) if isinstance(row, dict) else row
+        indexes.setdefault(name, []).append(column)
+    return indexes
+
+def applied_versions(cursor):
+    cursor.execute(MIGRATIONS_TABLE)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row["version"] if isinstance(row, dict) else row[0] for row in cursor.fetchall()}
+
+def migrate(cursor, target=None):
+    """Applies pending migrations up to target (all by default); returns [(version, name, [(step, outcome)])]."""
+    done = applied_versions(cursor)
+    applied = []
+    for version, name, steps in MIGRATIONS:
+        if version in done or (target is not None and version > target):
+            continue
+        outcomes = []
+        for step in steps:
+            outcome = step.apply(cursor)
+            logging.info("🧱 Migration %s: %s (%s)", version, step.describe(), outcome)
+            outcomes.append((step.describe(), outcome))
+        # DDL commits implicitly in MySQL: steps are idempotent so a failed run can simply be re-run
+        cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+        applied.append((version, name, outcomes))
+    return applied
+
+# ✅ Hot queries and the index each must use: (name, query, table, alias in EXPLAIN, leading columns).
+# Parameters are named so bench/check_indexes.py can fill them from the seeded fixture.
+HOT_QUERIES = [
+    ("user results by user", """
+        SELECT id, submission_data, result_data, submitted_at FROM user_results
+        WHERE user_id = %(user_id)s ORDER BY submitted_at DESC
+    """, "user_results", "user_results", ["user_id", "submitted_at"]),
+    ("open trial to complete", """
+        SELECT id FROM user_trials
+        WHERE user_id = %(user_id)s AND is_submitted = FALSE ORDER BY created_at DESC LIMIT 1
+    """, "user_trials", "user_trials", ["user_id", "is_submitted", "created_at"]),
+    ("latest submitted trial", """
+        SELECT saved_data, result_data, last_updated FROM user_trials
+        WHERE user_id = %(user_id)s AND is_submitted = TRUE ORDER BY last_updated DESC LIMIT 1
+    """, "user_trials", "user_trials", ["user_id", "is_submitted", "last_updated"]),
+    ("trials by user", """
+        SELECT id, status_class, status_label, is_submitted, created_at, last_updated FROM user_trials
+        WHERE user_id = %(user_id)s ORDER BY created_at DESC
+    """, "user_trials", "user_trials", ["user_id"]),
+    ("user by google id", """
+        SELECT id FROM users WHERE google_user_id = %(user_id)s
+    """, "users", "users", ["google_user_id"]),
+    ("main branch of a company", """
+        SELECT b.city, b.address, b.website_link FROM branches b
+        WHERE b.company_id = %(company_id)s AND b.is_main_branch = 1 LIMIT 1
+    """, "branches", "b", ["company_id", "is_main_branch"]),
+    ("companies with a culture keyword", """
+        SELECT cc.company_id FROM company_culture cc WHERE cc.keyword_id IN (%(keyword_id)s)
+    """, "company_culture", "cc", ["keyword_id", "company_id"]),
+    ("culture keywords of a company", """
+        SELECT ck.name FROM company_culture cc
+        JOIN company_culture_keywords ck ON cc.keyword_id = ck.id
+        WHERE cc.company_id = %(company_id)s
+    """, "company_culture", "cc", ["company_id"]),
+    ("technical skills by subject category", """
+        SELECT csm.skill_id FROM category_skill_map csm WHERE csm.category_id IN (%(category_id)s)
+    """, "category_skill_map", "csm", ["category_id"]),
+    ("users whose top recommendation was a position", """
+        SELECT DISTINCT user_id FROM user_results WHERE top_position_id = %(position_id)s
+    """, "user_results", "user_results", ["top_position_id"]),
+    ("results by fit level", """
+        SELECT id, user_id, top_position_id, submitted_at FROM user_results
+        WHERE top_fit_level = %(fit_level)s ORDER BY submitted_at DESC LIMIT 50
+    """, "user_results", "user_results", ["top_fit_level", "submitted_at"]),
+    ("submitted trials by fit level", """
+        SELECT id, user_id, top_position_id FROM user_trials
+        WHERE top_fit_level = %(fit_level)s AND is_submitted = TRUE
+    """, "user_trials", "user_trials", ["top_fit_level", "is_submitted"])
+]
+
+def explain_hot_queries(cursor, params):
+    """EXPLAINs each hot query; returns a list of dicts with the chosen key and whether it passed."""
+    columns_cache = {}
+    report = []
+    for name, query, table, alias, leading in HOT_QUERIES:
+        cursor.execute("EXPLAIN " + query, params)
+        rows = [row if isinstance(row, dict) else dict(zip(cursor.column_names, row)) for row in cursor.fetchall()]
+        row = next((r for r in rows if r.get("table") == alias), rows[0] if rows else {})
+        if table not in columns_cache:
+            columns_cache[table] = table_indexes(cursor, table)
+        key = row.get("key")
+        key_columns = columns_cache[table].get(key, [])
+        extra = row.get("Extra") or ""
+        report.append({
+            "query": name,
+            "table": table,
+            "key": key,
+            "key_columns": key_columns,
+            "type": row.get("type"),
+            "rows": row.get("rows"),
+            "covering": "Using index" in extra,
+            "filesort": "Using filesort" in extra,
+            "ok": key is not None and [c.lower() for c in key_columns[:len(leading)]] == [c.lower() for c in leading]
+        })
+    return report
+
+@click.command("migrate")
+@click.option("--status", is_flag=True, help="List migrations and whether they are applied.")
+@click.option("--target", type=int, default=None, help="Only apply migrations up to this version.")
+@with_appcontext
+def migrate_command(status, target):
+    # No query deadline: index builds on large tables take longer than a request would
+    connection = get_db_connection(query_timeout_ms=0)
+    try:
+        cursor = connection.cursor(dictionary=True)
+        if status:
+            done = applied_versions(cursor)
+            for version, name, _ in MIGRATIONS:
+                click.echo(f"{'✅' if version in done else '⏳'} {version:>4}  {name}")
+            return
+        applied = migrate(cursor, target)
+        connection.commit()
+    finally:
+        if connection.is_connected():
+            connection.close()
+    if not applied:
+        click.echo("✅ Schema is up to date")
+    for version, name, outcomes in applied:
+        click.echo(f"✅ {version} {name}")
+        for step, outcome in outcomes:
+            click.echo(f"     {step}: {outcome}")
@@ -0,0 +1,196 @@
+from flask import Blueprint, current_app, jsonify, request
+from api.catalog_version import VersionedCache
+from api.db import get_db_connection
+from api import json_codec
+from collections import Counter
+import logging
+import os
+import re
+import threading
+import time
+
+prerequisite_search_routes = Blueprint('prerequisite_search', __name__)
+
+# ✅ Typeahead search over prerequisite names: an in-memory token prefix index per type, ranked
+# by how often each prerequisite was selected in recent submissions (then alphabetically).
+# Built once per catalog version and refreshed every SEARCH_INDEX_TTL_SECONDS; queries never
+# touch the DB. Only the first build in a process runs inline: refreshes (of the index and of the
+# popularity counts, which read up to SEARCH_POPULARITY_SAMPLE submissions) run in a background
+# thread while the previous ones keep being served, so a catalog version bump only re-reads names.
+SEARCH_TYPES = {
+    "subject": "Subject",
+    "technical": "Technical Skill",
+    "non-technical": "Non-Technical Skill"
+}
+SUBMISSION_KEYS = ["subjects", "technical_skills", "non_technical_skills"]
+SEARCH_POPULARITY_SAMPLE = int(os.getenv("SEARCH_POPULARITY_SAMPLE", 20000))
+SEARCH_INDEX_TTL_SECONDS = float(os.getenv("SEARCH_INDEX_TTL_SECONDS", 900))
+SEARCH_MAX_PREFIX = 12
+SEARCH_DEFAULT_PER_PAGE = 10
+SEARCH_MAX_PER_PAGE = 50
+TOKEN_PATTERN = re.compile(r"[\w+#]+")
+
+search_cache = VersionedCache("prerequisite_search", maxsize=4, ttl=SEARCH_INDEX_TTL_SECONDS, background_refresh=True)
+_popularity = {"counts": None, "loaded_at": 0.0, "refreshing": False}
+_popularity_lock = threading.Lock()
+_popularity_first_load = threading.Lock()
+
+def tokenize(text):
+    # "Node.js" → ["node", "js"]; keeps "c++" and "c#" intact
+    return TOKEN_PATTERN.findall(text.lower())
+
+def count_selections(submissions):
+    popularity = Counter()
+    for raw in submissions:
+        try:
+            data = json_codec.loads(raw) if raw else {}
+        except ValueError:
+            continue
+        if not isinstance(data, dict):
+            continue
+        for key in SUBMISSION_KEYS:
+            selected = data.get(key) or []
+            if isinstance(selected, str):
+                try:
+                    selected = json_codec.loads(selected)
+                except ValueError:
+                    continue
+            for prerequisite_id in selected if isinstance(selected, list) else ():
+                if str(prerequisite_id).isdigit():
+                    popularity[int(prerequisite_id)] += 1
+    return popularity
+
+class PrerequisiteIndex:
+    def __init__(self, rows, popularity):
+        # Entries in rank order, so every posting list (and every result) is already ranked
+        self.entries = sorted(({
+            "id": row["id"],
+            "name": row["name"],
+            "type": row["type"],
+            "popularity": popularity.get(row["id"], 0)
+        } for row in rows), key=lambda e: (-e["popularity"], e["name"].lower(), e["id"]))
+        self.tokens = [tokenize(entry["name"]) for entry in self.entries]
+        self.normalized = [" ".join(tokens) for tokens in self.tokens]
+        postings = {}
+        for ordinal, tokens in enumerate(self.tokens):
+            prefixes = {token[:length] for token in tokens for length in range(1, min(len(token), SEARCH_MAX_PREFIX) + 1)}
+            for prefix in prefixes:
+                postings.setdefault(prefix, []).append(ordinal)
+        self.postings = {prefix: tuple(ordinals) for prefix, ordinals in postings.items()}
+        self.posting_sets = {prefix: frozenset(ordinals) for prefix, ordinals in postings.items()}
+
+    def search(self, query):
+        """Ranked entry ordinals whose name has a token starting with each query token."""
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return range(len(self.entries))
+        # Walk the shortest posting list (it is in rank order) and probe the others as sets
+        prefixes = sorted({token[:SEARCH_MAX_PREFIX] for token in query_tokens},
+                          key=lambda prefix: len(self.postings.get(prefix, ())))
+        others = [self.posting_sets.get(prefix, frozenset()) for prefix in prefixes[1:]]
+        matches = [o for o in self.postings.get(prefixes[0], ()) if all(o in other for other in others)]
+        # Postings only go SEARCH_MAX_PREFIX characters deep; longer tokens are checked in full
+        long_tokens = [q for q in query_tokens if len(q) > SEARCH_MAX_PREFIX]
+        if long_tokens:
+            matches = [o for o in matches if all(any(t.startswith(q) for t in self.tokens[o]) for q in long_tokens)]
+        # Names starting with the whole query first, each group in popularity order
+        phrase = " ".join(query_tokens)
+        starts = [o for o in matches if self.normalized[o].startswith(phrase)]
+        return starts + [o for o in matches if not self.normalized[o].startswith(phrase)]
+
+def load_popularity():
+    connection = get_db_connection()
+    try:
+        cursor = connection.cursor(dictionary=True)
+        # Popularity from the most recent submissions only, so the build stays bounded
+        cursor.execute("SELECT submission_data FROM user_results ORDER BY id DESC LIMIT %s", (SEARCH_POPULARITY_SAMPLE,))
+        return count_selections(row["submission_data"] for row in cursor.fetchall())
+    finally:
+        if connection.is_connected():
+            connection.close()
+
+def _store_popularity(counts):
+    with _popularity_lock:
+        _popularity.update(counts=counts, loaded_at=time.monotonic())
+
+def _refresh_popularity():
+    try:
+        _store_popularity(load_popularity())
+    except Exception as e:
+        logging.warning("⚠️ Refreshing search popularity failed, keeping the previous counts: %s", e)
+    finally:
+        with _popularity_lock:
+            _popularity["refreshing"] = False
+
+def current_popularity():
+    # Not per catalog version: selections don't change with it
+    with _popularity_lock:
+        counts = _popularity["counts"]
+        refresh = (counts is not None and not _popularity["refreshing"]
+                   and time.monotonic() - _popularity["loaded_at"] >= SEARCH_INDEX_TTL_SECONDS)
+        if refresh:
+            _popularity["refreshing"] = True
+    if refresh:
+        threading.Thread(target=_refresh_popularity, name="refresh-search-popularity", daemon=True).start()
+    if counts is not None:
+        return counts
+    with _popularity_first_load:
+        if _popularity["counts"] is None:
+            _store_popularity(load_popularity())
+        return _popularity["counts"]
+
+def load_search_indexes():
+    connection = get_db_connection()
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT id AS id, name AS name, type AS type
+            FROM prerequisites
+            WHERE type IN ('Subject', 'Technical Skill', 'Non-Technical Skill')
+        """)
+        rows = cursor.fetchall()
+    finally:
+        if connection.is_connected():
+            connection.close()
+
+    popularity = current_popularity()
+    indexes = {db_type: PrerequisiteIndex([row for row in rows if row["type"] == db_type], popularity)
+               for db_type in SEARCH_TYPES.values()}
+    indexes[None] = PrerequisiteIndex(rows, popularity)
+    return indexes
+
+# ✅ Called by the worker warmup (api/warmup.py)
+def warm_search_index():
+    search_cache.get("indexes", load_search_indexes)
+
+@prerequisite_search_routes.route('/api/prerequisites/search', methods=['GET'])
+def search_prerequisites():
+    type_param = request.args.get("type", "")
+    db_type = SEARCH_TYPES.get(type_param.lower()) if type_param else None
+    if type_param and not db_type:
+        return jsonify({"success": False, "message": "Invalid type value."}), 400
+    try:
+        page = max(int(request.args.get("page", 1)), 1)
+        per_page = min(max(int(request.args.get("per_page", SEARCH_DEFAULT_PER_PAGE)), 1), SEARCH_MAX_PER_PAGE)
+    except ValueError:
+        return jsonify({"success": False, "message": "page and per_page must be integers."}), 400
+
+    try:
+        index = search_cache.get("indexes", load_search_indexes)[db_type]
+    except Exception as e:
+        current_app.logger.exception("❌ Error building prerequisite search index: %s", e)
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    query = request.args.get("q", "")
+    matches = index.search(query)
+    start = (page - 1) * per_page
+    return jsonify({
+        "success": True,
+        "query": query,
+        "type": db_type,
+        "page": page,
+        "per_page": per_page,
+        "total": len(matches),
+        "has_more": start + per_page < len(matches),
+        "results": [index.entries[o] for o in matches[start:start + per_page]]
+    }), 200
@@ -0,0 +1,115 @@
+from flask import g, request
+from collections import Counter
+import cProfile
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+# ✅ Profiling is off unless a token or a sample rate is configured
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_ROUTES = [r.strip() for r in os.getenv("PROFILE_ROUTES", "/recommendations,/companies-for-positions").split(",") if r.strip()]
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/train-track-profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 50))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", 1)) / 1000
+
+# ✅ Statistical sampler: walks the request thread's stack every PROFILE_INTERVAL and
+# counts collapsed stacks (the "folded" format flamegraph.pl / speedscope read)
+class StackSampler:
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def _should_profile():
+    if PROFILE_TOKEN and request.headers.get("X-Profile-Token") == PROFILE_TOKEN:
+        return True
+    if PROFILE_SAMPLE_RATE > 0 and request.path in PROFILE_ROUTES:
+        return random.random() < PROFILE_SAMPLE_RATE
+    return False
+
+def _start_profile():
+    if not _should_profile():
+        return
+    mode = request.headers.get("X-Profile-Mode", PROFILE_MODE)
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        mode = "sample"
+        profiler = StackSampler(threading.get_ident())
+        profiler.start()
+    g._profile = (mode, profiler, time.time())
+
+def _stop_profile(response):
+    profile = getattr(g, "_profile", None)
+    if profile is None:
+        return response
+    g._profile = None
+    mode, profiler, started = profile
+
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        route = (request.endpoint or "unmatched").replace(".", "-")
+        name = f"{int(started * 1000)}-{os.getpid()}-{route}"
+        if mode == "cprofile":
+            profiler.disable()
+            filename = f"{name}.prof"
+            profiler.dump_stats(os.path.join(PROFILE_DIR, filename))
+        else:
+            profiler.stop()
+            filename = f"{name}.folded"
+            profiler.write(os.path.join(PROFILE_DIR, filename))
+        _rotate_profiles()
+        response.headers["X-Profile-File"] = filename
+    except Exception as e:
+        logging.error("❌ Failed to write profile: %s", e)
+    return response
+
+# ✅ Keep only the newest PROFILE_KEEP files
+def _rotate_profiles():
+    entries = [e for e in os.scandir(PROFILE_DIR) if e.name.endswith((".prof", ".folded"))]
+    if len(entries) <= PROFILE_KEEP:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for entry in entries[:len(entries) - PROFILE_KEEP]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+def init_profiling(app):
+    if not PROFILE_TOKEN and PROFILE_SAMPLE_RATE <= 0:
+        return
+    app.before_request(_start_profile)
+    app.after_request(_stop_profile)
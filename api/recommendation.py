@@ -1,10 +1,108 @@
-from flask import Blueprint, request, jsonify, current_app, session
+from flask import Blueprint, Response, request, jsonify, current_app
 from api.db import get_db_connection
-import json
+from api.analytics import record_recommendation
+from api.metrics import register_stats, timed
+from api.session_store import MAX_POSITION_ID, set_recommended_positions, get_recommended_positions
+from api.catalog import PREREQUISITE_KINDS, as_number, get_catalog
+from api.catalog_version import VersionedCache
+from api.result_index import indexed_columns, insert_fragments
+from api import json_codec
+import heapq
+import os
+import threading
+import time
 
 DEBUG_BYPASS_SESSION = True
 recommendation_routes = Blueprint('recommendation', __name__)
 
+# ✅ Name lists per prerequisite type, cached per catalog version (scoring reads the catalog snapshot)
+reference_cache = VersionedCache("recommendation_reference")
+PREREQUISITE_TYPES = ["Subject", "Technical Skill", "Non-Technical Skill"]
+
+def load_prerequisite_names(db_type):
+    connection = get_db_connection()
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT id AS id, name AS name
+            FROM prerequisites
+            WHERE type = %s
+        """, (db_type,))
+        return cursor.fetchall()
+    finally:
+        if connection.is_connected():
+            connection.close()
+
+# ✅ Called by the worker warmup (api/warmup.py)
+def warm_reference_cache():
+    for db_type in PREREQUISITE_TYPES:
+        reference_cache.get(("prerequisite_names", db_type), lambda: load_prerequisite_names(db_type))
+
+# ✅ Major prefilter: only score the positions open to the student's major (its Major
+# prerequisites, or none at all). Off by default; a request can opt in or out with "major_prefilter".
+MAJOR_PREFILTER = os.getenv("RECOMMENDATION_MAJOR_PREFILTER", "0") == "1"
+_prefilter_stats = {"requests": 0, "positions_scored": 0, "positions_pruned": 0, "no_eligible_positions": 0}
+# gthread workers score requests concurrently: counters are updated under a lock
+_stats_lock = threading.Lock()
+
+def prefilter_stats():
+    with _stats_lock:
+        return dict(_prefilter_stats)
+
+register_stats("major_prefilter", prefilter_stats)
+
+def prefilter_requested(data):
+    """The request's "major_prefilter" (JSON bool or "1"/"0"/"true"/"false" string), else the default."""
+    value = data.get("major_prefilter", MAJOR_PREFILTER)
+    if isinstance(value, str):
+        return value.strip().lower() not in ("", "0", "false", "no", "off")
+    return bool(value)
+
+def candidate_positions(catalog, major_id, previous_fallback_ids=frozenset()):
+    """Prerequisites of the positions open to major_id, or None if there are none (score everything)."""
+    try:
+        major_id = int(major_id)
+    except (TypeError, ValueError):
+        return None
+    eligible = catalog.eligible_positions(major_id)
+    if previous_fallback_ids <= eligible:
+        positions = catalog.major_position_prerequisites(major_id)
+    else:
+        # Positions from a previous fallback round stay in, so they can still be promoted
+        positions = catalog.position_prerequisites(position_ids=eligible | previous_fallback_ids)
+    with _stats_lock:
+        _prefilter_stats["requests"] += 1
+        if not positions:
+            _prefilter_stats["no_eligible_positions"] += 1
+        else:
+            _prefilter_stats["positions_scored"] += len(positions)
+            _prefilter_stats["positions_pruned"] += catalog.positions.rows - len(positions)
+    return positions or None
+
+# ✅ Companies embedded in the /recommendations response (same filters as /companies-for-positions,
+# from the snapshot's company index), so the results page doesn't need a second request.
+# Opt-in per request with "include_companies", or for every request with RECOMMENDATION_EMBED_COMPANIES=1.
+EMBED_COMPANIES = os.getenv("RECOMMENDATION_EMBED_COMPANIES", "0") == "1"
+
+def filter_ids(values):
+    # Preferences are echoed from the client as-is: anything but a list of ids filters nothing
+    if not isinstance(values, list):
+        return []
+    return [int(v) for v in values if isinstance(v, (int, str)) and not isinstance(v, bool) and str(v).strip().isdecimal()]
+
+def embedded_companies(catalog, recommended_positions, company_filter_ids):
+    filters = {key: filter_ids(values) for key, values in company_filter_ids.items()}
+    # Like /companies-for-positions: no preferences means no company list
+    if not any(filters.values()):
+        return []
+    return catalog.companies_for_positions(
+        [r["position_id"] for r in recommended_positions],
+        training_mode_ids=filters["training_mode"],
+        company_size_ids=filters["company_size"],
+        industry_ids=filters["preferred_industry"],
+        culture_ids=filters["company_culture"]
+    )
+
 # ✅ Input validation
 def validate_user_input(subject_ids, tech_skills, non_tech_skills, is_fallback=False):
     if not is_fallback:
@@ -35,26 +133,97 @@ def get_fit_level(score, base):
     else:
         return "Perfect Match"
 
+# ✅ Scoring and tiering live outside the route so bench/bench_scoring.py can time them on
+# synthetic catalogs. `positions` is the dict from CatalogSnapshot.position_prerequisites().
+def score_positions(positions, subject_ids, tech_skills, non_tech_skills,
+                    is_fallback=False, previous_fallback_ids=frozenset(), explanations=None):
+    results = []
+
+    for pid, pos in positions.items():
+        matched_counts = {
+            "subjects": len([pid_ for pid_, _ in pos["subjects"] if pid_ in subject_ids]),
+            "technical_skills": len([pid_ for pid_, _ in pos["technical_skills"] if pid_ in tech_skills]),
+            "non_technical_skills": len([pid_ for pid_, _ in pos["non_technical_skills"] if pid_ in non_tech_skills])
+        }
+
+        weighted_total = {
+            "subjects": sum(w for _, w in pos["subjects"]),
+            "technical_skills": sum(w for _, w in pos["technical_skills"]),
+            "non_technical_skills": sum(w for _, w in pos["non_technical_skills"])
+        }
+        weighted_matched = {
+            "subjects": sum(w for pid_, w in pos["subjects"] if pid_ in subject_ids),
+            "technical_skills": sum(w for pid_, w in pos["technical_skills"] if pid_ in tech_skills),
+            "non_technical_skills": sum(w for pid_, w in pos["non_technical_skills"] if pid_ in non_tech_skills)
+        }
+
+        total_weight = sum(weighted_total.values())
+        matched_weight = sum(weighted_matched.values())
+
+        if total_weight == 0 or matched_weight == 0:
+            continue
+
+        base = pos["min_fit_score"]
+        if not base:
+            continue
+
+        fit_level = get_fit_level(matched_weight, base)
+        visual_score = round(min((matched_weight / base / 1.5) * 100, 100), 2)
+
+        # 🐛 Per-position breakdown, only built when the caller asks for it
+        if explanations is not None:
+            explanations.append({
+                "position_id": pid,
+                "position_name": pos["position_name"],
+                "matched": matched_counts,
+                "required": {
+                    "subjects": len(pos["subjects"]),
+                    "technical_skills": len(pos["technical_skills"]),
+                    "non_technical_skills": len(pos["non_technical_skills"])
+                },
+                "weighted_matched": weighted_matched,
+                "weighted_total": weighted_total
+            })
+
+        results.append({
+            "fit_level": fit_level,
+            "match_score_percentage": visual_score,
+            "position_id": pid,
+            "position_name": pos["position_name"],
+            "subject_fit_percentage": round((matched_counts["subjects"] / len(pos["subjects"]) * 100), 2) if len(pos["subjects"]) else 0,
+            "technical_skill_fit_percentage": round((matched_counts["technical_skills"] / len(pos["technical_skills"]) * 100), 2) if len(pos["technical_skills"]) else 0,
+            "non_technical_skill_fit_percentage": round((matched_counts["non_technical_skills"] / len(pos["non_technical_skills"]) * 100), 2) if len(pos["non_technical_skills"]) else 0,
+            "was_promoted_from_fallback": is_fallback and pid in previous_fallback_ids,
+            "matched_weight": matched_weight,
+            "min_fit_score": base,
+            "fit_ratio": round(matched_weight / base * 100, 2)
+        })
+
+    results.sort(key=lambda x: x['match_score_percentage'], reverse=True)
+    return results
+
+# ✅ (perfect, strong, fallback, no match) tiers, each in score order
+def tier_results(results):
+    perfect_matches = [r for r in results if r["fit_level"] == "Perfect Match"]
+    strong_matches = [r for r in results if r["fit_level"] in ["Very Strong Match", "Strong Match", "Partial Match"]]
+    fallbacks = [r for r in results if r["fit_level"] == "Fallback"]
+    no_matches = [r for r in results if r["fit_level"] == "No Match"]
+    return perfect_matches, strong_matches, fallbacks, no_matches
+
 @recommendation_routes.route('/recommendations', methods=['POST'])
 def get_recommendations():
-    current_app.logger.info("🔥 /recommendations route HIT")
-    current_app.logger.info("🚀 Starting recommendation processing...")
-
     data = request.get_json()
 
     user_id = data.get("user_id", "guest_unknown")
-    current_app.logger.info(f"📟 User ID for saving: {user_id}")
+    current_app.logger.info("🚀 /recommendations for user %s", user_id)
 
     if isinstance(data.get("subjects"), str):
         try:
-            data["subjects"] = json.loads(data["subjects"])
+            data["subjects"] = json_codec.loads(data["subjects"])
         except:
             data["subjects"] = []
 
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-
         subject_ids = set(data.get("subjects", []))
         tech_skills = set(data.get("technical_skills", []))
         non_tech_skills = set(data.get("non_technical_skills", []))
@@ -81,134 +250,70 @@ def get_recommendations():
         }
 
         is_fallback = bool(data.get("is_fallback", False)) or bool(previous_fallback_ids)
+        explain = bool(data.get("explain")) or request.args.get("explain") == "1"
+        explanations = [] if explain else None
         error = validate_user_input(subject_ids, tech_skills, non_tech_skills, is_fallback)
         if error:
             return jsonify({"success": False, "message": error}), 400
 
-        cursor.execute("SELECT id, type FROM prerequisites")
-        types = {int(row['id']): row['type'] for row in cursor.fetchall()}
-
-        cursor.execute("""
-            SELECT pp.position_id, pp.prerequisite_id, pp.weight,
-                   p.name AS position_name, p.min_fit_score
-            FROM position_prerequisites pp
-            JOIN positions p ON pp.position_id = p.id
-        """)
-        raw_data = cursor.fetchall()
-
-        positions = {}
-        for row in raw_data:
-            pid = row['position_id']
-            preq_id = int(row['prerequisite_id'])
-            weight = row['weight']
-            type_ = types.get(preq_id)
-
-            if not type_ or type_ == "Major" or weight <= 0:
-                continue
-
-            if pid not in positions:
-                positions[pid] = {
-                    "position_name": row['position_name'],
-                    "min_fit_score": row['min_fit_score'],
-                    "subjects": [],
-                    "technical_skills": [],
-                    "non_technical_skills": []
-                }
-
-            category = {
-                "Subject": "subjects",
-                "Technical Skill": "technical_skills",
-                "Non-Technical Skill": "non_technical_skills"
-            }[type_]
-
-            positions[pid][category].append((preq_id, weight))
-
-        results = []
-
-        for pid, pos in positions.items():
-            matched_counts = {
-                "subjects": len([pid_ for pid_, _ in pos["subjects"] if pid_ in subject_ids]),
-                "technical_skills": len([pid_ for pid_, _ in pos["technical_skills"] if pid_ in tech_skills]),
-                "non_technical_skills": len([pid_ for pid_, _ in pos["non_technical_skills"] if pid_ in non_tech_skills])
-            }
-
-            weighted_total = {
-                "subjects": sum(w for _, w in pos["subjects"]),
-                "technical_skills": sum(w for _, w in pos["technical_skills"]),
-                "non_technical_skills": sum(w for _, w in pos["non_technical_skills"])
-            }
-            weighted_matched = {
-                "subjects": sum(w for pid_, w in pos["subjects"] if pid_ in subject_ids),
-                "technical_skills": sum(w for pid_, w in pos["technical_skills"] if pid_ in tech_skills),
-                "non_technical_skills": sum(w for pid_, w in pos["non_technical_skills"] if pid_ in non_tech_skills)
-            }
-
-            total_weight = sum(weighted_total.values())
-            matched_weight = sum(weighted_matched.values())
-
-            if total_weight == 0 or matched_weight == 0:
-                continue
-
-            base = pos["min_fit_score"]
-            if not base:
-                continue
-
-            fit_level = get_fit_level(matched_weight, base)
-            visual_score = round(min((matched_weight / base / 1.5) * 100, 100), 2)
-
-            # 🐛 Debug output
-            print("📊 DEBUG FOR POSITION:", pid)
-            print("▶️ Position Name:", pos["position_name"])
-            print("Subjects: Matched", matched_counts["subjects"], "/", len(pos["subjects"]))
-            print("Tech:     Matched", matched_counts["technical_skills"], "/", len(pos["technical_skills"]))
-            print("Non-Tech: Matched", matched_counts["non_technical_skills"], "/", len(pos["non_technical_skills"]))
-            print("-----------")
-
-            results.append({
-                "fit_level": fit_level,
-                "match_score_percentage": visual_score,
-                "position_id": pid,
-                "position_name": pos["position_name"],
-                "subject_fit_percentage": round((matched_counts["subjects"] / len(pos["subjects"]) * 100), 2) if len(pos["subjects"]) else 0,
-                "technical_skill_fit_percentage": round((matched_counts["technical_skills"] / len(pos["technical_skills"]) * 100), 2) if len(pos["technical_skills"]) else 0,
-                "non_technical_skill_fit_percentage": round((matched_counts["non_technical_skills"] / len(pos["non_technical_skills"]) * 100), 2) if len(pos["non_technical_skills"]) else 0,
-                "was_promoted_from_fallback": is_fallback and pid in previous_fallback_ids,
-                "matched_weight": matched_weight,
-                "min_fit_score": base,
-                "fit_ratio": round(matched_weight / base * 100, 2)
-            })
-
-        results.sort(key=lambda x: x['match_score_percentage'], reverse=True)
-        session["recommended_positions"] = [r["position_id"] for r in results]
-
-        perfect_matches = [r for r in results if r["fit_level"] == "Perfect Match"]
-        strong_matches = [r for r in results if r["fit_level"] in ["Very Strong Match", "Strong Match", "Partial Match"]]
-        fallbacks = [r for r in results if r["fit_level"] == "Fallback"]
-        no_matches = [r for r in results if r["fit_level"] == "No Match"]
+        # ✅ Positions and weighted prerequisites come from the shared catalog snapshot
+        catalog = get_catalog()
+        positions = None
+        if prefilter_requested(data):
+            positions = candidate_positions(catalog, data.get("major_id"), previous_fallback_ids)
+        major_prefiltered = positions is not None
+        if positions is None:
+            positions = catalog.position_prerequisites()
+
+        # ✅ Scoring is timed separately from DB and JSON work (Server-Timing / metrics)
+        with timed("score"):
+            results = score_positions(positions, subject_ids, tech_skills, non_tech_skills,
+                                      is_fallback, previous_fallback_ids, explanations)
+        set_recommended_positions(r["position_id"] for r in results)
+
+        perfect_matches, strong_matches, fallbacks, no_matches = tier_results(results)
+
+        # ✅ Feed the analytics rollups with the tier we are about to return
+        recommended = perfect_matches[:1] or strong_matches or fallbacks or no_matches
+        record_recommendation(
+            data.get("major_id"),
+            results,
+            recommended,
+            fallback_returned=bool(fallbacks) and not perfect_matches and not strong_matches
+        )
 
         recommendation_result = {
             "results": results,
             "fallback_triggered": bool(fallbacks),
             "preferences_used": has_preferences,
-            "filters": company_filter_ids
+            "filters": company_filter_ids,
+            "catalog_version": catalog.source_version
         }
 
+        # ✅ Saving is best effort: scoring only needs the catalog snapshot, so a DB outage
+        # still returns recommendations
         try:
-            cursor.execute("""
-                INSERT INTO user_results (user_id, submission_data, result_data)
-                VALUES (%s, %s, %s)
+            connection = get_db_connection()
+            cursor = connection.cursor(dictionary=True)
+            # Tagged with the catalog version the results were scored against (recorded in result_data)
+            columns = indexed_columns(cursor, recommendation_result)
+            column_names, placeholders = insert_fragments(columns)
+            cursor.execute(f"""
+                INSERT INTO user_results (user_id, submission_data, result_data{column_names})
+                VALUES (%s, %s, %s{placeholders})
             """, (
                 user_id,
-                json.dumps(data),
-                json.dumps(recommendation_result)
+                json_codec.dumps(data),
+                json_codec.dumps(recommendation_result),
+                *columns.values()
             ))
             connection.commit()
             current_app.logger.info("📏 Trial saved to user_results.")
         except Exception as save_err:
-            current_app.logger.error(f"❌ Failed to save result: {save_err}")
+            current_app.logger.error("❌ Failed to save result: %s", save_err)
 
         if perfect_matches:
-            return jsonify({
+            response = {
                 "success": True,
                 "fallback_possible": False,
                 "fallback_triggered": False,
@@ -216,10 +321,10 @@ def get_recommendations():
                 "recommended_positions": [perfect_matches[0]],
                 "should_fetch_companies": has_preferences,
                 "company_filter_ids": company_filter_ids
-            }), 200
+            }
 
         elif strong_matches:
-            return jsonify({
+            response = {
                 "success": True,
                 "fallback_possible": False,
                 "fallback_triggered": False,
@@ -227,10 +332,10 @@ def get_recommendations():
                 "recommended_positions": strong_matches,
                 "should_fetch_companies": has_preferences,
                 "company_filter_ids": company_filter_ids
-            }), 200
+            }
 
         elif fallbacks:
-            return jsonify({
+            response = {
                 "success": True,
                 "fallback_possible": True,
                 "fallback_triggered": True,
@@ -240,10 +345,10 @@ def get_recommendations():
                 "recommended_positions": fallbacks,
                 "should_fetch_companies": has_preferences or is_fallback,
                 "company_filter_ids": company_filter_ids
-            }), 200
+            }
 
         elif no_matches:
-            return jsonify({
+            response = {
                 "success": True,
                 "fallback_possible": False,
                 "fallback_triggered": False,
@@ -251,28 +356,161 @@ def get_recommendations():
                 "recommended_positions": no_matches,
                 "should_fetch_companies": has_preferences,
                 "company_filter_ids": company_filter_ids
-            }), 200
+            }
 
-        return jsonify({
-            "success": True,
-            "fallback_possible": False,
-            "fallback_triggered": False,
-            "was_fallback_promoted": False,
-            "recommended_positions": [],
-            "should_fetch_companies": has_preferences,
-            "company_filter_ids": company_filter_ids
-        }), 200
+        else:
+            response = {
+                "success": True,
+                "fallback_possible": False,
+                "fallback_triggered": False,
+                "was_fallback_promoted": False,
+                "recommended_positions": [],
+                "should_fetch_companies": has_preferences,
+                "company_filter_ids": company_filter_ids
+            }
+
+        # Saved results send it back, so /user/results records the version these were scored against
+        response["catalog_version"] = catalog.source_version
+
+        if data.get("include_companies", EMBED_COMPANIES):
+            with timed("companies"):
+                response["companies"] = (embedded_companies(catalog, response["recommended_positions"], company_filter_ids)
+                                         if response["should_fetch_companies"] else [])
+
+        if major_prefiltered:
+            response["major_prefilter"] = {"major_id": data.get("major_id"), "positions_scored": len(positions)}
+
+        if explain:
+            response["explain"] = explanations
+
+        return jsonify(response), 200
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        current_app.logger.error(f"❌ Error: {str(e)}")
+        current_app.logger.exception("❌ Error: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
     finally:
         if 'connection' in locals() and connection.is_connected():
             connection.close()
 
+# ✅ Live preview for the wizard: scores a partial selection against the catalog snapshot's
+# inverted index (only positions sharing a prerequisite with it are touched). No validation
+# gating, no DB, no session or analytics writes; returns tier counts and the top N only.
+PREVIEW_TOP_N = int(os.getenv("PREVIEW_TOP_N", 5))
+PREVIEW_MAX_TOP_N = 20
+PREVIEW_BUDGET_MS = float(os.getenv("PREVIEW_BUDGET_MS", 1.0))
+PREVIEW_SSE_RETRY_MS = int(os.getenv("PREVIEW_SSE_RETRY_MS", 3000))
+PREVIEW_KEYS = {"subjects": "Subject", "technical_skills": "Technical Skill", "non_technical_skills": "Non-Technical Skill"}
+PREVIEW_TIERS = {
+    "Perfect Match": "perfect", "Very Strong Match": "strong", "Strong Match": "strong",
+    "Partial Match": "strong", "Fallback": "fallback", "No Match": "no_match"
+}
+_preview_stats = {"requests": 0, "over_budget": 0}
+
+def preview_stats():
+    with _stats_lock:
+        return dict(_preview_stats)
+
+register_stats("recommendation_preview", preview_stats)
+
+def preview_scores(catalog, selections, top_n=PREVIEW_TOP_N, eligible=None):
+    """(tier counts, top_n positions) with the fit levels and scores score_positions() would give."""
+    matched = catalog.matched_weights({PREREQUISITE_KINDS[kind]: ids for kind, ids in selections.items()})
+    ids = catalog.positions["id"]
+    names = catalog.positions["name"]
+    min_fit_scores = catalog.positions["min_fit_score"]
+    tiers = {"perfect": 0, "strong": 0, "fallback": 0, "no_match": 0}
+    scored = []
+    for row, weight in matched.items():
+        if eligible is not None and ids[row] not in eligible:
+            continue
+        base = as_number(min_fit_scores[row])
+        fit_level = get_fit_level(weight, base)
+        tiers[PREVIEW_TIERS[fit_level]] += 1
+        # Row breaks score ties, which is the order /recommendations returns them in
+        scored.append((-round(min((weight / base / 1.5) * 100, 100), 2), row, fit_level))
+    top = [{
+        "position_id": ids[row],
+        "position_name": names[row],
+        "fit_level": fit_level,
+        "match_score_percentage": -score
+    } for score, row, fit_level in heapq.nsmallest(top_n, scored)]
+    return tiers, top
+
+def _preview_ids(values):
+    # Partial selections are best effort: anything that isn't a list (or "1,2" / "[1,2]" string)
+    # of ids counts as nothing selected
+    if isinstance(values, str):
+        try:
+            values = json_codec.loads(values) if values.startswith("[") else values.split(",")
+        except ValueError:
+            return set()
+    if not isinstance(values, list):
+        return set()
+    return {int(v) for v in values if isinstance(v, (int, str)) and not isinstance(v, bool) and str(v).strip().isdecimal()}
+
+def _preview_int(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return None
+    try:
+        return int(value)
+    except (ValueError, OverflowError):
+        return None
+
+def parse_preview_request():
+    if request.method == "POST":
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            data = {}
+    else:
+        data = request.args
+    selections = {PREVIEW_KEYS[key]: _preview_ids(data.get(key)) for key in PREVIEW_KEYS}
+    top_n = _preview_int(data.get("top", PREVIEW_TOP_N))
+    top_n = PREVIEW_TOP_N if top_n is None else min(max(top_n, 1), PREVIEW_MAX_TOP_N)
+    major_id = _preview_int(data.get("major_id")) if prefilter_requested(data) else None
+    return selections, top_n, major_id if major_id is not None and major_id >= 0 else None
+
+@recommendation_routes.route('/recommendations/preview', methods=['GET', 'POST'])
+def preview_recommendations():
+    started = time.perf_counter()
+    try:
+        selections, top_n, major_id = parse_preview_request()
+        catalog = get_catalog()
+        eligible = None
+        if major_id is not None:
+            eligible = catalog.eligible_positions(major_id) or None
+
+        with timed("score"):
+            tiers, top = preview_scores(catalog, selections, top_n, eligible)
+
+        payload = {
+            "success": True,
+            "catalog_version": catalog.source_version,
+            "selected": sum(len(ids) for ids in selections.values()),
+            "tiers": tiers,
+            # The tier /recommendations would return for this selection
+            "recommended_tier": next((tier for tier in ("perfect", "strong", "fallback", "no_match") if tiers[tier]), None),
+            "top": top
+        }
+    except Exception as e:
+        current_app.logger.exception("❌ Error building preview: %s", e)
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    over_budget = (time.perf_counter() - started) * 1000 > PREVIEW_BUDGET_MS
+    with _stats_lock:
+        _preview_stats["requests"] += 1
+        if over_budget:
+            _preview_stats["over_budget"] += 1
+
+    # ✅ Server-sent events: one `preview` event per request. The response ends after it instead
+    # of holding the stream open, so an idle EventSource never ties up one of the gthread worker's
+    # threads; the wizard opens a new EventSource URL when the selection changes.
+    if request.args.get("stream") == "1" or request.accept_mimetypes.best == "text/event-stream":
+        event = (f"retry: {PREVIEW_SSE_RETRY_MS}\nid: {catalog.source_version or ''}\n"
+                 f"event: preview\ndata: {json_codec.dumps(payload)}\n\n")
+        return Response(event, mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+    return jsonify(payload), 200
+
 @recommendation_routes.route('/companies-for-positions', methods=['GET'])
 def get_companies_for_positions():
     try:
@@ -298,67 +536,17 @@ def get_companies_for_positions():
                 "companies": []
             }), 200
 
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
+        def parse_ids(raw):
+            return [int(x.strip()) for x in raw.split(',') if x.strip().isdigit()] if raw else []
 
-        # ✅ Required position filter
-        filters = ["cp.position_id IN ({})".format(','.join(['%s'] * len(position_ids)))]
-        params = list(position_ids)
-
-        if training_modes_raw:
-            mode_ids = [int(x.strip()) for x in training_modes_raw.split(',') if x.strip().isdigit()]
-            if mode_ids:
-                filters.append("c.training_mode_id IN ({})".format(','.join(['%s'] * len(mode_ids))))
-                params.extend(mode_ids)
-
-        if company_sizes_raw:
-            size_ids = [int(x.strip()) for x in company_sizes_raw.split(',') if x.strip().isdigit()]
-            if size_ids:
-                filters.append("c.company_sizes_id IN ({})".format(','.join(['%s'] * len(size_ids))))
-                params.extend(size_ids)
-
-        if industries_raw:
-            ind_ids = [int(x.strip()) for x in industries_raw.split(',') if x.strip().isdigit()]
-            if ind_ids:
-                filters.append("c.industry_id IN ({})".format(','.join(['%s'] * len(ind_ids))))
-                params.extend(ind_ids)
-
-        if company_cultures_raw:
-            culture_ids = [int(x.strip()) for x in company_cultures_raw.split(',') if x.strip().isdigit()]
-            if culture_ids:
-                filters.append("""
-                    c.id IN (
-                        SELECT company_id
-                        FROM company_culture
-                        WHERE keyword_id IN ({})
-                        GROUP BY company_id
-                    )
-                """.format(','.join(['%s'] * len(culture_ids))))
-                params.extend(culture_ids)
-
-        # ✅ Query to fetch company info with position_id included!
-        query = f"""
-            SELECT 
-                DISTINCT cp.position_id,
-                c.id AS company_id,
-                c.company_name,
-                cs.description AS company_size,
-                i.name AS industry,
-                tm.description AS training_mode,
-                b.city AS location,
-                b.address,
-                b.website_link
-            FROM companies c
-            JOIN company_positions cp ON c.id = cp.company_id
-            JOIN company_sizes cs ON c.company_sizes_id = cs.id
-            JOIN industries i ON c.industry_id = i.id
-            JOIN training_modes tm ON c.training_mode_id = tm.id
-            JOIN branches b ON c.id = b.company_id AND b.is_main_branch = 1
-            WHERE {" AND ".join(filters)}
-        """
-
-        cursor.execute(query, tuple(params))
-        rows = cursor.fetchall()
+        # ✅ Filter the cached company index instead of running the join per request
+        rows = get_catalog().companies_for_positions(
+            position_ids,
+            training_mode_ids=parse_ids(training_modes_raw),
+            company_size_ids=parse_ids(company_sizes_raw),
+            industry_ids=parse_ids(industries_raw),
+            culture_ids=parse_ids(company_cultures_raw)
+        )
 
         return jsonify({
             "success": True,
@@ -366,21 +554,15 @@ def get_companies_for_positions():
         }), 200
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        current_app.logger.error(f"❌ Error fetching companies for positions: {str(e)}")
+        current_app.logger.exception("❌ Error fetching companies for positions: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
-    finally:
-        if 'connection' in locals() and connection.is_connected():
-            connection.close()
-
 # 🔧 Add this helper if not defined globally
 def build_in_clause(ids):
     return ','.join(['%s'] * len(ids)), tuple(ids)
 
 def log_error(message):
-    current_app.logger.error(f"❌ {message}")
+    current_app.logger.error("❌ %s", message)
 
 @recommendation_routes.route('/user-input-summary', methods=['POST'])
 def user_input_summary():
@@ -546,45 +728,8 @@ def get_fallback_prerequisites():
         connection = get_db_connection()
         cursor = connection.cursor(dictionary=True)
 
-        # Load prerequisite types
-        cursor.execute("SELECT id, type FROM prerequisites")
-        types = {int(row['id']): row['type'] for row in cursor.fetchall()}
-
-        # Load positions and prerequisites
-        cursor.execute("""
-            SELECT pp.position_id, pp.prerequisite_id, pp.weight,
-                   p.name AS position_name, p.min_fit_score
-            FROM position_prerequisites pp
-            JOIN positions p ON pp.position_id = p.id
-        """)
-        raw_data = cursor.fetchall()
-
-        positions = {}
-        for row in raw_data:
-            pid = row['position_id']
-            preq_id = int(row['prerequisite_id'])
-            weight = row['weight']
-            type_ = types.get(preq_id)
-
-            if not type_ or type_ == "Major":
-                continue
-
-            if pid not in positions:
-                positions[pid] = {
-                    "position_name": row['position_name'],
-                    "min_fit_score": row['min_fit_score'],
-                    "subjects": [],
-                    "technical_skills": [],
-                    "non_technical_skills": []
-                }
-
-            category_key = {
-                "Subject": "subjects",
-                "Technical Skill": "technical_skills",
-                "Non-Technical Skill": "non_technical_skills"
-            }[type_]
-
-            positions[pid][category_key].append((preq_id, weight))
+        # Positions and prerequisites (zero weights included) from the catalog snapshot
+        positions = get_catalog().position_prerequisites(skip_zero_weight=False)
 
         # Identify fallback-only positions
         fallback_positions = []
@@ -675,8 +820,7 @@ def get_fallback_prerequisites():
         }), 200
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        current_app.logger.exception("❌ Error fetching fallback prerequisites: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
     finally:
@@ -703,27 +847,13 @@ def get_prerequisite_names():
         if not db_type:
             return jsonify({"error": "Invalid type value."}), 400
 
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-
-        cursor.execute("""
-            SELECT id AS id, name AS name
-            FROM prerequisites
-            WHERE type = %s
-        """, (db_type,))
-
-        data = cursor.fetchall()
+        data = reference_cache.get(("prerequisite_names", db_type), lambda: load_prerequisite_names(db_type))
         return jsonify(data), 200
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        current_app.logger.exception("❌ Error fetching prerequisite names: %s", e)
         return jsonify({"error": "Server failed while fetching prerequisite names", "details": str(e)}), 500
 
-    finally:
-        if connection and connection.is_connected():
-            connection.close()
-
 @recommendation_routes.route('/recommendations/fallback-test', methods=['GET'])
 def fallback_test():
     return jsonify({"success": True, "message": "Fallback test works ✅"}), 200
@@ -734,15 +864,15 @@ def get_position_details(position_id):
     try:
         # ✅ Bypass session validation in dev mode
         if not DEBUG_BYPASS_SESSION:
-            allowed_ids = session.get("recommended_positions")
+            allowed_ids = get_recommended_positions()
             if allowed_ids is not None and position_id not in allowed_ids:
-                current_app.logger.info(f"🚫 Access denied for position ID {position_id}")
+                current_app.logger.info("🚫 Access denied for position ID %s", position_id)
                 return jsonify({
                     "success": False,
                     "message": "Access denied. This position was not recommended."
                 }), 403
 
-        current_app.logger.info(f"📌 Fetching details for position ID {position_id}")
+        current_app.logger.info("📌 Fetching details for position ID %s", position_id)
 
         # ✅ Connect to database
         connection = get_db_connection()
@@ -797,9 +927,7 @@ def get_position_details(position_id):
         }), 200
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        current_app.logger.error(f"❌ Error: {str(e)}")
+        current_app.logger.exception("❌ Error fetching position details: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
     finally:
@@ -809,22 +937,21 @@ def get_position_details(position_id):
 
 @recommendation_routes.route('/debug/set-session', methods=['POST'])
 def set_debug_session():
-    from flask import session
     try:
         data = request.get_json()
         position_ids = data.get("position_ids", [])
-        if not isinstance(position_ids, list):
+        if not isinstance(position_ids, list) or not all(
+                isinstance(pid, int) and not isinstance(pid, bool) and 0 <= pid <= MAX_POSITION_ID for pid in position_ids):
             return jsonify({"success": False, "message": "Invalid format. Send a list of position IDs."}), 400
 
-        session["recommended_positions"] = position_ids
+        set_recommended_positions(position_ids)
         return jsonify({
             "success": True,
             "message": f"Session updated with position IDs: {position_ids}"
         }), 200
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        current_app.logger.exception("❌ Error setting debug session: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
         
 @recommendation_routes.route('/company/<int:company_id>', methods=['GET'])
@@ -917,7 +1044,7 @@ def resume_trial():
         if not row:
             return jsonify({"success": False, "message": "Trial not found"}), 404
 
-        submission_data = json.loads(row["submission_data"])
+        submission_data = json_codec.loads(row["submission_data"])
         subject_ids = submission_data.get("subjects", [])
 
         # ✅ Load subject category names based on those IDs
@@ -938,8 +1065,7 @@ def resume_trial():
         return jsonify({"success": True, "data": submission_data}), 200
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        current_app.logger.exception("❌ Error resuming trial: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
     finally:
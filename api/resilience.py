@@ -0,0 +1,131 @@
+from api.metrics import Counter, current_route, register_metric, register_stats
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, stop_after_delay, wait_random_exponential
+import logging
+import mysql.connector
+import os
+import threading
+import time
+
+# ✅ DB resilience: short connect timeouts, a few jittered retries bounded by a deadline, and a
+# circuit breaker that fails fast while MySQL is unhealthy instead of pinning every worker
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", 3))
+DB_CONNECT_ATTEMPTS = int(os.getenv("DB_CONNECT_ATTEMPTS", 3))
+DB_CONNECT_DEADLINE = float(os.getenv("DB_CONNECT_DEADLINE", 6))
+DB_RETRY_MAX_WAIT = float(os.getenv("DB_RETRY_MAX_WAIT", 1))
+DB_QUERY_TIMEOUT_MS = int(os.getenv("DB_QUERY_TIMEOUT_MS", 5000))
+DB_BREAKER_FAILURES = int(os.getenv("DB_BREAKER_FAILURES", 5))
+DB_BREAKER_RESET_SECONDS = float(os.getenv("DB_BREAKER_RESET_SECONDS", 15))
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_REJECTIONS = register_metric(Counter(
+    "db_breaker_rejections_total", "DB calls rejected while the circuit breaker was open.", ("route",)
+))
+
+class CircuitOpenError(mysql.connector.errors.InterfaceError):
+    def __init__(self, retry_in):
+        super().__init__(msg=f"Database circuit breaker is open; retrying in {retry_in:.1f}s")
+        self.retry_in = retry_in
+
+def is_transient(error):
+    # Connection-level failures (refused, lost, timed out) are worth retrying; SQL errors are not
+    return (isinstance(error, (mysql.connector.errors.InterfaceError, mysql.connector.errors.OperationalError))
+            and not isinstance(error, CircuitOpenError))
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=DB_BREAKER_FAILURES, reset_seconds=DB_BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.last_error = None
+        self.stats_counts = {"opened": 0, "rejected": 0, "failures": 0}
+
+    def before_call(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            retry_in = self.opened_at + self.reset_seconds - time.monotonic()
+            if self.state == OPEN and retry_in <= 0:
+                self.state = HALF_OPEN
+            # Half-open: a single trial call goes through, everyone else keeps failing fast
+            if self.state == HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return
+            self.stats_counts["rejected"] += 1
+        raise CircuitOpenError(max(retry_in, 0.0))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logging.info("✅ %s circuit breaker closed", self.name)
+            self.state = CLOSED
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.stats_counts["failures"] += 1
+            self.last_error = str(error)
+            self.trial_in_flight = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                if self.state == CLOSED:
+                    logging.error("🛑 %s circuit breaker opened after %d failures: %s", self.name, self.failures, error)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.stats_counts["opened"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = self.opened_at + self.reset_seconds - time.monotonic() if self.state == OPEN else 0.0
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "retry_in_seconds": round(max(retry_in, 0.0), 1),
+                "last_error": self.last_error,
+                **self.stats_counts
+            }
+
+    def stats(self):
+        snapshot = self.snapshot()
+        return {
+            "state": STATE_CODES[snapshot["state"]],
+            "consecutive_failures": snapshot["consecutive_failures"],
+            "opened": snapshot["opened"],
+            "rejected": snapshot["rejected"],
+            "failures": snapshot["failures"]
+        }
+
+db_breaker = CircuitBreaker("mysql")
+register_stats("db_breaker", db_breaker.stats)
+
+def connect_with_retries(connect):
+    """Call connect() through the breaker, retrying transient failures with jittered backoff."""
+    try:
+        db_breaker.before_call()
+    except CircuitOpenError:
+        BREAKER_REJECTIONS.inc(current_route())
+        raise
+
+    retrying = Retrying(
+        retry=retry_if_exception(is_transient),
+        stop=stop_after_attempt(DB_CONNECT_ATTEMPTS) | stop_after_delay(DB_CONNECT_DEADLINE),
+        wait=wait_random_exponential(multiplier=0.1, max=DB_RETRY_MAX_WAIT),
+        reraise=True
+    )
+    try:
+        connection = retrying(connect)
+    except Exception as e:
+        if is_transient(e):
+            db_breaker.record_failure(e)
+        else:
+            db_breaker.record_success()
+        raise
+    db_breaker.record_success()
+    return connection
@@ -0,0 +1,164 @@
+from api.db import get_db_connection
+from api import json_codec
+from flask.cli import with_appcontext
+import click
+import logging
+import os
+import time
+
+# ✅ Indexed columns extracted from result_data at write time (user_results and user_trials), so
+# "users whose top recommendation was position X" or "trials by fit level" are index lookups
+# instead of a JSON parse per row. Added and backfilled by migration RESULT_INDEX_MIGRATION; until
+# it has run, writes keep the old column list.
+RESULT_INDEX_MIGRATION = 2
+RESULT_INDEX_RECHECK_SECONDS = float(os.getenv("RESULT_INDEX_RECHECK_SECONDS", 10))
+RESULT_INDEX_COLUMNS = ["top_position_id", "top_fit_level", "fallback_triggered", "catalog_version"]
+BACKFILL_BATCH_SIZE = int(os.getenv("RESULT_INDEX_BACKFILL_BATCH", 1000))
+
+_ready = {"value": False, "checked_at": 0.0}
+
+# ✅ Pull the headline fields out of either result_data shape we store
+# (full /recommendations result or the frontend's saved result)
+def summarize_result_data(result):
+    summary = {
+        "top_position_id": None,
+        "top_fit_level": None,
+        "fallback_triggered": None,
+        "result_count": 0
+    }
+    if not isinstance(result, dict):
+        return summary
+
+    positions = result.get("results")
+    if positions is None:
+        positions = result.get("recommended_positions")
+    if positions is None and "recommended_position" in result:
+        positions = [result]
+
+    if isinstance(positions, list) and positions:
+        top = positions[0] if isinstance(positions[0], dict) else {}
+        summary["top_position_id"] = top.get("position_id")
+        summary["top_fit_level"] = top.get("fit_level")
+        summary["result_count"] = len(positions)
+
+    if "fallback_triggered" in result:
+        summary["fallback_triggered"] = bool(result["fallback_triggered"])
+    elif summary["top_fit_level"]:
+        summary["fallback_triggered"] = summary["top_fit_level"] == "Fallback"
+    return summary
+
+# Saved results come from the client: values that don't fit their column are stored as NULL
+# rather than failing the INSERT of the result itself
+MYSQL_INT_MAX = 2 ** 31 - 1
+FIT_LEVEL_MAX_LENGTH = 32
+CATALOG_VERSION_MAX_LENGTH = 64
+
+def _int_column(value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        return None
+    return value if -MYSQL_INT_MAX - 1 <= value <= MYSQL_INT_MAX else None
+
+def _string_column(value, max_length):
+    return value if isinstance(value, str) and len(value) <= max_length else None
+
+# catalog_version is the version the result was scored against: /recommendations records it in
+# result_data and returns it with the response, and saved results carry it back. None when unknown.
+def result_columns(result, catalog_version=None):
+    summary = summarize_result_data(result)
+    fallback = summary["fallback_triggered"]
+    if catalog_version is None and isinstance(result, dict):
+        catalog_version = result.get("catalog_version")
+    return {
+        "top_position_id": _int_column(summary["top_position_id"]),
+        "top_fit_level": _string_column(summary["top_fit_level"], FIT_LEVEL_MAX_LENGTH),
+        "fallback_triggered": None if fallback is None else int(fallback),
+        "catalog_version": _string_column(catalog_version, CATALOG_VERSION_MAX_LENGTH)
+    }
+
+def result_index_ready(cursor):
+    # Once the migration is in, it stays in: only a negative answer is re-checked
+    if _ready["value"] or time.monotonic() - _ready["checked_at"] < RESULT_INDEX_RECHECK_SECONDS:
+        return _ready["value"]
+    try:
+        cursor.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (RESULT_INDEX_MIGRATION,))
+        _ready["value"] = bool(cursor.fetchall())
+    except Exception:
+        _ready["value"] = False  # schema_migrations not created yet
+    _ready["checked_at"] = time.monotonic()
+    return _ready["value"]
+
+def indexed_columns(cursor, result, catalog_version=None):
+    """Column → value for the extracted columns, or {} while the migration has not run."""
+    if not result_index_ready(cursor):
+        return {}
+    return result_columns(result, catalog_version)
+
+# ✅ SQL fragments for the extracted columns: ", col, ..." / ", %s, ..." for INSERT, ", col = %s, ..." for UPDATE
+def insert_fragments(columns):
+    return "".join(f", {name}" for name in columns), ", %s" * len(columns)
+
+def update_fragment(columns):
+    return "".join(f", {name} = %s" for name in columns)
+
+# ✅ Migration step: fill the columns for rows written before them, in id-ordered batches.
+# Rows that already have a fit level are skipped, so an interrupted run (or `flask
+# backfill-result-columns`, for rows written while workers had not yet seen the migration) can just be re-run.
+# catalog_version is filled for results that recorded the version they were scored against.
+class BackfillResultColumns:
+    def __init__(self, table):
+        self.table = table
+
+    def describe(self):
+        return f"backfill {', '.join(RESULT_INDEX_COLUMNS)} on {self.table}"
+
+    def apply(self, cursor):
+        last_id, updated = 0, 0
+        while True:
+            cursor.execute(f"""
+                SELECT id, result_data FROM {self.table}
+                WHERE id > %s AND top_fit_level IS NULL AND result_data IS NOT NULL
+                ORDER BY id LIMIT %s
+            """, (last_id, BACKFILL_BATCH_SIZE))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            values = []
+            for row in rows:
+                row_id, raw = (row["id"], row["result_data"]) if isinstance(row, dict) else row
+                last_id = row_id
+                try:
+                    result = json_codec.loads(raw)
+                except ValueError:
+                    continue
+                columns = result_columns(result)
+                if columns["top_fit_level"] is None and columns["top_position_id"] is None:
+                    continue
+                values.append((*columns.values(), row_id))
+            if values:
+                cursor.executemany(f"""
+                    UPDATE {self.table}
+                    SET top_position_id = %s, top_fit_level = %s, fallback_triggered = %s, catalog_version = %s
+                    WHERE id = %s
+                """, values)
+                # Commit per batch so a large backfill doesn't hold one huge transaction
+                cursor.execute("COMMIT")
+                updated += len(values)
+            logging.info("🧱 Backfilled %d rows of %s (up to id %s)", updated, self.table, last_id)
+        return f"{updated} rows updated"
+
+@click.command("backfill-result-columns")
+@with_appcontext
+def backfill_result_columns_command():
+    connection = get_db_connection(query_timeout_ms=0)
+    try:
+        cursor = connection.cursor(dictionary=True)
+        for table in ("user_results", "user_trials"):
+            step = BackfillResultColumns(table)
+            click.echo(f"✅ {step.describe()}: {step.apply(cursor)}")
+    finally:
+        if connection.is_connected():
+            connection.close()
@@ -0,0 +1,252 @@
+from flask import session
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+from itsdangerous import Signer, BadSignature
+from cachetools import LRUCache
+from api import json_codec
+from api.metrics import register_stats
+from array import array
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "/tmp/train-track-sessions.sqlite3")
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", 10000))
+
+RECOMMENDED_POSITIONS_KEY = "recommended_positions"
+# Largest id the sorted uint32 form can hold (positions.id is an INT column)
+MAX_POSITION_ID = 2 ** 32 - 1
+
+# ✅ Compact, immutable set of position ids: a bitmap when ids are dense, a sorted
+# uint32 array when they are sparse (whichever is smaller). Membership is O(1) for the
+# bitmap; the array form builds a frozenset the first time it is queried.
+class PositionSet:
+    BITMAP = b"B"
+    SORTED = b"A"
+
+    def __init__(self, encoded=b""):
+        self.encoded = bytes(encoded)
+        self._members = None
+
+    @classmethod
+    def from_ids(cls, ids):
+        ids = sorted({int(i) for i in ids})
+        if not ids:
+            return cls(cls.SORTED)
+        if ids[0] < 0 or ids[-1] > MAX_POSITION_ID:
+            raise ValueError(f"Position ids must be between 0 and {MAX_POSITION_ID}.")
+        bitmap_size = ids[-1] // 8 + 1
+        if bitmap_size <= len(ids) * 4:
+            bitmap = bytearray(bitmap_size)
+            for i in ids:
+                bitmap[i >> 3] |= 1 << (i & 7)
+            return cls(cls.BITMAP + bytes(bitmap))
+        return cls(cls.SORTED + array("I", ids).tobytes())
+
+    def __contains__(self, position_id):
+        try:
+            position_id = int(position_id)
+        except (TypeError, ValueError):
+            return False
+        if position_id < 0:
+            return False
+        if self.encoded[:1] == self.BITMAP:
+            index = (position_id >> 3) + 1
+            return index < len(self.encoded) and bool(self.encoded[index] & (1 << (position_id & 7)))
+        if self._members is None:
+            self._members = frozenset(self._sorted_ids())
+        return position_id in self._members
+
+    def _sorted_ids(self):
+        values = array("I")
+        values.frombytes(self.encoded[1:])
+        return values
+
+    def __iter__(self):
+        if self.encoded[:1] == self.BITMAP:
+            for index, byte in enumerate(self.encoded[1:]):
+                if byte:
+                    for bit in range(8):
+                        if byte & (1 << bit):
+                            yield index * 8 + bit
+        else:
+            yield from self._sorted_ids()
+
+    def __len__(self):
+        if self.encoded[:1] == self.BITMAP:
+            return sum(bin(byte).count("1") for byte in self.encoded[1:])
+        return len(self.encoded[1:]) // 4
+
+    def __eq__(self, other):
+        return isinstance(other, PositionSet) and list(self) == list(other)
+
+    def __repr__(self):
+        return f"PositionSet({list(self)})"
+
+# ✅ Helpers used by the routes
+def set_recommended_positions(position_ids):
+    session[RECOMMENDED_POSITIONS_KEY] = PositionSet.from_ids(position_ids)
+
+def get_recommended_positions():
+    value = session.get(RECOMMENDED_POSITIONS_KEY)
+    if value is not None and not isinstance(value, PositionSet):
+        value = PositionSet.from_ids(value)
+    return value
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, revision=0, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.revision = revision
+        self.new = new
+        self.modified = False
+
+# ✅ SQLite store shared by all workers on the box (one connection per thread)
+class SQLiteSessionStore:
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def _connection(self):
+        # Opened lazily (per thread and per forked worker), so creating the app does no I/O
+        connection = getattr(self.local, "connection", None)
+        if connection is None or getattr(self.local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._ensure_schema(connection)
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return connection
+
+    def _ensure_schema(self, connection):
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                sid TEXT PRIMARY KEY,
+                revision INTEGER NOT NULL,
+                data BLOB,
+                positions BLOB,
+                expires REAL NOT NULL
+            )
+        """)
+
+    def load(self, sid):
+        row = self._connection().execute(
+            "SELECT revision, data, positions, expires FROM sessions WHERE sid = ?", (sid,)
+        ).fetchone()
+        if not row or row[3] < time.time():
+            return None
+        return row[0], row[1], row[2]
+
+    def save(self, sid, revision, data, positions, expires):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO sessions (sid, revision, data, positions, expires) VALUES (?, ?, ?, ?, ?)",
+            (sid, revision, data, positions, expires)
+        )
+        if random.random() < 0.01:
+            self._connection().execute("DELETE FROM sessions WHERE expires < ?", (time.time(),))
+
+    def delete(self, sid):
+        self._connection().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+# ✅ Session interface: the cookie only carries a signed "<sid>.<revision>"; the data lives in
+# a per-worker LRU in front of the SQLite store. The revision lets a worker trust its LRU
+# copy without a SQLite read unless another worker has saved a newer one.
+class ServerSideSessionInterface(SessionInterface):
+    salt = "train-track-session"
+
+    def __init__(self, path=SESSION_DB_PATH, cache_size=SESSION_CACHE_SIZE):
+        self.store = SQLiteSessionStore(path)
+        self.cache = LRUCache(maxsize=cache_size)
+        self.lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "store_reads": 0, "writes": 0}
+        register_stats("session_store", self.session_stats)
+
+    def session_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["cached_sessions"] = len(self.cache)
+        return stats
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt=self.salt)
+
+    def _new_session(self):
+        return ServerSideSession(sid=uuid.uuid4().hex, new=True)
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if not cookie or not app.secret_key:
+            return self._new_session()
+        try:
+            sid, revision = self._signer(app).unsign(cookie).decode("ascii").split(".", 1)
+            revision = int(revision)
+        except (BadSignature, ValueError, UnicodeDecodeError):
+            return self._new_session()
+
+        with self.lock:
+            cached = self.cache.get(sid)
+            if cached is not None and cached[0] == revision:
+                self.stats["cache_hits"] += 1
+                return ServerSideSession(dict(cached[1]), sid=sid, revision=revision)
+            self.stats["store_reads"] += 1
+
+        record = self.store.load(sid)
+        if record is None:
+            return self._new_session()
+        stored_revision, data, positions = record
+        values = json_codec.loads(data) if data else {}
+        if positions is not None:
+            values[RECOMMENDED_POSITIONS_KEY] = PositionSet(positions)
+        with self.lock:
+            self.cache[sid] = (stored_revision, values)
+        return ServerSideSession(dict(values), sid=sid, revision=stored_revision)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                with self.lock:
+                    self.cache.pop(session.sid, None)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not session.modified:
+            return
+
+        values = dict(session)
+        positions = values.pop(RECOMMENDED_POSITIONS_KEY, None)
+        if positions is not None and not isinstance(positions, PositionSet):
+            positions = PositionSet.from_ids(positions)
+        revision = session.revision + 1
+        expires = time.time() + app.permanent_session_lifetime.total_seconds()
+
+        self.store.save(
+            session.sid, revision,
+            json_codec.dumps_bytes(values) if values else None,
+            positions.encoded if positions is not None else None,
+            expires
+        )
+        if positions is not None:
+            values[RECOMMENDED_POSITIONS_KEY] = positions
+        with self.lock:
+            self.cache[session.sid] = (revision, values)
+            self.stats["writes"] += 1
+
+        cookie = self._signer(app).sign(f"{session.sid}.{revision}").decode("ascii")
+        response.set_cookie(
+            name, cookie,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain, path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
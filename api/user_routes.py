@@ -1,10 +1,9 @@
 from flask import Blueprint, request, jsonify, current_app, session, redirect
 from api.db import get_db_connection
+from api.result_index import indexed_columns, insert_fragments, update_fragment
+from api import json_codec
 import os
 import uuid
-import json
-import google.auth.transport.requests
-import google.oauth2.id_token
 
 user_routes = Blueprint('user_routes', __name__)
 
@@ -12,6 +11,7 @@ user_routes = Blueprint('user_routes', __name__)
 @user_routes.route('/google-login', methods=['GET', 'POST'])
 def google_login():
     try:
+        # Imported on first login only: google.auth is the slowest import in the app
         from google.oauth2 import id_token
         from google.auth.transport import requests
 
@@ -48,7 +48,7 @@ def google_login():
         return jsonify({"success": False, "message": "Invalid token"}), 401
 
     except Exception as e:
-        current_app.logger.error(f"❌ Google login error: {e}")
+        current_app.logger.error("❌ Google login error: %s", e)
         return jsonify({"success": False, "message": "Server error"}), 500
 
     finally:
@@ -86,27 +86,32 @@ def save_user_results():
             result_data["technical_skill_fit_percentage"] = result_data.get("technical_skill_fit_percentage", 65.0)
             result_data["non_technical_skill_fit_percentage"] = result_data.get("non_technical_skill_fit_percentage", 60.0)
 
-        submission_json = json.dumps(submission_data)
-        result_json = json.dumps(result_data)
+        submission_json = json_codec.dumps(submission_data)
+        result_json = json_codec.dumps(result_data)
 
         connection = get_db_connection()
         cursor = connection.cursor()
 
+        # ✅ Indexed copies of the headline fields (top position, fit level, fallback, and the catalog
+        # version the result was scored against, as returned by /recommendations)
+        columns = indexed_columns(cursor, result_data)
+        column_names, placeholders = insert_fragments(columns)
+
         # ✅ 1. Save to user_results (for archive)
-        cursor.execute("""
-            INSERT INTO user_results (user_id, submission_data, result_data)
-            VALUES (%s, %s, %s)
-        """, (user_id, submission_json, result_json))
+        cursor.execute(f"""
+            INSERT INTO user_results (user_id, submission_data, result_data{column_names})
+            VALUES (%s, %s, %s{placeholders})
+        """, (user_id, submission_json, result_json, *columns.values()))
 
         # ✅ 2. Try to update latest incomplete trial
-        cursor.execute("""
+        cursor.execute(f"""
             UPDATE user_trials
             SET 
                 status_class = %s,
                 status_label = %s,
                 result_data = %s,
                 is_submitted = TRUE,
-                last_updated = CURRENT_TIMESTAMP
+                last_updated = CURRENT_TIMESTAMP{update_fragment(columns)}
             WHERE user_id = %s AND is_submitted = FALSE
             ORDER BY created_at DESC
             LIMIT 1
@@ -114,19 +119,21 @@ def save_user_results():
             'completed',
             'Completed',
             result_json,
+            *columns.values(),
             user_id
         ))
 
         # ✅ 3. If no row updated → insert new trial
         if cursor.rowcount == 0:
-            cursor.execute("""
-                INSERT INTO user_trials (user_id, status_class, status_label, result_data, is_submitted)
-                VALUES (%s, %s, %s, %s, TRUE)
+            cursor.execute(f"""
+                INSERT INTO user_trials (user_id, status_class, status_label, result_data, is_submitted{column_names})
+                VALUES (%s, %s, %s, %s, TRUE{placeholders})
             """, (
                 user_id,
                 'completed',
                 'Completed',
-                result_json
+                result_json,
+                *columns.values()
             ))
 
         connection.commit()
@@ -137,7 +144,7 @@ def save_user_results():
         }), 200
 
     except Exception as e:
-        current_app.logger.error(f"❌ Error saving user result: {e}")
+        current_app.logger.error("❌ Error saving user result: %s", e)
         return jsonify({
             "success": False,
             "message": str(e)
@@ -168,8 +175,7 @@ def get_user_results(user_id):
         }), 200
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        current_app.logger.exception("❌ Error fetching user results: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
     finally:
@@ -226,14 +232,14 @@ def get_user_profile(user_id):
             "user": user,
             "guest": False,
             "latest_trial": {
-                "saved_data": json.loads(trial["saved_data"]) if trial and trial["saved_data"] else None,
-                "result_data": json.loads(trial["result_data"]) if trial and trial["result_data"] else None,
+                "saved_data": json_codec.loads(trial["saved_data"]) if trial and trial["saved_data"] else None,
+                "result_data": json_codec.loads(trial["result_data"]) if trial and trial["result_data"] else None,
                 "last_updated": trial["last_updated"].isoformat() if trial and trial["last_updated"] else None
             } if trial else None
         }), 200
 
     except Exception as e:
-        current_app.logger.error(f"❌ Error fetching profile: {e}")
+        current_app.logger.error("❌ Error fetching profile: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
     finally:
@@ -256,7 +262,7 @@ def delete_user_result(trial_id):
         return jsonify({"success": True, "message": "✅ Trial deleted"}), 200
 
     except Exception as e:
-        current_app.logger.error(f"❌ Error deleting result: {e}")
+        current_app.logger.error("❌ Error deleting result: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
     finally:
@@ -289,19 +295,23 @@ def save_user_trial():
         connection = get_db_connection()
         cursor = connection.cursor()
 
-        cursor.execute("""
+        columns = indexed_columns(cursor, result_data) if result_data else {}
+        column_names, placeholders = insert_fragments(columns)
+
+        cursor.execute(f"""
             INSERT INTO user_trials (
                 user_id, status_class, status_label,
-                saved_data, result_data, is_submitted, last_updated
+                saved_data, result_data, is_submitted, last_updated{column_names}
             )
-            VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP{placeholders})
         """, (
             user_id,
             status_class,
             status_label,
-            json.dumps(saved_data) if saved_data else None,
-            json.dumps(result_data) if result_data else None,
-            is_submitted
+            json_codec.dumps(saved_data) if saved_data else None,
+            json_codec.dumps(result_data) if result_data else None,
+            is_submitted,
+            *columns.values()
         ))
 
         connection.commit()
@@ -309,7 +319,7 @@ def save_user_trial():
         return jsonify({"success": True, "message": "Trial saved"}), 200
 
     except Exception as e:
-        current_app.logger.error(f"❌ Error saving trial: {e}")
+        current_app.logger.error("❌ Error saving trial: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
     finally:
@@ -335,7 +345,7 @@ def get_user_trials(user_id):
         return jsonify({"success": True, "trials": trials}), 200
 
     except Exception as e:
-        current_app.logger.error(f"❌ Error fetching trials: {e}")
+        current_app.logger.error("❌ Error fetching trials: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
     finally:
@@ -359,7 +369,7 @@ def get_trial_result_by_id(trial_id):
         if not row or not row["result_data"]:
             return jsonify({"success": False, "message": "No submitted result found"}), 404
 
-        result_data = json.loads(row["result_data"])
+        result_data = json_codec.loads(row["result_data"])
 
         # ✅ Convert flat structure to full nested structure if needed
         if "recommended_positions" not in result_data:
@@ -393,7 +403,7 @@ def get_trial_result_by_id(trial_id):
         }), 200
 
     except Exception as e:
-        current_app.logger.error(f"❌ Error loading trial result: {e}")
+        current_app.logger.error("❌ Error loading trial result: %s", e)
         return jsonify({"success": False, "message": "Server error"}), 500
 
     finally:
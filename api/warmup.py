@@ -0,0 +1,80 @@
+from api.metrics import register_stats
+import logging
+import os
+import threading
+import time
+
+# ✅ Worker warmup: load the catalog snapshot, company index and reference caches before the
+# worker accepts traffic (gunicorn.conf.py calls start_warmup from post_worker_init), so the first
+# real requests don't pay for them. The worker waits for it at most max_wait seconds: gunicorn's
+# heartbeat only starts once post_worker_init returns, so a slower warmup would get the worker
+# killed by the arbiter timeout and respawned in a loop. Past that it finishes in the background.
+# If the DB is unreachable at boot, warmup keeps retrying in the background; either way /healthz
+# reports the worker as not ready until it succeeds.
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", 15))
+
+_status = {"state": "not_run", "started_at": None, "duration_seconds": None, "attempts": 0, "steps": {}, "error": None}
+_lock = threading.Lock()
+
+def _steps():
+    from api.catalog import get_catalog
+    from api.recommendation import warm_reference_cache as warm_recommendation_cache
+    from api.wizard_routes import warm_reference_cache as warm_wizard_cache
+    from api.prerequisite_search import warm_search_index
+    return [
+        ("catalog", lambda: get_catalog().warm()),
+        ("wizard_reference", warm_wizard_cache),
+        ("recommendation_reference", warm_recommendation_cache),
+        ("prerequisite_search", warm_search_index)
+    ]
+
+def run_warmup():
+    with _lock:
+        _status.update(state="running", started_at=time.time(), error=None)
+        _status["attempts"] += 1
+    started = time.perf_counter()
+    steps = {}
+    try:
+        for name, step in _steps():
+            step_started = time.perf_counter()
+            step()
+            steps[name] = round(time.perf_counter() - step_started, 3)
+    except Exception as e:
+        with _lock:
+            _status.update(state="failed", steps=steps, error=str(e),
+                           duration_seconds=round(time.perf_counter() - started, 3))
+        logging.warning("⚠️ Warmup failed (attempt %d), retrying in %ss: %s", _status["attempts"], WARMUP_RETRY_SECONDS, e)
+        timer = threading.Timer(WARMUP_RETRY_SECONDS, run_warmup)
+        timer.daemon = True
+        timer.start()
+        return False
+
+    duration = round(time.perf_counter() - started, 3)
+    with _lock:
+        _status.update(state="ready", steps=steps, duration_seconds=duration)
+    logging.info("🔥 Worker %s warmed up in %.3fs %s", os.getpid(), duration, steps)
+    return True
+
+def start_warmup(max_wait):
+    with _lock:
+        # Not ready from the moment the worker could start serving
+        _status["state"] = "running"
+    thread = threading.Thread(target=run_warmup, name="warmup", daemon=True)
+    thread.start()
+    thread.join(max_wait)
+    if thread.is_alive():
+        logging.warning("⚠️ Warmup still running after %ss, serving while it finishes", max_wait)
+
+def warmup_status():
+    with _lock:
+        status = dict(_status)
+        status["steps"] = dict(_status["steps"])
+    # Without the gunicorn hook (flask run, tests) caches fill lazily and the worker is ready
+    status["ready"] = status["state"] in ("ready", "not_run")
+    return status
+
+def warmup_stats():
+    status = warmup_status()
+    return {"ready": int(status["ready"]), "duration_seconds": status["duration_seconds"] or 0, "attempts": status["attempts"]}
+
+register_stats("warmup", warmup_stats)
@@ -1,35 +1,87 @@
 from flask import Blueprint, request, jsonify, current_app
 from api.db import get_db_connection
+from api.catalog_version import VersionedCache, current_catalog_version
+from api.compression import etag_matches
+from api import json_codec
 import base64
+import hashlib
 import os
 import logging
 from collections import OrderedDict
 import json
 
-# Setup Logging
-logging.basicConfig(level=logging.INFO)
-
 wizard_routes = Blueprint('wizard_routes', __name__)
 # Log error messages
 def log_error(error_message):
-    logging.error(f"Error occurred: {error_message}")
+    logging.error("Error occurred: %s", error_message)
 
-# ✅ Upload category images once
-def upload_category_images_once():
-    connection = get_db_connection()
-    connection.close()
+# ✅ Reference data is cached per catalog version (see api/catalog_version.py); every response
+# below is built from a single cache entry, so it never mixes rows from two versions
+reference_cache = VersionedCache("wizard_reference")
 
-# ✅ Call once when app starts
-try:
-    upload_category_images_once()
-except Exception as e:
-    log_error(f"❌ Failed to upload category images at startup: {e}")
+def with_reference_cursor(load):
+    connection = get_db_connection()
+    try:
+        return load(connection.cursor(dictionary=True))
+    finally:
+        if connection.is_connected():
+            connection.close()
 
+# Loaders take an optional cursor so /wizard/bootstrap can run them all on one connection
+def fetch_reference(query, params=(), cursor=None):
+    if cursor is None:
+        return with_reference_cursor(lambda cursor: fetch_reference(query, params, cursor))
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+def load_subject_categories(cursor=None):
+    return fetch_reference("""
+        SELECT id, name, description
+        FROM categories
+        WHERE id BETWEEN 11 AND 18
+    """, cursor=cursor)
+
+def load_non_technical_skills(cursor=None):
+    return fetch_reference("""
+        SELECT id, name
+        FROM prerequisites
+        WHERE type = 'Non-Technical Skill'
+        ORDER BY name
+    """, cursor=cursor)
+
+# ✅ Called by the worker warmup (api/warmup.py) so the first wizard requests are cache hits
+def warm_reference_cache():
+    reference_cache.get("subject_categories", load_subject_categories)
+    reference_cache.get("non_technical_skills", load_non_technical_skills)
+    reference_cache.get("preferences", load_advanced_preferences)
+    reference_cache.get("bootstrap", load_bootstrap_reference)
 
 # ✅ Helper function to build 'IN' clause dynamically
 def build_in_clause(ids):
     return ','.join(['%s'] * len(ids)), tuple(ids)
 
+# ✅ /subjects and /technical-skills cache by category set. The ids come from the client, so the key
+# uses the sorted, de-duplicated ids and only small sets of known categories are cached; anything
+# else is loaded uncached rather than pushing the hot reference entries out of the shared LRU
+WIZARD_CACHED_CATEGORY_IDS = int(os.getenv("WIZARD_CACHED_CATEGORY_IDS", 3))
+
+def parse_category_ids(ids_param):
+    return tuple(sorted({int(x) for x in ids_param.split(',')}))
+
+def category_cache_key(kind, category_ids):
+    if len(category_ids) > WIZARD_CACHED_CATEGORY_IDS:
+        return None
+    known = {row["id"] for row in reference_cache.get("subject_categories", load_subject_categories)}
+    if not known.issuperset(category_ids):
+        return None
+    return (kind, category_ids)
+
+def fetch_by_categories(kind, query, category_ids):
+    key = category_cache_key(kind, category_ids)
+    if key is None:
+        return fetch_reference(query, category_ids)
+    return reference_cache.get(key, lambda: fetch_reference(query, category_ids))
+
 # ✅ Generalized response function
 def create_response(success, data=None, message=None, status_code=200):
     return jsonify({
@@ -46,50 +98,41 @@ def debug_db():
     })
 
 # ✅ Step 1: Get Majors
+MAJORS = [
+    {"id": 1, "name": "Computer Science Apprenticeship Program"},
+    {"id": 2, "name": "Management Information Systems"},
+    {"id": 163, "name": "Computer Science"},
+    {"id": 164, "name": "Cyber Security"},
+    {"id": 165, "name": "Computer Engineering"}
+]
+
 @wizard_routes.route('/majors', methods=['GET'])
 def get_majors():
-    majors = [
-        {"id": 1, "name": "Computer Science Apprenticeship Program"},
-        {"id": 2, "name": "Management Information Systems"},
-        {"id": 163, "name": "Computer Science"},
-        {"id": 164, "name": "Cyber Security"},
-        {"id": 165, "name": "Computer Engineering"}
-    ]
-    return create_response(True, majors)
+    return create_response(True, MAJORS)
+
+def subject_categories_with_images(rows):
+    base_url = request.host_url.rstrip('/')
+    categories = []
+    for row in rows:
+        static_path = f"/static/categories/{row['id']}.png"
+        full_url = f"{base_url}{static_path}"
+        categories.append({
+            "id": row["id"],
+            "name": row["name"],
+            "description": row["description"],
+            "image_url": full_url
+        })
+    return categories
 
 # ✅ Step 2: Get Subject Categories
 @wizard_routes.route('/subject-categories', methods=['GET'])
 def get_subject_categories():
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT id, name, description
-            FROM categories
-            WHERE id BETWEEN 11 AND 18
-        """)
-        rows = cursor.fetchall()
-
-        base_url = request.host_url.rstrip('/')
-        categories = []
-        for row in rows:
-            static_path = f"/static/categories/{row['id']}.png"
-            full_url = f"{base_url}{static_path}"
-            categories.append({
-                "id": row["id"],
-                "name": row["name"],
-                "description": row["description"],
-                "image_url": full_url
-            })
-
-        return create_response(True, categories)
+        rows = reference_cache.get("subject_categories", load_subject_categories)
+        return create_response(True, subject_categories_with_images(rows))
     except Exception as e:
         log_error(f"Error fetching subject categories: {e}")
         return create_response(False, message=str(e), status_code=500)
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
 
 # ✅ Step 3: Get Subjects by Category IDs (With Category Name)
 @wizard_routes.route('/subjects', methods=['GET'])
@@ -99,12 +142,10 @@ def get_subjects_by_categories():
         return create_response(False, message="Missing category ids.", status_code=400)
 
     try:
-        category_ids = [int(x) for x in ids_param.split(',')]
+        category_ids = parse_category_ids(ids_param)
     except ValueError:
         return create_response(False, message="Invalid category id format.", status_code=400)
 
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
     format_strings, category_ids = build_in_clause(category_ids)
     query = f"""
         SELECT p.id, p.name, p.category_id, c.name AS category_name
@@ -112,9 +153,7 @@ def get_subjects_by_categories():
         JOIN categories c ON p.category_id = c.id
         WHERE p.type = 'Subject' AND p.category_id IN ({format_strings})
     """
-    cursor.execute(query, category_ids)
-    results = cursor.fetchall()
-    connection.close()
+    results = fetch_by_categories("subjects", query, category_ids)
 
     grouped = {}
     for row in results:
@@ -138,12 +177,10 @@ def get_technical_skills_grouped():
         return create_response(False, message="Missing category ids.", status_code=400)
 
     try:
-        category_ids = [int(x) for x in ids_param.split(',')]
+        category_ids = parse_category_ids(ids_param)
     except ValueError:
         return create_response(False, message="Invalid category id format.", status_code=400)
 
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
     format_strings, category_ids = build_in_clause(category_ids)
 
     query = f"""
@@ -160,9 +197,7 @@ def get_technical_skills_grouped():
         WHERE p.type = 'Technical Skill' AND csm.category_id IN ({format_strings})
         ORDER BY sc.id, tc.name, p.name
     """
-    cursor.execute(query, category_ids)
-    rows = cursor.fetchall()
-    connection.close()
+    rows = fetch_by_categories("technical_skills", query, category_ids)
 
     subject_grouped = {}
     globally_seen_skill_ids = set()  # ✅ Deduplication across all groups
@@ -218,69 +253,116 @@ def get_technical_skills_grouped():
 @wizard_routes.route('/non-technical-skills', methods=['GET'])
 def get_non_technical_skills():
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-
-        cursor.execute("""
-            SELECT id, name
-            FROM prerequisites
-            WHERE type = 'Non-Technical Skill'
-            ORDER BY name
-        """)
-        skills = cursor.fetchall()
+        skills = reference_cache.get("non_technical_skills", load_non_technical_skills)
 
         return create_response(True, skills)
 
     except Exception as e:
         log_error(f"Error fetching non-technical skills: {e}")
         return create_response(False, message=str(e), status_code=500)
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
             
 # ✅ Step 5: Save Advanced Preferences 
+def load_advanced_preferences(cursor=None):
+    if cursor is None:
+        return with_reference_cursor(load_advanced_preferences)
+
+    # ✅ Fetch training modes first
+    cursor.execute("SELECT id, description FROM training_modes")
+    training_modes = cursor.fetchall()
+
+    # ✅ Fetch company sizes second
+    cursor.execute("SELECT id, description FROM company_sizes")
+    company_sizes = cursor.fetchall()
+
+    # ✅ Fetch company cultures third
+    cursor.execute("SELECT id, name FROM company_culture_keywords")
+    company_cultures = cursor.fetchall()
+
+    # ✅ Fetch industries fourth
+    cursor.execute("SELECT id, name FROM industries")
+    industries = cursor.fetchall()
+
+    # ✅ Organize the JSON exactly in your requested order
+    return {
+        "training_modes": training_modes,       # First
+        "company_sizes": company_sizes,         # Second
+        "company_cultures": company_cultures,   # Third
+        "industries": industries                # Fourth
+    }
+
 @wizard_routes.route('/preferences', methods=['GET'])
 def get_advanced_preferences():
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-
-        # ✅ Fetch training modes first
-        cursor.execute("SELECT id, description FROM training_modes")
-        training_modes = cursor.fetchall()
-
-        # ✅ Fetch company sizes second
-        cursor.execute("SELECT id, description FROM company_sizes")
-        company_sizes = cursor.fetchall()
-
-        # ✅ Fetch company cultures third
-        cursor.execute("SELECT id, name FROM company_culture_keywords")
-        company_cultures = cursor.fetchall()
-
-        # ✅ Fetch industries fourth
-        cursor.execute("SELECT id, name FROM industries")
-        industries = cursor.fetchall()
-
-        # ✅ Organize the JSON exactly in your requested order
         return jsonify({
             "success": True,
-            "data": {
-                "training_modes": training_modes,       # First
-                "company_sizes": company_sizes,         # Second
-                "company_cultures": company_cultures,   # Third
-                "industries": industries                # Fourth
-            }
+            "data": reference_cache.get("preferences", load_advanced_preferences)
         }), 200
 
     except Exception as e:
         log_error(f"Error fetching preferences: {e}")
         return jsonify({"success": False, "message": str(e)}), 500
 
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+# ✅ Wizard bootstrap: majors, subject categories, non-technical skills and preferences in one
+# payload. The version is one short content hash per section, so `since=<version>` can send only
+# the sections that changed (nothing at all if none did) without keeping old versions around.
+BOOTSTRAP_SECTIONS = ["majors", "subject_categories", "non_technical_skills", "preferences"]
+BOOTSTRAP_MAX_AGE = int(os.getenv("WIZARD_BOOTSTRAP_MAX_AGE", 60))
+
+def load_bootstrap_reference():
+    # Cold cache: one connection for all three loads instead of one per endpoint
+    return with_reference_cursor(lambda cursor: {
+        "subject_categories": load_subject_categories(cursor),
+        "non_technical_skills": load_non_technical_skills(cursor),
+        "preferences": load_advanced_preferences(cursor)
+    })
+
+def section_hash(data):
+    return hashlib.sha1(json_codec.dumps_bytes(data, sort_keys=True)).hexdigest()[:8]
+
+def build_bootstrap():
+    reference = reference_cache.get("bootstrap", load_bootstrap_reference)
+    sections = {
+        "majors": MAJORS,
+        # image_url embeds the host, so the built payload is cached per host
+        "subject_categories": subject_categories_with_images(reference["subject_categories"]),
+        "non_technical_skills": reference["non_technical_skills"],
+        "preferences": reference["preferences"]
+    }
+    hashes = [section_hash(sections[name]) for name in BOOTSTRAP_SECTIONS]
+    return ".".join(hashes), sections
+
+@wizard_routes.route('/bootstrap', methods=['GET'])
+def get_wizard_bootstrap():
+    try:
+        version, sections = reference_cache.get(("bootstrap_payload", request.host_url), build_bootstrap)
+    except Exception as e:
+        log_error(f"Error building wizard bootstrap: {e}")
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    since = request.args.get("since", "")
+    # A delta body depends on `since` as well as the version, so it gets its own ETag
+    etag = f'W/"{version}"' if not since else f'W/"{version}-{section_hash(since)}"'
+    # Matches the gzip / brotli variants of the ETag too (api/compression.py suffixes them)
+    if etag_matches(etag, request.headers.get("If-None-Match")):
+        return "", 304, {"ETag": etag, "Cache-Control": f"public, max-age={BOOTSTRAP_MAX_AGE}"}
+
+    # Delta mode: only the sections whose hash differs from the client's version
+    old_hashes = since.split(".") if since else []
+    changed = [name for index, (name, current) in enumerate(zip(BOOTSTRAP_SECTIONS, version.split(".")))
+               if index >= len(old_hashes) or old_hashes[index] != current]
+
+    response = jsonify({
+        "success": True,
+        "version": version,
+        "catalog_version": current_catalog_version(),
+        "full": len(changed) == len(BOOTSTRAP_SECTIONS),
+        "changed": changed,
+        "data": {name: sections[name] for name in changed}
+    })
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = f"public, max-age={BOOTSTRAP_MAX_AGE}"
+    return response, 200
+
 @wizard_routes.route('/submit', methods=['POST'])
 def submit_wizard():
     connection = None
@@ -357,7 +439,7 @@ def submit_wizard():
         return jsonify({"success": True, "message": "Wizard data submitted!"}), 201
 
     except Exception as e:
-        current_app.logger.error(f"🔥 Error in /submit: {str(e)}")
+        current_app.logger.error("🔥 Error in /submit: %s", e)
         return jsonify({"success": False, "message": "Internal server error."}), 500
 
     finally:
@@ -0,0 +1,101 @@
+# ✅ Cold-start budget: time `import app` in fresh interpreters and fail if it is over budget,
+# opens a network/DB connection, or pulls in modules that should only load on first use.
+# Usage: python bench/bench_import.py [--runs 5] [--budget-ms 500] [--top 15]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only specific requests need (Google login, parquet export)
+LAZY_MODULES = ["google.auth", "google.oauth2", "pyarrow", "pandas"]
+
+PROBE = r"""
+import json, socket, sqlite3, sys, time
+io_calls = []
+
+def guard(name, original):
+    def wrapper(*args, **kwargs):
+        io_calls.append(name)
+        raise RuntimeError(f"{name} called while importing app")
+    return wrapper
+
+socket.socket.connect = guard("socket.connect", socket.socket.connect)
+socket.create_connection = guard("socket.create_connection", socket.create_connection)
+sqlite3.connect = guard("sqlite3.connect", sqlite3.connect)
+
+started = time.perf_counter()
+error = None
+try:
+    import app
+except Exception as e:
+    error = repr(e)
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "seconds": elapsed,
+    "io_calls": io_calls,
+    "error": error,
+    "loaded": [m for m in LAZY_MODULES if m in sys.modules]
+}))
+"""
+
+def run_probe():
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0")
+    probe = f"LAZY_MODULES = {LAZY_MODULES!r}\n" + PROBE
+    output = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def slowest_imports(top):
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT,
+                            capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        # app itself and what it imports directly; deeper entries are already in these totals
+        if depth <= 1:
+            rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", 500)))
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    run_probe()  # populate __pycache__ so every measured run is a warm-disk cold start
+    results = [run_probe() for _ in range(args.runs)]
+    timings = [r["seconds"] * 1000 for r in results]
+    median = statistics.median(timings)
+
+    print(f"import app: median {median:.1f} ms  min {min(timings):.1f} ms  max {max(timings):.1f} ms  budget {args.budget_ms:.0f} ms")
+    print(f"{'module':<40}{'cumulative ms':>14}")
+    for us, name in slowest_imports(args.top):
+        print(f"{name:<40}{us / 1000:>14.1f}")
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"median import time {median:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+    first = results[0]
+    if first["error"]:
+        failures.append(f"import failed: {first['error']}")
+    if first["io_calls"]:
+        failures.append(f"network/DB I/O during import: {sorted(set(first['io_calls']))}")
+    if first["loaded"]:
+        failures.append(f"modules that should load lazily were imported: {first['loaded']}")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ within budget, no I/O at import")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# ✅ JSON throughput: Flask's default provider / stdlib json vs api.json_codec
+# Usage: python bench/bench_json.py [--iterations 2000]
+import argparse
+import datetime
+import decimal
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from api import json_codec
+from api.json_codec import FastJSONProvider
+
+FIT_LEVELS = ["Perfect Match", "Very Strong Match", "Strong Match", "Partial Match", "Fallback", "No Match"]
+
+# ✅ Payload shapes taken from the real endpoints
+def recommendation_result(n_positions=40):
+    results = []
+    for pid in range(1, n_positions + 1):
+        results.append({
+            "fit_level": random.choice(FIT_LEVELS),
+            "match_score_percentage": round(random.uniform(10, 100), 2),
+            "position_id": pid,
+            "position_name": f"Position {pid}",
+            "subject_fit_percentage": round(random.uniform(0, 100), 2),
+            "technical_skill_fit_percentage": round(random.uniform(0, 100), 2),
+            "non_technical_skill_fit_percentage": round(random.uniform(0, 100), 2),
+            "was_promoted_from_fallback": False,
+            "matched_weight": random.randint(1, 30),
+            "min_fit_score": random.randint(5, 20),
+            "fit_ratio": round(random.uniform(50, 200), 2)
+        })
+    return {
+        "results": results,
+        "fallback_triggered": False,
+        "preferences_used": True,
+        "filters": {"training_mode": [1], "company_size": [2], "preferred_industry": [3, 4], "company_culture": [1, 5]}
+    }
+
+def submission_data():
+    return {
+        "user_id": "guest_1a2b3c4d",
+        "major_id": 163,
+        "subjects": random.sample(range(1, 200), 6),
+        "technical_skills": random.sample(range(200, 500), 8),
+        "non_technical_skills": random.sample(range(500, 600), 5),
+        "advanced_preferences": {"training_modes": [1], "company_sizes": [2], "industries": [3], "company_culture": [4, 5]}
+    }
+
+def user_results_rows(n_rows=50):
+    now = datetime.datetime(2025, 5, 1, 12, 0, 0)
+    return {
+        "success": True,
+        "trials": [{
+            "id": i,
+            "submission_data": json.dumps(submission_data()),
+            "result_data": json.dumps(recommendation_result(10)),
+            "submitted_at": now - datetime.timedelta(hours=i)
+        } for i in range(n_rows)]
+    }
+
+def companies_rows(n_rows=300):
+    return {
+        "success": True,
+        "companies": [{
+            "position_id": random.randint(1, 40),
+            "company_id": i,
+            "company_name": f"Company {i}",
+            "company_size": "Medium (50-250)",
+            "industry": "Software",
+            "training_mode": "Hybrid",
+            "location": "Ramallah",
+            "address": f"{i} Main Street",
+            "website_link": f"https://company{i}.example.com",
+            "training_hours": decimal.Decimal("120.50")
+        } for i in range(n_rows)]
+    }
+
+def profile_payload():
+    return {
+        "success": True,
+        "user": {
+            "id": "108234234234", "full_name": "Student", "email": "student@example.com",
+            "registration_date": datetime.datetime(2025, 1, 3, 9, 30), "role": "student", "avatar": None
+        },
+        "guest": False,
+        "latest_trial": {"saved_data": submission_data(), "result_data": recommendation_result(5), "last_updated": "2025-05-01T12:00:00"}
+    }
+
+def bench(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - started
+    return iterations / elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    app = Flask("bench")
+    stdlib_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+
+    responses = {
+        "recommendations": {"success": True, "recommended_positions": recommendation_result()["results"]},
+        "user_results": user_results_rows(),
+        "companies": companies_rows(),
+        "profile": profile_payload()
+    }
+    blobs = {
+        "submission_data": submission_data(),
+        "result_data": recommendation_result()
+    }
+
+    print(f"backend: {json_codec.JSON_BACKEND}  iterations: {args.iterations}")
+    print(f"{'payload':<28}{'stdlib ops/s':>14}{'codec ops/s':>14}{'speedup':>10}")
+
+    def report(name, slow, fast):
+        slow_rate = bench(slow, args.iterations)
+        fast_rate = bench(fast, args.iterations)
+        print(f"{name:<28}{slow_rate:>14,.0f}{fast_rate:>14,.0f}{fast_rate / slow_rate:>9.1f}x")
+
+    for name, payload in responses.items():
+        report(f"encode response {name}", lambda p=payload: stdlib_provider.dumps(p), lambda p=payload: json_codec.dumps_bytes(p, sort_keys=True))
+        encoded = stdlib_provider.dumps(payload)
+        report(f"decode response {name}", lambda e=encoded: stdlib_provider.loads(e), lambda e=encoded: fast_provider.loads(e))
+
+    for name, payload in blobs.items():
+        report(f"encode blob {name}", lambda p=payload: json.dumps(p), lambda p=payload: json_codec.dumps(p))
+        encoded = json.dumps(payload)
+        report(f"decode blob {name}", lambda e=encoded: json.loads(e), lambda e=encoded: json_codec.loads(e))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# ✅ Scoring-path microbenchmarks on synthetic catalogs: times catalog build (pack), snapshot
+# load (mmap + position dict), scoring (all positions, only those open to one major, and the
+# wizard's top-N preview), tiering and serialization separately at several catalog sizes, appends the run to a history file and flags phases that got slower than the last run
+# on the same machine.
+# Usage: python bench/bench_scoring.py [--sizes 50,500,2000,5000] [--repeat 15] [--check]
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from api import json_codec
+from api.catalog import COMPANY_FIELDS, PREREQUISITE_KINDS, CatalogSnapshot, pack_snapshot
+from api.recommendation import candidate_positions, preview_scores, score_positions, tier_results
+
+PHASES = ["build", "load", "score", "score_major", "preview", "tier", "serialize"]
+# Per machine, so kept out of the repo (override with --history or BENCH_HISTORY)
+DEFAULT_HISTORY = os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "train-track", "bench_scoring.jsonl")
+
+# Weight / threshold distributions modelled on the production catalog: most edges weigh 1,
+# a few are core (2-3), a handful are 0 (listed but ignored), and min_fit_score sits at
+# roughly 35-65% of a position's total weight so the tiers stay spread out as it grows.
+EDGE_WEIGHTS = [0] * 3 + [1] * 60 + [2] * 25 + [3] * 12
+EDGES_PER_POSITION = {"Subject": (3, 7), "Technical Skill": (3, 8), "Non-Technical Skill": (2, 5)}
+KIND_KEYS = {"Subject": "subjects", "Technical Skill": "technical_skills", "Non-Technical Skill": "non_technical_skills"}
+# One Major prerequisite per position, except every fourth position which is open to all majors
+MAJOR_IDS = [1, 2, 163, 164, 165]
+
+def synthetic_sections(rnd, n_positions, n_prerequisites, companies_per_position=3):
+    pools = {kind: [] for kind in EDGES_PER_POSITION}
+    kinds = list(EDGES_PER_POSITION)
+    for i in range(n_prerequisites):
+        pools[kinds[i % 3]].append(1000 + i)
+
+    position_rows, edge_rows = [], []
+    for pid in range(1, n_positions + 1):
+        start = len(edge_rows)
+        total = 0
+        for kind, (low, high) in EDGES_PER_POSITION.items():
+            # Skewed towards the popular prerequisites, like real positions sharing core skills
+            pool = pools[kind]
+            picked = set()
+            while len(picked) < min(rnd.randint(low, high), len(pool)):
+                picked.add(pool[min(int(rnd.expovariate(4 / len(pool))), len(pool) - 1)])
+            for prerequisite_id in picked:
+                weight = rnd.choice(EDGE_WEIGHTS)
+                edge_rows.append((prerequisite_id, PREREQUISITE_KINDS[kind], weight))
+                total += weight
+        if pid % 4:
+            edge_rows.append((MAJOR_IDS[pid % len(MAJOR_IDS)], PREREQUISITE_KINDS["Major"], 1))
+        min_fit_score = max(1, round(total * rnd.uniform(0.35, 0.65)))
+        position_rows.append((pid, f"Position {pid}", min_fit_score, start, len(edge_rows)))
+
+    company_rows = []
+    for pid in range(1, n_positions + 1):
+        for c in range(companies_per_position):
+            company_id = rnd.randint(1, max(n_positions, 50))
+            company_rows.append((pid, company_id, f"Company {company_id}", "Medium (50-250)", "Software",
+                                 "Hybrid", "Ramallah", f"{company_id} Main Street",
+                                 f"https://company{company_id}.example.com",
+                                 rnd.randint(1, 3), rnd.randint(1, 4), rnd.randint(1, 8)))
+    culture_rows = [(company_id, rnd.randint(1, 12)) for company_id in range(1, max(n_positions, 50) + 1)
+                    for _ in range(2)]
+
+    sections = {
+        "positions": ([("id", "i64"), ("name", "str"), ("min_fit_score", "f64"), ("edge_start", "i64"), ("edge_end", "i64")], position_rows),
+        "edges": ([("prerequisite_id", "i64"), ("kind", "i64"), ("weight", "f64")], edge_rows),
+        "companies": (COMPANY_FIELDS, company_rows),
+        "company_culture": ([("company_id", "i64"), ("keyword_id", "i64")], culture_rows)
+    }
+    return sections, {KIND_KEYS[kind]: ids for kind, ids in pools.items()}
+
+def synthetic_selections(rnd, pools, count):
+    # Wizard-sized selections (3-7 subjects, 3-8 technical, 3-5 non-technical), popularity-skewed
+    selections = []
+    for _ in range(count):
+        picks = []
+        for key, (low, high) in (("subjects", (3, 7)), ("technical_skills", (3, 8)), ("non_technical_skills", (3, 5))):
+            pool = pools[key]
+            chosen = set()
+            while len(chosen) < min(rnd.randint(low, high), len(pool)):
+                chosen.add(pool[min(int(rnd.expovariate(4 / len(pool))), len(pool) - 1)])
+            picks.append(chosen)
+        selections.append(tuple(picks))
+    return selections
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def bench_size(n_positions, n_prerequisites, repeat, seed):
+    rnd = random.Random(seed + n_positions)
+    sections, pools = synthetic_sections(rnd, n_positions, n_prerequisites)
+    selections = synthetic_selections(rnd, pools, repeat)
+    row = {"positions": n_positions, "prerequisites": n_prerequisites, "edges": len(sections["edges"][1])}
+
+    row["build"] = median_ms(lambda: pack_snapshot(sections), repeat)
+    data, _ = pack_snapshot(sections)
+    row["snapshot_bytes"] = len(data)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.bin")
+        with open(path, "wb") as f:
+            f.write(data)
+
+        def load():
+            snapshot = CatalogSnapshot(path)
+            positions = snapshot.position_prerequisites()
+            snapshot.build_company_index()
+            return positions
+
+        row["load"] = median_ms(load, repeat)
+        positions = load()
+        snapshot = CatalogSnapshot(path)
+
+    # Each scoring call gets a different selection, like consecutive requests
+    scored = [score_positions(positions, *selection) for selection in selections]
+    it = iter(selections * 3)
+    row["score"] = median_ms(lambda: score_positions(positions, *next(it)), repeat)
+    row["results_per_request"] = round(statistics.mean(len(results) for results in scored), 1)
+    # Major prefilter: candidate selection (from the snapshot's major index) plus scoring
+    snapshot.build_major_index()
+    row["score_major"] = median_ms(lambda: score_positions(candidate_positions(snapshot, 163), *next(it)), repeat)
+    # Live preview: inverted-index lookup for the selection, tier counts and the top 5
+    snapshot.build_prerequisite_index()
+    row["preview"] = median_ms(lambda: preview_scores(snapshot, dict(zip(("Subject", "Technical Skill", "Non-Technical Skill"), next(it)))), repeat)
+
+    results = max(scored, key=len)
+    row["tier"] = median_ms(lambda: tier_results(results), repeat)
+
+    # The saved result blob plus a response carrying the largest tier
+    perfect, strong, fallbacks, no_matches = tier_results(results)
+    payload = {
+        "response": {"success": True, "recommended_positions": perfect[:1] or strong or fallbacks or no_matches},
+        "result_data": {"results": results, "fallback_triggered": bool(fallbacks), "preferences_used": False, "filters": {}}
+    }
+    row["serialize"] = median_ms(lambda: json_codec.dumps_bytes(payload), repeat)
+    return row
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def previous_run(history_path, host):
+    if not os.path.exists(history_path):
+        return None
+    last = None
+    with open(history_path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                if entry.get("host") == host:
+                    last = entry
+    return last
+
+def regressions(current, previous, threshold, min_delta_ms):
+    found = []
+    before = {row["positions"]: row for row in previous["results"]}
+    for row in current:
+        old = before.get(row["positions"])
+        if old is None or old.get("prerequisites") != row["prerequisites"]:
+            continue
+        for phase in PHASES:
+            if phase in old and row[phase] > old[phase] * (1 + threshold) and row[phase] - old[phase] >= min_delta_ms:
+                found.append(f"{phase} @ {row['positions']} positions: {old[phase]:.2f} → {row[phase]:.2f} ms")
+    return found
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="50,500,2000,5000", help="catalog sizes in positions")
+    parser.add_argument("--prerequisites-ratio", type=float, default=1.5,
+                        help="prerequisites per position (at least 90)")
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--history", default=os.getenv("BENCH_HISTORY", DEFAULT_HISTORY))
+    parser.add_argument("--no-history", action="store_true", help="don't append this run")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs the last run (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any phase regressed")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    print(f"backend: {json_codec.JSON_BACKEND}  repeat: {args.repeat}  (median ms per call)")
+    print(f"{'positions':>10}{'prereqs':>9}{'edges':>8}{'results':>9}" + "".join(f"{phase:>12}" for phase in PHASES))
+    rows = []
+    for n_positions in sizes:
+        n_prerequisites = max(90, int(n_positions * args.prerequisites_ratio))
+        row = bench_size(n_positions, n_prerequisites, args.repeat, args.seed)
+        rows.append(row)
+        print(f"{row['positions']:>10}{row['prerequisites']:>9}{row['edges']:>8}{row['results_per_request']:>9}"
+              + "".join(f"{row[phase]:>12.2f}" for phase in PHASES))
+
+    host = f"{platform.node()}/{platform.machine()}/py{platform.python_version()}"
+    previous = previous_run(args.history, host)
+    found = regressions(rows, previous, args.threshold, args.min_delta_ms) if previous else []
+    if previous:
+        print(f"compared with {previous.get('commit') or 'unknown commit'} ({previous['timestamp']})")
+    for line in found:
+        print(f"❌ slower: {line}")
+    if previous and not found:
+        print("✅ no phase regressed")
+
+    if not args.no_history:
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        with open(args.history, "a") as f:
+            f.write(json.dumps({
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "host": host,
+                "json_backend": json_codec.JSON_BACKEND,
+                "repeat": args.repeat,
+                "results": rows
+            }) + "\n")
+
+    if args.check and found:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# ✅ Concurrent load driver: runs a weighted mix of the blueprints' endpoints against a running
+# server backed by the bench/seed.py fixture and reports p50/p95/p99 latency and requests/s.
+# Usage: python bench/load_test.py --base-url http://127.0.0.1:8000 --concurrency 16 --duration 30
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# Relative weights of each scenario in the mix (wizard reference steps are what every visitor loads)
+DEFAULT_MIX = {
+    "recommendations": 10,
+    "companies_for_positions": 8,
+    "wizard_majors": 4,
+    "wizard_subject_categories": 4,
+    "wizard_subjects": 4,
+    "wizard_technical_skills": 4,
+    "wizard_non_technical_skills": 4,
+    "wizard_preferences": 4,
+    "user_results": 3,
+    "user_profile": 3,
+    "user_trials": 3,
+    "save_results": 2,
+    "save_trial": 2
+}
+
+def parse_mix(raw):
+    # "recommendations=10,wizard_majors=2" (unlisted scenarios are dropped)
+    if not raw:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+class Scenarios:
+    def __init__(self, manifest, rnd):
+        self.m = manifest
+        self.rnd = rnd
+        self.position_ids = [int(pid) for pid in manifest["positions"]]
+
+    def _selection(self):
+        # Start from one position's prerequisites so some requests produce real matches
+        target = self.m["positions"][str(self.rnd.choice(self.position_ids))]
+        picks = {}
+        for key, low, high in (("subjects", 3, 7), ("technical_skills", 3, 8), ("non_technical_skills", 3, 5)):
+            chosen = [pid for pid in target[key] if self.rnd.random() < 0.7][:high]
+            pool = [pid for pid in self.m[key] if pid not in chosen]
+            chosen += self.rnd.sample(pool, max(low - len(chosen), 0))
+            picks[key] = chosen
+        return picks
+
+    def _user(self):
+        return self.rnd.choice(self.m["users"])
+
+    def recommendations(self):
+        body = {"user_id": self._user(), "major_id": self.rnd.choice(self.m["majors"]), **self._selection(),
+                "advanced_preferences": {"training_modes": [self.rnd.randint(1, 3)], "company_sizes": [],
+                                         "industries": [], "company_culture": []}}
+        return "POST", "/recommendations", body
+
+    def companies_for_positions(self):
+        ids = ",".join(str(pid) for pid in self.rnd.sample(self.position_ids, min(4, len(self.position_ids))))
+        filters = self.rnd.choice(["", "&training_modes=1", "&training_modes=2&company_culture=3", "&industries=1,2"])
+        return "GET", f"/companies-for-positions?ids={ids}{filters}", None
+
+    def wizard_majors(self):
+        return "GET", "/wizard/majors", None
+
+    def wizard_subject_categories(self):
+        return "GET", "/wizard/subject-categories", None
+
+    def _categories(self):
+        categories = self.rnd.sample(self.m["subject_categories"], self.rnd.randint(1, 3))
+        return ",".join(str(c) for c in sorted(categories))
+
+    def wizard_subjects(self):
+        return "GET", f"/wizard/subjects?ids={self._categories()}", None
+
+    def wizard_technical_skills(self):
+        return "GET", f"/wizard/technical-skills?category_ids={self._categories()}", None
+
+    def wizard_non_technical_skills(self):
+        return "GET", "/wizard/non-technical-skills", None
+
+    def wizard_preferences(self):
+        return "GET", "/wizard/preferences", None
+
+    def user_results(self):
+        return "GET", f"/user/results/{self._user()}", None
+
+    def user_profile(self):
+        return "GET", f"/user/profile/{self._user()}", None
+
+    def user_trials(self):
+        return "GET", f"/user/profile/trials/{self._user()}", None
+
+    def save_results(self):
+        selection = self._selection()
+        return "POST", "/user/results", {
+            "user_id": self._user(),
+            "submission_data": selection,
+            "result_data": {"results": [], "fallback_triggered": False}
+        }
+
+    def save_trial(self):
+        return "POST", "/user/wizard/save-trial", {
+            "user_id": self._user(), "status_class": "in-progress", "status_label": "In Progress",
+            "saved_data": self._selection(), "is_submitted": False
+        }
+
+def send(base_url, method, path, body, timeout):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json", "Accept-Encoding": "gzip"})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    except Exception:
+        status = 0
+    return status, time.perf_counter() - started
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+def summarize(samples, elapsed):
+    latencies = sorted(seconds for _, seconds in samples)
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for status, _ in samples if status == 0 or (status >= 500 and status != 503)),
+        "shed_503": sum(1 for status, _ in samples if status == 503),
+        "rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default=os.getenv("BENCH_BASE_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--manifest", default=os.getenv("BENCH_MANIFEST", "/tmp/train-track-bench.json"))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run after warmup")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds of unrecorded traffic first")
+    parser.add_argument("--mix", default=None, help="scenario=weight,... (default: realistic mix)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", default=None, help="also write the report to this file")
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    mix = parse_mix(args.mix)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    base_url = args.base_url.rstrip("/")
+
+    samples = defaultdict(list)
+    lock = threading.Lock()
+    record_from = time.monotonic() + args.warmup
+    stop_at = record_from + args.duration
+
+    def worker(index):
+        rnd = random.Random(args.seed + index)
+        scenarios = Scenarios(manifest, rnd)
+        local = defaultdict(list)
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                break
+            name = rnd.choices(names, weights)[0]
+            method, path, body = getattr(scenarios, name)()
+            status, seconds = send(base_url, method, path, body, args.timeout)
+            if now >= record_from:
+                local[name].append((status, seconds))
+        with lock:
+            for name, values in local.items():
+                samples[name].extend(values)
+
+    print(f"▶️  {base_url}  concurrency {args.concurrency}  warmup {args.warmup:.0f}s  duration {args.duration:.0f}s")
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(worker, range(args.concurrency)))
+
+    report = {name: summarize(values, args.duration) for name, values in sorted(samples.items())}
+    report["TOTAL"] = summarize([s for values in samples.values() for s in values], args.duration)
+
+    print(f"{'scenario':<30}{'requests':>9}{'errors':>8}{'503':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, row in report.items():
+        print(f"{name:<30}{row['requests']:>9}{row['errors']:>8}{row['shed_503']:>6}{row['rps']:>9}"
+              f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "report": report}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+# ✅ Deterministic replay of captured traffic (CAPTURE_ENABLED=1, api/capture.py) against a local
+# instance: re-issues the requests in capture order at the original pacing (or scaled by --speed),
+# compares status codes and sanitized response bodies, and compares per-route latency with the capture.
+# Ids in a capture are pseudonyms, so rows that existed before the capture are not found on replay:
+# to compare two builds, replay once with --record baseline.jsonl on a freshly seeded fixture, then
+# replay the candidate with --baseline baseline.jsonl (reseed in between when the capture has writes;
+# --concurrency 1 keeps the order of writes, and so the new row ids, identical between runs).
+# Usage: python bench/replay.py /tmp/train-track-capture --base-url http://127.0.0.1:8000 [--speed 2] [--check]
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from api import json_codec
+from api.capture import CAPTURE_DIR, body_digest, configure_salt, sanitize
+from load_test import percentile
+
+# Fields that legitimately differ between runs (timestamps, ids of new rows, URLs built from the Host)
+DEFAULT_IGNORE_KEYS = "submitted_at,last_updated,created_at,registration_date,trial_id,image_url"
+# Lists ordered by a second-resolution timestamp: rows written in the same second can come back
+# in either order, so these are compared as multisets
+DEFAULT_UNORDERED_KEYS = "trials"
+# Responses that are random by design: only the status code is compared
+UNCOMPARED_ROUTES = {"user_routes.generate_guest_user"}
+WRITE_METHODS = {"POST", "PUT", "DELETE"}
+
+def load_captures(paths):
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*.jsonl"))) if os.path.isdir(path) else [path])
+    records = []
+    for file_index, path in enumerate(files):
+        with open(path) as f:
+            for line_index, line in enumerate(f):
+                if line.strip():
+                    records.append((file_index, line_index, json.loads(line)))
+    # Capture order across workers: timestamp, then file/line for ties
+    records.sort(key=lambda item: (item[2]["ts"], item[0], item[1]))
+    return [record for _, _, record in records]
+
+def normalize(value, ignore, unordered, key=None):
+    if isinstance(value, dict):
+        return {k: normalize(v, ignore, unordered, k) for k, v in value.items() if k not in ignore}
+    if isinstance(value, list):
+        items = [normalize(v, ignore, unordered) for v in value]
+        if key in unordered:
+            items.sort(key=lambda item: json.dumps(item, sort_keys=True, default=str))
+        return items
+    return value
+
+def first_difference(expected, actual, path="$"):
+    if type(expected) is not type(actual):
+        return f"{path}: {expected!r} != {actual!r}"
+    if isinstance(expected, dict):
+        for key in sorted(set(expected) | set(actual), key=str):
+            if key not in expected or key not in actual:
+                return f"{path}.{key}: {'missing' if key not in actual else 'unexpected'}"
+            diff = first_difference(expected[key], actual[key], f"{path}.{key}")
+            if diff:
+                return diff
+        return None
+    if isinstance(expected, list):
+        if len(expected) != len(actual):
+            return f"{path}: {len(expected)} items != {len(actual)} items"
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            diff = first_difference(a, b, f"{path}[{i}]")
+            if diff:
+                return diff
+        return None
+    return None if expected == actual else f"{path}: {expected!r} != {actual!r}"
+
+def decode(body, encoding):
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "br":
+        import brotli
+        return brotli.decompress(body)
+    return body
+
+def server_time_ms(header):
+    # Captured timings are server-side, so compare against the replayed "total" from Server-Timing
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        if name == "total" and params.startswith("dur="):
+            return float(params[4:])
+    return None
+
+class Replayer:
+    def __init__(self, base_url, timeout, ignore_keys, unordered_keys):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.ignore_keys = ignore_keys
+        self.unordered_keys = unordered_keys
+        self._openers = {}
+        self._lock = threading.Lock()
+
+    def _opener(self, client):
+        # One cookie jar per captured client, so server-side sessions behave as they did
+        with self._lock:
+            opener = self._openers.get(client)
+            if opener is None:
+                opener = self._openers[client] = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+        return opener
+
+    def send(self, record):
+        url = self.base_url + record["path"] + (f"?{record['query']}" if record["query"] else "")
+        data = None
+        if "json" in record["request"]:
+            data = json_codec.dumps_bytes(record["request"]["json"])
+        request = urllib.request.Request(url, data=data, method=record["method"], headers=record["headers"])
+        started = time.perf_counter()
+        try:
+            with self._opener(record["client"]).open(request, timeout=self.timeout) as response:
+                status, body, headers = response.status, response.read(), response.headers
+        except urllib.error.HTTPError as e:
+            status, body, headers = e.code, e.read(), e.headers
+        except Exception as e:
+            return {"status": 0, "ms": (time.perf_counter() - started) * 1000, "error": repr(e)}
+        elapsed = (time.perf_counter() - started) * 1000
+        return {"status": status, "ms": server_time_ms(headers.get("Server-Timing")) or elapsed, "client_ms": elapsed,
+                "body": decode(body, headers.get("Content-Encoding")),
+                "mimetype": (headers.get("Content-Type") or "").split(";")[0]}
+
+    def compare(self, expected, result):
+        """expected is a capture record or a recorded replay outcome; returns None or what differs."""
+        if result["status"] != expected["status"]:
+            return f"status {expected['status']} != {result['status']}" + (f" ({result['error']})" if "error" in result else "")
+        response = expected["response"]
+        if expected["route"] in UNCOMPARED_ROUTES or response.get("streamed") or "sha1" not in response:
+            return None
+        if result["mimetype"] != "application/json":
+            return None if hashlib.sha1(result["body"]).hexdigest() == response["sha1"] else "body differs"
+        actual = sanitize(json_codec.loads(result["body"]))
+        if "json" in response:
+            return first_difference(normalize(response["json"], self.ignore_keys, self.unordered_keys),
+                                    normalize(actual, self.ignore_keys, self.unordered_keys))
+        # Body was too large to keep: only the digest is available
+        return None if body_digest(actual) == response["sha1"] else "body digest differs"
+
+def outcome(index, record, result):
+    # Same shape as a capture record, so a recorded replay can serve as the next baseline
+    entry = {"index": index, "route": record["route"], "method": record["method"], "path": record["path"],
+             "status": result["status"], "ms": round(result["ms"], 3), "response": {}}
+    body = result.get("body")
+    if body and result["mimetype"] == "application/json":
+        sanitized = sanitize(json_codec.loads(body))
+        entry["response"] = {"sha1": body_digest(sanitized), "json": sanitized}
+    elif body:
+        entry["response"] = {"sha1": hashlib.sha1(body).hexdigest()}
+    return entry
+
+def load_baseline(path, records):
+    with open(path) as f:
+        baseline = {entry["index"]: entry for entry in map(json.loads, filter(str.strip, f))}
+    for index, record in enumerate(records):
+        entry = baseline.get(index)
+        if entry is None or (entry["method"], entry["path"]) != (record["method"], record["path"]):
+            raise SystemExit(f"{path} was recorded from a different capture (or different --routes/--skip-writes)")
+    return baseline
+
+def route_report(rows, threshold, min_delta_ms):
+    report, regressions = {}, []
+    by_route = defaultdict(list)
+    for row in rows:
+        by_route[row["route"]].append(row)
+    for route, items in sorted(by_route.items()):
+        expected = sorted(item["expected_ms"] for item in items)
+        replayed = sorted(item["replay_ms"] for item in items)
+        entry = {
+            "requests": len(items),
+            "mismatches": sum(1 for item in items if item["mismatch"]),
+            "expected_p50_ms": round(percentile(expected, 50), 1),
+            "expected_p95_ms": round(percentile(expected, 95), 1),
+            "replay_p50_ms": round(percentile(replayed, 50), 1),
+            "replay_p95_ms": round(percentile(replayed, 95), 1)
+        }
+        report[route] = entry
+        slower = entry["replay_p95_ms"] - entry["expected_p95_ms"]
+        if entry["replay_p95_ms"] > entry["expected_p95_ms"] * (1 + threshold) and slower >= min_delta_ms:
+            regressions.append(f"{route}: p95 {entry['expected_p95_ms']} → {entry['replay_p95_ms']} ms")
+    return report, regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("captures", nargs="*", default=[CAPTURE_DIR], help="capture files or directories")
+    parser.add_argument("--base-url", default=os.getenv("BENCH_BASE_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--speed", type=float, default=1.0, help="pacing multiplier (2 = twice as fast, 0 = no pauses)")
+    parser.add_argument("--concurrency", type=int, default=32, help="max requests in flight")
+    parser.add_argument("--routes", default=None, help="only replay these endpoints (comma separated)")
+    parser.add_argument("--skip-writes", action="store_true", help="don't replay POST/PUT/DELETE")
+    parser.add_argument("--ignore-keys", default=DEFAULT_IGNORE_KEYS, help="response keys left out of the comparison")
+    parser.add_argument("--unordered-keys", default=DEFAULT_UNORDERED_KEYS, help="lists compared regardless of order")
+    parser.add_argument("--salt", default=os.getenv("CAPTURE_SALT") or os.getenv("FLASK_SECRET_KEY", "train_track_secret_key"))
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p95 slowdown per route (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore p95 slowdowns smaller than this")
+    parser.add_argument("--show", type=int, default=10, help="print this many mismatches")
+    parser.add_argument("--baseline", default=None, help="compare with a replay saved by --record instead of the capture")
+    parser.add_argument("--record", default=None, help="save this replay's outcomes (JSON lines) as a baseline")
+    parser.add_argument("--json", default=None, help="also write the report to this file")
+    parser.add_argument("--check", action="store_true", help="exit 1 on any mismatch or latency regression")
+    args = parser.parse_args()
+
+    configure_salt(args.salt)
+    records = load_captures(args.captures)
+    if args.routes:
+        wanted = {route.strip() for route in args.routes.split(",")}
+        records = [r for r in records if r["route"] in wanted]
+    if args.skip_writes:
+        records = [r for r in records if r["method"] not in WRITE_METHODS]
+    if not records:
+        raise SystemExit("No captured requests to replay.")
+
+    baseline = load_baseline(args.baseline, records) if args.baseline else None
+    replayer = Replayer(args.base_url.rstrip("/"), args.timeout, set(filter(None, args.ignore_keys.split(","))),
+                        set(filter(None, args.unordered_keys.split(","))))
+    rows, outcomes = [], []
+    lock = threading.Lock()
+
+    def run(index, record):
+        result = replayer.send(record)
+        expected = baseline[index] if baseline else record
+        mismatch = replayer.compare(expected, result)
+        with lock:
+            rows.append({"route": record["route"], "method": record["method"], "path": record["path"],
+                         "expected_ms": expected["ms"], "replay_ms": result["ms"], "mismatch": mismatch})
+            if args.record:
+                outcomes.append(outcome(index, record, result))
+
+    span = records[-1]["ts"] - records[0]["ts"]
+    against = f"baseline {args.baseline}" if baseline else "capture"
+    print(f"▶️  {len(records)} requests over {span:.1f}s captured  speed {args.speed or 'max'}  → {args.base_url}  (vs {against})")
+    started = time.monotonic()
+    # Bounded in-flight requests: a slow server delays later sends instead of queueing them all
+    slots = threading.BoundedSemaphore(args.concurrency)
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for index, record in enumerate(records):
+            if args.speed > 0:
+                delay = (record["ts"] - records[0]["ts"]) / args.speed - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            slots.acquire()
+            future = pool.submit(run, index, record)
+            future.add_done_callback(lambda _: slots.release())
+    elapsed = time.monotonic() - started
+
+    report, regressions = route_report(rows, args.threshold, args.min_delta_ms)
+    mismatches = [row for row in rows if row["mismatch"]]
+    print(f"{'route':<48}{'requests':>9}{'diffs':>7}{'exp p50':>9}{'exp p95':>9}{'rep p50':>9}{'rep p95':>9}")
+    for route, entry in report.items():
+        print(f"{route:<48}{entry['requests']:>9}{entry['mismatches']:>7}{entry['expected_p50_ms']:>9}"
+              f"{entry['expected_p95_ms']:>9}{entry['replay_p50_ms']:>9}{entry['replay_p95_ms']:>9}")
+    print(f"replayed in {elapsed:.1f}s  mismatches {len(mismatches)}  latency regressions {len(regressions)}")
+    for row in mismatches[:args.show]:
+        print(f"❌ {row['method']} {row['path']}: {row['mismatch']}")
+    for line in regressions:
+        print(f"❌ slower: {line}")
+
+    if args.record:
+        with open(args.record, "w") as f:
+            for entry in sorted(outcomes, key=lambda e: e["index"]):
+                f.write(json.dumps(entry) + "\n")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "routes": report, "mismatches": mismatches, "regressions": regressions}, f, indent=2)
+    if args.check and (mismatches or regressions):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+# ✅ Seeded local MySQL fixture for the load tests (never point this at the Railway database)
+# Creates the catalog + user-history tables the blueprints read, fills them with deterministic
+# synthetic data at the requested sizes, and writes a manifest the load driver uses to build
+# realistic requests.
+# Usage: BENCH_DB_NAME=train_track_bench python bench/seed.py --positions 60 --users 500
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+
+import mysql.connector
+
+MAJORS = [(1, "Computer Science Apprenticeship Program"), (2, "Management Information Systems"),
+          (163, "Computer Science"), (164, "Cyber Security"), (165, "Computer Engineering")]
+SUBJECT_CATEGORIES = range(11, 19)
+TECH_CATEGORIES = range(30, 38)
+FIT_LEVELS = ["Perfect Match", "Very Strong Match", "Strong Match", "Partial Match", "Fallback", "No Match"]
+
+SCHEMA = [
+    """CREATE TABLE categories (
+        id INT PRIMARY KEY, name VARCHAR(255), description TEXT)""",
+    """CREATE TABLE prerequisites (
+        id INT PRIMARY KEY, name VARCHAR(255), type VARCHAR(32), category_id INT NULL)""",
+    """CREATE TABLE positions (
+        id INT PRIMARY KEY, name VARCHAR(255), min_fit_score INT, description TEXT, tasks TEXT, tips TEXT)""",
+    """CREATE TABLE position_prerequisites (
+        position_id INT NOT NULL, prerequisite_id INT NOT NULL, weight INT NOT NULL DEFAULT 1,
+        PRIMARY KEY (position_id, prerequisite_id))""",
+    """CREATE TABLE category_skill_map (
+        category_id INT NOT NULL, skill_id INT NOT NULL, PRIMARY KEY (category_id, skill_id))""",
+    "CREATE TABLE training_modes (id INT PRIMARY KEY, description VARCHAR(255))",
+    "CREATE TABLE company_sizes (id INT PRIMARY KEY, description VARCHAR(255))",
+    "CREATE TABLE industries (id INT PRIMARY KEY, name VARCHAR(255))",
+    "CREATE TABLE company_culture_keywords (id INT PRIMARY KEY, name VARCHAR(255))",
+    "CREATE TABLE countries (id INT PRIMARY KEY, name VARCHAR(255))",
+    """CREATE TABLE companies (
+        id INT PRIMARY KEY, company_name VARCHAR(255), description TEXT, training_hours INT,
+        training_mode_id INT, company_sizes_id INT, industry_id INT)""",
+    """CREATE TABLE company_positions (
+        company_id INT NOT NULL, position_id INT NOT NULL, PRIMARY KEY (company_id, position_id))""",
+    """CREATE TABLE company_culture (
+        company_id INT NOT NULL, keyword_id INT NOT NULL, PRIMARY KEY (company_id, keyword_id))""",
+    """CREATE TABLE branches (
+        id INT AUTO_INCREMENT PRIMARY KEY, company_id INT, city VARCHAR(255), address VARCHAR(255),
+        website_link VARCHAR(255), is_main_branch TINYINT(1), country_id INT)""",
+    """CREATE TABLE learning_resources (
+        id INT AUTO_INCREMENT PRIMARY KEY, position_id INT, resource_type VARCHAR(64), title VARCHAR(255), url VARCHAR(255))""",
+    """CREATE TABLE users (
+        id INT AUTO_INCREMENT PRIMARY KEY, google_user_id VARCHAR(64), full_name VARCHAR(255), email VARCHAR(255),
+        registration_date DATETIME DEFAULT CURRENT_TIMESTAMP, role VARCHAR(32) DEFAULT 'student', avatar VARCHAR(255))""",
+    """CREATE TABLE user_results (
+        id INT AUTO_INCREMENT PRIMARY KEY, user_id VARCHAR(64), submission_data LONGTEXT, result_data LONGTEXT,
+        submitted_at DATETIME DEFAULT CURRENT_TIMESTAMP)""",
+    """CREATE TABLE user_trials (
+        id INT AUTO_INCREMENT PRIMARY KEY, user_id VARCHAR(64), status_class VARCHAR(32), status_label VARCHAR(64),
+        saved_data LONGTEXT, result_data LONGTEXT, is_submitted TINYINT(1) DEFAULT 0,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP, last_updated DATETIME DEFAULT CURRENT_TIMESTAMP)""",
+    """CREATE TABLE wizard_submissions (
+        id INT AUTO_INCREMENT PRIMARY KEY, full_name VARCHAR(255), gender VARCHAR(16), major_id INT, date_of_birth DATE)""",
+    "CREATE TABLE wizard_submission_subjects (submission_id INT, subject_id INT)",
+    "CREATE TABLE wizard_submission_technical_skills (submission_id INT, skill_id INT)",
+    "CREATE TABLE wizard_submission_nontechnical_skills (submission_id INT, nontech_skill_id INT)",
+    """CREATE TABLE wizard_submission_advanced_preferences (
+        submission_id INT, training_mode_id INT, company_size_id INT, company_culture_ids VARCHAR(255), preferred_industry_ids VARCHAR(255))"""
+]
+
+def table_name(ddl):
+    return ddl.split("(")[0].split()[-1]
+
+def connect(database=None):
+    return mysql.connector.connect(
+        host=os.getenv("BENCH_DB_HOST", "127.0.0.1"),
+        port=int(os.getenv("BENCH_DB_PORT", 3306)),
+        user=os.getenv("BENCH_DB_USER", "root"),
+        password=os.getenv("BENCH_DB_PASSWORD", ""),
+        database=database,
+        autocommit=False
+    )
+
+def insert(cursor, table, columns, rows, batch=1000):
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    for start in range(0, len(rows), batch):
+        cursor.executemany(sql, rows[start:start + batch])
+
+def build_catalog(rnd, args):
+    catalog = {"positions": {}, "subjects": [], "technical_skills": [], "non_technical_skills": []}
+    rows = {name: [] for name in ("categories", "prerequisites", "positions", "position_prerequisites",
+                                  "category_skill_map", "learning_resources")}
+
+    for cid in SUBJECT_CATEGORIES:
+        rows["categories"].append((cid, f"Subject Category {cid}", f"Subjects in area {cid}"))
+    for cid in TECH_CATEGORIES:
+        rows["categories"].append((cid, f"Tech Category {cid}", f"Technologies in area {cid}"))
+
+    for mid, name in MAJORS:
+        rows["prerequisites"].append((mid, name, "Major", None))
+    next_id = 200
+    for i in range(args.prerequisites):
+        kind = ("Subject", "Technical Skill", "Non-Technical Skill")[i % 3]
+        if kind == "Subject":
+            category = rnd.choice(SUBJECT_CATEGORIES)
+            catalog["subjects"].append(next_id)
+        elif kind == "Technical Skill":
+            category = rnd.choice(TECH_CATEGORIES)
+            catalog["technical_skills"].append(next_id)
+            for subject_category in rnd.sample(SUBJECT_CATEGORIES, 2):
+                rows["category_skill_map"].append((subject_category, next_id))
+        else:
+            category = None
+            catalog["non_technical_skills"].append(next_id)
+        rows["prerequisites"].append((next_id, f"{kind} {next_id}", kind, category))
+        next_id += 1
+
+    for pid in range(1, args.positions + 1):
+        rows["positions"].append((
+            pid, f"Position {pid}", rnd.choice([4, 5, 6, 8, 10]), f"Position {pid} description",
+            "\n".join(f"Task {t}" for t in range(1, 5)), "Keep practising."
+        ))
+        entry = {"subjects": [], "technical_skills": [], "non_technical_skills": []}
+        for key, count in (("subjects", rnd.randint(3, 7)), ("technical_skills", rnd.randint(3, 8)),
+                           ("non_technical_skills", rnd.randint(2, 5))):
+            for prerequisite_id in rnd.sample(catalog[key], min(count, len(catalog[key]))):
+                rows["position_prerequisites"].append((pid, prerequisite_id, rnd.choice([1, 1, 2, 3])))
+                entry[key].append(prerequisite_id)
+        for mid, _ in rnd.sample(MAJORS, rnd.randint(1, 2)):
+            rows["position_prerequisites"].append((pid, mid, 1))
+        for r in range(2):
+            rows["learning_resources"].append((pid, rnd.choice(["course", "video", "article"]),
+                                               f"Resource {r} for position {pid}", f"https://learn.example/{pid}/{r}"))
+        catalog["positions"][pid] = entry
+    return catalog, rows
+
+def build_companies(rnd, args):
+    rows = {name: [] for name in ("training_modes", "company_sizes", "industries", "company_culture_keywords",
+                                  "countries", "companies", "company_positions", "company_culture", "branches")}
+    for i, name in enumerate(["On-site", "Remote", "Hybrid"], start=1):
+        rows["training_modes"].append((i, name))
+    for i, name in enumerate(["Small (1-50)", "Medium (50-250)", "Large (250+)"], start=1):
+        rows["company_sizes"].append((i, name))
+    for i in range(1, 9):
+        rows["industries"].append((i, f"Industry {i}"))
+    for i in range(1, 11):
+        rows["company_culture_keywords"].append((i, f"Culture {i}"))
+    rows["countries"].append((1, "Palestine"))
+
+    for cid in range(1, args.companies + 1):
+        rows["companies"].append((cid, f"Company {cid}", f"Company {cid} description", rnd.choice([80, 120, 160, 240]),
+                                  rnd.randint(1, 3), rnd.randint(1, 3), rnd.randint(1, 8)))
+        for pid in rnd.sample(range(1, args.positions + 1), min(rnd.randint(1, 5), args.positions)):
+            rows["company_positions"].append((cid, pid))
+        for keyword in rnd.sample(range(1, 11), rnd.randint(1, 3)):
+            rows["company_culture"].append((cid, keyword))
+        for b in range(rnd.randint(1, 4)):
+            rows["branches"].append((cid, rnd.choice(["Ramallah", "Nablus", "Hebron", "Jenin"]), f"{b + 1} Main St",
+                                     f"https://company{cid}.example", 1 if b == 0 else 0, 1))
+    return rows
+
+def submission(rnd, catalog):
+    return {
+        "major_id": rnd.choice(MAJORS)[0],
+        "subjects": rnd.sample(catalog["subjects"], 5),
+        "technical_skills": rnd.sample(catalog["technical_skills"], 6),
+        "non_technical_skills": rnd.sample(catalog["non_technical_skills"], 4),
+        "advanced_preferences": {"training_modes": [rnd.randint(1, 3)], "company_sizes": [], "industries": [], "company_culture": []}
+    }
+
+def result(rnd, positions):
+    results = [{
+        "position_id": pid,
+        "position_name": f"Position {pid}",
+        "fit_level": rnd.choice(FIT_LEVELS),
+        "match_score_percentage": round(rnd.uniform(10, 100), 2),
+        "subject_fit_percentage": round(rnd.uniform(0, 100), 2),
+        "technical_skill_fit_percentage": round(rnd.uniform(0, 100), 2),
+        "non_technical_skill_fit_percentage": round(rnd.uniform(0, 100), 2),
+        "was_promoted_from_fallback": False
+    } for pid in rnd.sample(positions, min(10, len(positions)))]
+    return {"results": results, "fallback_triggered": False, "preferences_used": True, "filters": {}}
+
+def build_history(rnd, args, catalog):
+    rows = {"users": [], "user_results": [], "user_trials": []}
+    positions = list(catalog["positions"])
+    now = datetime.datetime(2025, 5, 1, 12, 0, 0)
+    for u in range(args.users):
+        user_id = f"bench_user_{u}"
+        rows["users"].append((user_id, f"Bench User {u}", f"user{u}@example.com"))
+        for r in range(args.results_per_user):
+            submitted = now - datetime.timedelta(hours=u * args.results_per_user + r)
+            rows["user_results"].append((user_id, json.dumps(submission(rnd, catalog)), json.dumps(result(rnd, positions)), submitted))
+        for t in range(args.trials_per_user):
+            created = now - datetime.timedelta(hours=u * args.trials_per_user + t)
+            submitted = t > 0
+            rows["user_trials"].append((
+                user_id, "completed" if submitted else "in-progress", "Completed" if submitted else "In Progress",
+                json.dumps(submission(rnd, catalog)), json.dumps(result(rnd, positions)) if submitted else None,
+                int(submitted), created, created
+            ))
+    return rows
+
+COLUMNS = {
+    "categories": ("id", "name", "description"),
+    "prerequisites": ("id", "name", "type", "category_id"),
+    "positions": ("id", "name", "min_fit_score", "description", "tasks", "tips"),
+    "position_prerequisites": ("position_id", "prerequisite_id", "weight"),
+    "category_skill_map": ("category_id", "skill_id"),
+    "learning_resources": ("position_id", "resource_type", "title", "url"),
+    "training_modes": ("id", "description"),
+    "company_sizes": ("id", "description"),
+    "industries": ("id", "name"),
+    "company_culture_keywords": ("id", "name"),
+    "countries": ("id", "name"),
+    "companies": ("id", "company_name", "description", "training_hours", "training_mode_id", "company_sizes_id", "industry_id"),
+    "company_positions": ("company_id", "position_id"),
+    "company_culture": ("company_id", "keyword_id"),
+    "branches": ("company_id", "city", "address", "website_link", "is_main_branch", "country_id"),
+    "users": ("google_user_id", "full_name", "email"),
+    "user_results": ("user_id", "submission_data", "result_data", "submitted_at"),
+    "user_trials": ("user_id", "status_class", "status_label", "saved_data", "result_data", "is_submitted", "created_at", "last_updated")
+}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--positions", type=int, default=60)
+    parser.add_argument("--prerequisites", type=int, default=600)
+    parser.add_argument("--companies", type=int, default=200)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--results-per-user", type=int, default=5)
+    parser.add_argument("--trials-per-user", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--manifest", default=os.getenv("BENCH_MANIFEST", "/tmp/train-track-bench.json"))
+    args = parser.parse_args()
+
+    database = os.getenv("BENCH_DB_NAME", "train_track_bench")
+    if "bench" not in database:
+        sys.exit("❌ BENCH_DB_NAME must contain 'bench': this script drops and recreates its tables.")
+
+    rnd = random.Random(args.seed)
+    catalog, catalog_rows = build_catalog(rnd, args)
+    company_rows = build_companies(rnd, args)
+    history_rows = build_history(rnd, args, catalog)
+
+    connection = connect()
+    cursor = connection.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database}`")
+    cursor.execute(f"USE `{database}`")
+    for ddl in SCHEMA:
+        cursor.execute(f"DROP TABLE IF EXISTS {table_name(ddl)}")
+        cursor.execute(ddl)
+    # Fresh tables have none of the migration indexes: let `flask migrate` / check_indexes.py re-apply them
+    cursor.execute("DROP TABLE IF EXISTS schema_migrations")
+    for rows in (catalog_rows, company_rows, history_rows):
+        for table, values in rows.items():
+            insert(cursor, table, COLUMNS[table], values)
+    connection.commit()
+    connection.close()
+
+    manifest = {
+        "database": database,
+        "majors": [mid for mid, _ in MAJORS],
+        "subject_categories": list(SUBJECT_CATEGORIES),
+        "positions": catalog["positions"],
+        "subjects": catalog["subjects"],
+        "technical_skills": catalog["technical_skills"],
+        "non_technical_skills": catalog["non_technical_skills"],
+        "companies": args.companies,
+        "users": [f"bench_user_{u}" for u in range(args.users)]
+    }
+    with open(args.manifest, "w") as f:
+        json.dump(manifest, f)
+
+    counts = {table: len(values) for rows in (catalog_rows, company_rows, history_rows) for table, values in rows.items()}
+    print(f"✅ Seeded {database}: " + ", ".join(f"{table}={count}" for table, count in counts.items()))
+    print(f"📄 Manifest written to {args.manifest}")
+    print(f"▶️  Start the app with DB_HOST={os.getenv('BENCH_DB_HOST', '127.0.0.1')} DB_NAME={database} and run bench/load_test.py")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+# ✅ gunicorn settings (picked up automatically from the working directory by `gunicorn app:app`)
+import os
+
+workers = int(os.getenv("WEB_CONCURRENCY", 1))
+# Threaded workers: admission control (api/admission.py) limits concurrency per process, which
+# only sheds when a process serves more requests at once than a route's limit (8 reads, 4 writes)
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 16))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+
+# ✅ Runs in each worker after the app is loaded and before it accepts connections
+def post_worker_init(worker):
+    from api.log_config import configure_logging
+    from api.warmup import start_warmup
+    configure_logging()
+    if os.getenv("WARMUP_ENABLED", "1") == "1":
+        # Well inside the timeout: the worker sends no heartbeat until this returns
+        start_warmup(float(os.getenv("WARMUP_MAX_WAIT_SECONDS", worker.cfg.timeout / 3)))
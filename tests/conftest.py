@@ -0,0 +1,44 @@
+import pytest
+
+from api.catalog import CatalogSnapshot, load_catalog_sections, pack_snapshot
+
+# Prerequisites of a synthetic catalog: two majors, then subjects and skills in turn
+TYPES = {1: "Major", 2: "Major"}
+TYPES.update({pid: ["Subject", "Technical Skill", "Non-Technical Skill"][pid % 3] for pid in range(10, 40)})
+
+class FakeCursor:
+    """Answers load_catalog_sections' queries in order, like a dictionary cursor."""
+    def __init__(self, edges):
+        self.results = iter([
+            [{"id": pid, "type": type_} for pid, type_ in TYPES.items()],
+            edges,
+            [],  # companies
+            []   # company culture
+        ])
+        self.rows = None
+
+    def execute(self, query, params=()):
+        self.rows = next(self.results)
+
+    def fetchall(self):
+        return self.rows
+
+def random_edges(rnd, positions=20):
+    edges = []
+    for pid in range(1, positions + 1):
+        min_fit_score = rnd.choice([4, 5, 6])
+        for prerequisite_id in rnd.sample(sorted(TYPES), rnd.randint(1, 6)):
+            edges.append({"position_id": pid, "prerequisite_id": prerequisite_id, "weight": rnd.choice([0, 0, 1, 2, 3]),
+                          "position_name": f"Position {pid}", "min_fit_score": min_fit_score})
+    rnd.shuffle(edges)  # rows of different positions interleaved, Major / zero-weight edges first at times
+    return edges
+
+@pytest.fixture
+def build_snapshot(tmp_path):
+    """position_prerequisites rows → CatalogSnapshot, packed the way get_catalog() packs it."""
+    def build(edges):
+        data, _ = pack_snapshot(load_catalog_sections(FakeCursor(edges)))
+        path = tmp_path / "catalog.bin"
+        path.write_bytes(data)
+        return CatalogSnapshot(str(path))
+    return build
@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+from flask import Flask, Response, jsonify
+
+from api import admission
+
+@pytest.fixture
+def app(monkeypatch):
+    # One read slot, one queued request that waits at most 0.2 s
+    monkeypatch.setitem(admission.CLASS_LIMITS, "read", (1, 1, 0.2))
+    monkeypatch.setattr(admission, "_limiters", {})
+    app = Flask(__name__)
+    release = threading.Event()
+
+    @app.route("/slow")
+    def slow():
+        release.wait(5)
+        return jsonify({"success": True})
+
+    @app.route("/stream")
+    def stream():
+        def chunks():
+            yield "a"
+            release.wait(5)
+            yield "b"
+        return Response(chunks())
+
+    admission.init_admission(app)
+    app.release = release
+    return app
+
+def _get(app, url, results):
+    # Closing the response is what the WSGI server does once it has been sent
+    with app.test_client().get(url) as response:
+        results.append(response.status_code)
+
+def test_sheds_beyond_limit_and_queue(app):
+    results = []
+    threads = [threading.Thread(target=_get, args=(app, "/slow", results)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    # Two are rejected: one finds the queue full, the other times out waiting in it
+    for thread in threads:
+        thread.join(0.5)
+    app.release.set()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [200, 503, 503]
+    assert admission._limiters["slow"].active == 0
+
+def test_streamed_response_holds_slot_until_closed(app):
+    response = app.test_client().get("/stream", buffered=False)
+    limiter = admission._limiters["stream"]
+    assert limiter.active == 1
+    assert app.test_client().get("/stream").status_code == 503
+    app.release.set()
+    assert response.get_data(as_text=True) == "ab"
+    response.close()
+    assert limiter.active == 0
@@ -0,0 +1,69 @@
+import mysql.connector
+import pytest
+
+from api import analytics
+
+class FakeConnection:
+    """Writes upserts into `written`; rows with a key in `rejected` fail like MySQL strict mode."""
+    def __init__(self, rejected=(), lost=False):
+        self.rejected = set(rejected)
+        self.lost = lost
+        self.written = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params=()):
+        if self.lost:
+            raise mysql.connector.errors.OperationalError(msg="Lost connection to MySQL server", errno=2013)
+        if params and params[0] in self.rejected:
+            raise mysql.connector.errors.DataError(msg="Out of range value for column", errno=1264)
+        if params:
+            self.written.append(params)
+
+    def executemany(self, query, rows):
+        for row in rows:
+            if self.lost or row[0] in self.rejected:
+                self.execute(query, row)
+        self.written.extend(rows)
+
+    def commit(self):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def rollups(monkeypatch):
+    monkeypatch.setattr(analytics, "_pending", {name: type(c)() for name, c in analytics._pending.items()})
+    monkeypatch.setattr(analytics, "_tables_ready", True)
+    monkeypatch.setattr(analytics, "_ensure_flusher", lambda: None)
+
+    def record(major_id):
+        analytics.record_recommendation(major_id, [{"position_id": 3, "fit_level": "Strong Match"}],
+                                        [{"position_id": 3, "fit_level": "Strong Match"}], False)
+    return record
+
+@pytest.mark.parametrize("major_id", [2 ** 31, -2 ** 31 - 1, 10 ** 30, "abc", None, float("inf")])
+def test_out_of_range_major_is_counted_under_zero(rollups, major_id):
+    rollups(major_id)
+    assert dict(analytics._pending["major_runs"]) == {0: 1}
+
+def test_rejected_rows_are_dropped_not_retried(rollups, monkeypatch):
+    rollups(7)
+    rollups(8)
+    connection = FakeConnection(rejected={8})
+    monkeypatch.setattr(analytics, "get_db_connection", lambda: connection)
+    analytics.flush_rollups()
+    assert (7, 1, 0) in connection.written and not any(row[0] == 8 for row in connection.written)
+    assert not any(analytics._pending.values())
+
+def test_lost_connection_keeps_the_deltas(rollups, monkeypatch):
+    rollups(7)
+    monkeypatch.setattr(analytics, "get_db_connection", lambda: FakeConnection(lost=True))
+    assert analytics.flush_rollups() == 0
+    assert dict(analytics._pending["major_runs"]) == {7: 1}
+    assert dict(analytics._pending["recommended"]) == {3: 1}
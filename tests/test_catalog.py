@@ -0,0 +1,78 @@
+import random
+import threading
+import time
+
+import pytest
+
+from api import catalog
+from conftest import TYPES, random_edges
+
+CATEGORY_KEYS = {"Subject": "subjects", "Technical Skill": "technical_skills", "Non-Technical Skill": "non_technical_skills"}
+
+def baseline_positions(edges, skip_zero_weight):
+    # The per-request load /recommendations (skip_zero_weight) and the fallback route used to run
+    positions = {}
+    for row in edges:
+        type_ = TYPES.get(row["prerequisite_id"])
+        if not type_ or type_ == "Major" or (skip_zero_weight and row["weight"] <= 0):
+            continue
+        entry = positions.setdefault(row["position_id"], {
+            "position_name": row["position_name"],
+            "min_fit_score": row["min_fit_score"],
+            "subjects": [], "technical_skills": [], "non_technical_skills": []
+        })
+        entry[CATEGORY_KEYS[type_]].append((row["prerequisite_id"], row["weight"]))
+    return positions
+
+@pytest.mark.parametrize("seed", range(50))
+def test_snapshot_keeps_the_baseline_position_order(build_snapshot, seed):
+    edges = random_edges(random.Random(seed))
+    snapshot = build_snapshot(edges)
+
+    for skip_zero_weight in (True, False):
+        expected = baseline_positions(edges, skip_zero_weight)
+        actual = snapshot.position_prerequisites(skip_zero_weight=skip_zero_weight)
+        assert list(actual) == list(expected)
+        assert actual == expected
+
+def test_major_index_and_subset_keep_order(build_snapshot):
+    edges = random_edges(random.Random(7))
+    snapshot = build_snapshot(edges)
+
+    majors = {}
+    for row in edges:
+        if TYPES[row["prerequisite_id"]] == "Major":
+            majors.setdefault(row["position_id"], set()).add(row["prerequisite_id"])
+    eligible = snapshot.eligible_positions(1)
+    assert eligible == {pid for pid in range(1, 21) if pid not in majors or 1 in majors[pid]}
+
+    full = snapshot.position_prerequisites()
+    subset = snapshot.position_prerequisites(position_ids=eligible)
+    assert list(subset) == [pid for pid in full if pid in eligible]
+
+def test_expired_snapshot_is_rebuilt_off_the_request_thread(build_snapshot, monkeypatch):
+    path = build_snapshot(random_edges(random.Random(3))).path
+    monkeypatch.setattr(catalog, "_state", {"snapshot": None, "next_check": 0.0, "refresh_errors": 0})
+    monkeypatch.setattr(catalog, "current_catalog_version", lambda: "v1")
+    release, rebuilds = threading.Event(), []
+
+    def ensure_snapshot_file(path, wanted_version=None, wait=True):
+        rebuilds.append(threading.current_thread().name)
+        if len(rebuilds) > 1:
+            release.wait(5)
+    monkeypatch.setattr(catalog, "_ensure_snapshot_file", ensure_snapshot_file)
+
+    snapshot = catalog.get_catalog(path)
+    assert rebuilds == ["MainThread"]  # nothing to serve yet: the first load is inline
+
+    catalog._state["next_check"] = 0.0
+    started = time.monotonic()
+    assert catalog.get_catalog(path) is snapshot
+    assert catalog.get_catalog(path) is snapshot
+    assert time.monotonic() - started < 1
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "catalog-refresh":
+            thread.join(5)
+    assert rebuilds == ["MainThread", "catalog-refresh"]
+    assert catalog._state["next_check"] > time.monotonic()
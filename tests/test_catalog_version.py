@@ -0,0 +1,142 @@
+import threading
+import time
+
+import mysql.connector
+import pytest
+from flask import Flask
+
+from api import catalog_version
+from api.catalog_version import VersionedCache, current_catalog_version, init_catalog_version
+
+@pytest.fixture
+def version(monkeypatch):
+    """Catalog version "v1" without the poller; call the fixture to publish a new one."""
+    first_poll = threading.Event()
+    first_poll.set()
+    monkeypatch.setattr(catalog_version, "_ensure_poller", lambda: False)
+    monkeypatch.setattr(catalog_version, "_first_poll", first_poll)
+    monkeypatch.setitem(catalog_version._state, "version", "v1")
+    monkeypatch.setitem(catalog_version._state, "changes", 0)
+    return catalog_version.publish
+
+class Loader:
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        if self.fail:
+            raise ConnectionError("MySQL is down")
+        return f"{current_catalog_version()}#{self.calls}"
+
+def test_hit_within_ttl(version):
+    cache, loader = VersionedCache("t_hit"), Loader()
+    assert cache.get("k", loader) == "v1#1"
+    assert cache.get("k", loader) == "v1#1"
+    assert cache.stats()["hits"] == 1 and loader.calls == 1
+
+def test_concurrent_misses_load_once(version):
+    cache, loader = VersionedCache("t_flight"), Loader()
+    loader.release.clear()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["waits"] < 7:
+        time.sleep(0.01)
+    loader.release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["v1#1"] * 8 and loader.calls == 1
+
+def test_expired_key_serves_stale_while_reloading(version):
+    cache, loader = VersionedCache("t_swr", ttl=0.01), Loader()
+    assert cache.get("k", loader) == "v1#1"
+    time.sleep(0.02)
+    loader.release.clear()
+    leader = threading.Thread(target=cache.get, args=("k", loader))
+    leader.start()
+    while loader.calls < 2:
+        time.sleep(0.01)
+    assert cache.get("k", loader) == "v1#1"
+    loader.release.set()
+    leader.join()
+    assert cache.get("k", loader) == "v1#2"
+
+def test_failed_reload_keeps_last_good_value(version):
+    cache, loader = VersionedCache("t_fail", ttl=0.01), Loader()
+    assert cache.get("k", loader) == "v1#1"
+    time.sleep(0.02)
+    loader.fail = True
+    assert cache.get("k", loader) == "v1#1"
+    assert cache.stats()["load_errors"] == 1
+
+def test_no_stale_across_a_version_bump(version):
+    cache, loader = VersionedCache("t_bump"), Loader()
+    assert cache.get("k", loader) == "v1#1"
+    version("v2")
+    assert cache.stats()["invalidations"] == 1
+    # The new version has no last good value: a failed load raises rather than serving v1
+    loader.fail = True
+    with pytest.raises(ConnectionError):
+        cache.get("k", loader)
+    loader.fail = False
+    assert cache.get("k", loader) == "v2#3"
+
+def test_background_refresh_never_blocks(version):
+    cache, loader = VersionedCache("t_background", ttl=0.05, background_refresh=True), Loader()
+    assert cache.get("k", loader) == "v1#1"
+    time.sleep(0.06)
+    loader.release.clear()
+    assert cache.get("k", loader) == "v1#1"
+    assert cache.get("k", loader) == "v1#1"
+    loader.release.set()
+    while cache.stats()["loading"]:
+        time.sleep(0.01)
+    assert cache.get("k", loader) == "v1#2"
+
+def test_request_reads_one_version(version):
+    cache, loader = VersionedCache("t_pinned"), Loader()
+    app = Flask(__name__)
+    init_catalog_version(app)
+
+    @app.route("/")
+    def view():
+        first = cache.get("a", loader)
+        version("v2")  # bumped mid-request
+        return {"first": first, "second": cache.get("b", loader), "version": current_catalog_version()}
+
+    response = app.test_client().get("/")
+    assert response.json == {"first": "v1#1", "second": "v1#2", "version": "v1"}
+    assert response.headers["X-Catalog-Version"] == "v1"
+    # The next request reads the new version
+    assert cache.get("a", loader) == "v2#3"
+
+class ErrorCursor:
+    def __init__(self, error):
+        self.error = error
+
+    def execute(self, query, params=()):
+        raise self.error
+
+def test_missing_table_reads_as_unmigrated():
+    missing = mysql.connector.errors.ProgrammingError(msg="Table 'catalog_version' doesn't exist", errno=1146)
+    assert catalog_version.read_catalog_version(ErrorCursor(missing)) == catalog_version.UNMIGRATED_VERSION
+
+def test_failed_poll_keeps_the_last_version(version, monkeypatch):
+    changes = []
+    monkeypatch.setattr(catalog_version, "_subscribers", [])
+    catalog_version.subscribe(lambda old, new: changes.append((old, new)))
+    lost = mysql.connector.errors.OperationalError(msg="Lost connection to MySQL server during query", errno=2013)
+    with pytest.raises(mysql.connector.errors.OperationalError):
+        catalog_version.read_catalog_version(ErrorCursor(lost))
+
+    def read():
+        raise lost
+    monkeypatch.setattr(catalog_version, "_read_polled_version", read)
+    assert catalog_version.poll_catalog_version() == "v1"
+    assert catalog_version._state["version"] == "v1" and changes == []
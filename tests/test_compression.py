@@ -0,0 +1,30 @@
+import pytest
+
+from api.compression import brotli, choose_encoding, encoded_etag, etag_matches
+
+BEST = "br" if brotli is not None else "gzip"
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, br", BEST),
+    ("*", BEST),
+    ("*, br;q=0", "gzip"),
+    ("*;q=0, gzip", "gzip"),
+    ("gzip;q=0, br;q=0", None)
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header) == expected
+
+def test_each_encoding_has_its_own_etag():
+    assert encoded_etag('"v1"', "gzip") == '"v1-gzip"'
+    assert encoded_etag('W/"v1"', "br") == 'W/"v1-br"'
+
+@pytest.mark.parametrize("if_none_match", ['"v1"', 'W/"v1"', '"v1-gzip"', '"x", "v1-br"', "*"])
+def test_etag_matches_any_encoded_variant(if_none_match):
+    assert etag_matches('"v1"', if_none_match)
+
+@pytest.mark.parametrize("if_none_match", [None, "", '"v2"', '"v1-deflate"', '"v1x"'])
+def test_etag_mismatch(if_none_match):
+    assert not etag_matches('"v1"', if_none_match)
@@ -0,0 +1,54 @@
+from api import export
+
+class UnreadResultError(Exception):
+    pass
+
+class StreamingCursor:
+    """Unbuffered: close() raises while rows are still unread, like mysql.connector."""
+    def __init__(self, rows):
+        self.unread = list(rows)
+
+    def execute(self, query, params=()):
+        pass
+
+    def fetchmany(self, size):
+        chunk, self.unread = self.unread[:size], self.unread[size:]
+        return chunk
+
+    def close(self):
+        if self.unread:
+            raise UnreadResultError("Unread result found")
+
+class StreamingConnection:
+    def __init__(self, rows):
+        self.stream = StreamingCursor(rows)
+        self.closed = False
+
+    def cursor(self, dictionary=False, buffered=True):
+        return self.stream
+
+    def is_connected(self):
+        if self.stream.unread:
+            raise UnreadResultError("Unread result found")
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+def rows(count):
+    return [{"id": i, "user_id": "u", "submission_data": "{}", "result_data": "{}", "submitted_at": None}
+            for i in range(1, count + 1)]
+
+def test_abandoned_stream_still_closes_the_connection(monkeypatch):
+    connection = StreamingConnection(rows(10))
+    monkeypatch.setattr(export, "get_db_connection", lambda query_timeout_ms: connection)
+    chunks = export.iter_user_result_chunks(chunk_size=3)
+    assert [r["id"] for r in next(chunks)] == [1, 2, 3]
+    chunks.close()  # the client went away
+    assert connection.closed
+
+def test_full_stream(monkeypatch):
+    connection = StreamingConnection(rows(5))
+    monkeypatch.setattr(export, "get_db_connection", lambda query_timeout_ms: connection)
+    assert [len(chunk) for chunk in export.iter_user_result_chunks(chunk_size=2)] == [2, 2, 1]
+    assert connection.closed
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from api import catalog_version, prerequisite_search
+from api.catalog_version import VersionedCache
+
+ROWS = [
+    {"id": 1, "name": "Python", "type": "Technical Skill"},
+    {"id": 2, "name": "PyTorch", "type": "Technical Skill"},
+    {"id": 3, "name": "Public Speaking", "type": "Non-Technical Skill"}
+]
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self, dictionary=False):
+        return self
+
+    def execute(self, query, params=()):
+        pass
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def search(monkeypatch):
+    monkeypatch.setattr(catalog_version, "current_catalog_version", lambda: "v1")
+    monkeypatch.setitem(catalog_version._state, "version", "v1")
+    monkeypatch.setattr(prerequisite_search, "SEARCH_INDEX_TTL_SECONDS", 0.05)
+    monkeypatch.setattr(prerequisite_search, "search_cache",
+                        VersionedCache("test_search", maxsize=4, ttl=0.05, background_refresh=True))
+    monkeypatch.setattr(prerequisite_search, "_popularity", {"counts": None, "loaded_at": 0.0, "refreshing": False})
+    monkeypatch.setattr(prerequisite_search, "get_db_connection", lambda: FakeConnection(ROWS))
+    state = {"popularity": {2: 5}, "loads": 0, "release": threading.Event()}
+
+    def load_popularity():
+        state["loads"] += 1
+        if state["loads"] > 1:
+            state["release"].wait(5)
+        return dict(state["popularity"])
+
+    monkeypatch.setattr(prerequisite_search, "load_popularity", load_popularity)
+    yield state
+    # Let background refreshes finish before the fakes are undone
+    state["release"].set()
+    for thread in threading.enumerate():
+        if thread.name.startswith("refresh-"):
+            thread.join(5)
+
+def names(query):
+    index = prerequisite_search.search_cache.get("indexes", prerequisite_search.load_search_indexes)[None]
+    return [index.entries[o]["name"] for o in index.search(query)]
+
+def test_ranked_by_popularity(search):
+    assert names("py") == ["PyTorch", "Python"]
+    assert names("pub sp") == ["Public Speaking"]
+
+def test_expired_index_refreshes_in_background(search):
+    assert names("py") == ["PyTorch", "Python"]
+    search["popularity"] = {1: 9}
+    time.sleep(0.06)
+
+    # The popularity reload blocks, yet searches keep answering from the previous index
+    started = time.monotonic()
+    for _ in range(3):
+        assert names("py") == ["PyTorch", "Python"]
+    assert time.monotonic() - started < 1
+
+    search["release"].set()
+    deadline = time.monotonic() + 5
+    while names("py") != ["Python", "PyTorch"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.06)
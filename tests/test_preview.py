@@ -0,0 +1,62 @@
+import random
+
+import pytest
+from flask import Flask
+
+from api.recommendation import (PREVIEW_TOP_N, parse_preview_request, prefilter_requested, preview_scores,
+                                score_positions, tier_results)
+from conftest import TYPES, random_edges
+
+app = Flask(__name__)
+
+def parse(body):
+    with app.test_request_context("/recommendations/preview", method="POST", json=body):
+        return parse_preview_request()
+
+@pytest.mark.parametrize("value", [5, {"a": 1}, "[1,", None, True, [None, {}, [1], "²"]])
+def test_wrong_typed_selections_count_as_empty(value):
+    selections, _, _ = parse({"subjects": value})
+    assert selections["Subject"] == set()
+
+@pytest.mark.parametrize("body", [{"top": {}}, {"top": [3]}, {"top": "abc"}, {"top": None}, [1, 2], "subjects"])
+def test_wrong_typed_top_falls_back_to_default(body):
+    _, top_n, _ = parse(body)
+    assert top_n == PREVIEW_TOP_N
+
+@pytest.mark.parametrize("major_id", [{}, [1], "abc", "²", -1, True])
+def test_wrong_typed_major_id_is_ignored(major_id):
+    _, _, parsed = parse({"major_id": major_id, "major_prefilter": True})
+    assert parsed is None
+
+def test_valid_request():
+    selections, top_n, major_id = parse({
+        "subjects": [1, "2"], "technical_skills": "3,4", "non_technical_skills": "[5]",
+        "top": "3", "major_id": "7", "major_prefilter": True
+    })
+    assert selections == {"Subject": {1, 2}, "Technical Skill": {3, 4}, "Non-Technical Skill": {5}}
+    assert (top_n, major_id) == (3, 7)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_preview_matches_score_positions(build_snapshot, seed):
+    rnd = random.Random(seed)
+    snapshot = build_snapshot(random_edges(rnd, positions=40))
+    selections = {kind: {pid for pid, type_ in TYPES.items() if type_ == kind and rnd.random() < 0.4}
+                  for kind in ("Subject", "Technical Skill", "Non-Technical Skill")}
+    eligible = snapshot.eligible_positions(rnd.choice([1, 2])) if seed % 2 else None
+
+    positions = snapshot.position_prerequisites(position_ids=eligible)
+    results = score_positions(positions, selections["Subject"], selections["Technical Skill"],
+                              selections["Non-Technical Skill"])
+    perfect, strong, fallback, no_match = tier_results(results)
+
+    tiers, top = preview_scores(snapshot, selections, top_n=10, eligible=eligible)
+    assert tiers == {"perfect": len(perfect), "strong": len(strong), "fallback": len(fallback), "no_match": len(no_match)}
+    assert top == [{key: r[key] for key in ("position_id", "position_name", "fit_level", "match_score_percentage")}
+                   for r in results[:10]]
+
+@pytest.mark.parametrize("value, expected", [
+    (True, True), (False, False), (None, False), (1, True), (0, False),
+    ("1", True), ("true", True), ("0", False), ("false", False), ("False", False), ("", False)
+])
+def test_major_prefilter_flag(value, expected):
+    assert prefilter_requested({"major_prefilter": value}) is expected
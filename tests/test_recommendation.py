@@ -0,0 +1,14 @@
+import pytest
+
+from api.recommendation import embedded_companies, filter_ids
+
+@pytest.mark.parametrize("values, expected", [
+    ([1, "2", " 3 "], [1, 2, 3]), (3, []), ("1,2", []), ({"a": 1}, []), (None, []), ([True, None, {}, "x", "²"], [])
+])
+def test_filter_ids(values, expected):
+    assert filter_ids(values) == expected
+
+def test_embedded_companies_ignores_wrong_typed_preferences():
+    filters = {"training_mode": None, "company_size": 3, "preferred_industry": "x", "company_culture": {"a": 1}}
+    # No usable preference: no company list, and the catalog is never consulted
+    assert embedded_companies(None, [{"position_id": 1}], filters) == []
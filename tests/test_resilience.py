@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from api.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+def failing_breaker(threshold=3, reset_seconds=0.05):
+    breaker = CircuitBreaker("test", failure_threshold=threshold, reset_seconds=reset_seconds)
+    for _ in range(threshold):
+        breaker.before_call()
+        breaker.record_failure(ConnectionError("refused"))
+    return breaker
+
+def test_opens_after_threshold_and_fails_fast():
+    breaker = failing_breaker()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert 0 < error.value.retry_in <= 0.05
+    assert breaker.snapshot()["rejected"] == 1
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("test", failure_threshold=3)
+    for _ in range(2):
+        breaker.record_failure(ConnectionError("refused"))
+    breaker.record_success()
+    breaker.record_failure(ConnectionError("refused"))
+    assert breaker.state == CLOSED
+
+def test_half_open_lets_one_trial_through():
+    breaker = failing_breaker()
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+def test_failed_trial_reopens():
+    breaker = failing_breaker()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure(ConnectionError("refused"))
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["opened"] == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
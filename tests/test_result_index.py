@@ -0,0 +1,36 @@
+import pytest
+
+from api.result_index import result_columns, summarize_result_data
+
+def test_recommendation_result_carries_its_catalog_version():
+    result = {"results": [{"position_id": 7, "fit_level": "Strong"}], "fallback_triggered": False, "catalog_version": "v3"}
+    assert result_columns(result) == {
+        "top_position_id": 7, "top_fit_level": "Strong", "fallback_triggered": 0, "catalog_version": "v3"
+    }
+
+def test_saved_result_without_version_stays_unknown():
+    result = {"recommended_position": "Backend Intern", "position_id": 4, "fit_level": "Fallback"}
+    columns = result_columns(result)
+    assert columns["catalog_version"] is None
+    assert columns["top_position_id"] == 4
+    assert columns["fallback_triggered"] == 1
+
+def test_summarize_ignores_other_shapes():
+    assert summarize_result_data(None)["result_count"] == 0
+    assert summarize_result_data({"results": "oops"})["top_position_id"] is None
+
+@pytest.mark.parametrize("position_id, expected", [
+    (12, 12), ("12", 12), ("abc", None), ({"id": 1}, None), ([1], None), (True, None), (2 ** 31, None), (1.5, None)
+])
+def test_client_position_id_fits_the_int_column(position_id, expected):
+    assert result_columns({"recommended_position": "x", "position_id": position_id})["top_position_id"] == expected
+
+@pytest.mark.parametrize("fit_level, expected", [
+    ("Strong Match", "Strong Match"), ("x" * 33, None), ({"level": 1}, None), (["Fallback"], None)
+])
+def test_client_fit_level_fits_the_varchar_column(fit_level, expected):
+    assert result_columns({"recommended_position": "x", "fit_level": fit_level})["top_fit_level"] == expected
+
+def test_client_catalog_version_fits_its_column():
+    assert result_columns({"results": [], "catalog_version": "v" * 65})["catalog_version"] is None
+    assert result_columns({"results": [], "catalog_version": 3})["catalog_version"] is None
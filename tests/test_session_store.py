@@ -0,0 +1,28 @@
+import pytest
+
+from api.session_store import MAX_POSITION_ID, PositionSet
+
+@pytest.mark.parametrize("ids", [[], [0], [1, 2, 3, 64], list(range(0, 400, 3))])
+def test_dense_ids_use_a_bitmap(ids):
+    positions = PositionSet.from_ids(ids)
+    assert positions.encoded[:1] == (PositionSet.BITMAP if ids else PositionSet.SORTED)
+    assert list(positions) == sorted(ids) and len(positions) == len(ids)
+
+@pytest.mark.parametrize("ids", [[5, 100000], [MAX_POSITION_ID], [7, 3, 7, 2 ** 31]])
+def test_sparse_ids_use_a_sorted_array(ids):
+    positions = PositionSet.from_ids(ids)
+    assert positions.encoded[:1] == PositionSet.SORTED
+    assert list(positions) == sorted(set(ids))
+    assert all(i in positions for i in ids)
+
+def test_membership():
+    for positions in (PositionSet.from_ids([1, 9, 17]), PositionSet.from_ids([1, 9, 10 ** 6])):
+        assert 9 in positions and "9" in positions
+        assert 2 not in positions and -1 not in positions and "x" not in positions and None not in positions
+        assert 2 ** 40 not in positions
+    assert PositionSet(PositionSet.from_ids([4, 8]).encoded) == PositionSet.from_ids([8, 4])
+
+@pytest.mark.parametrize("ids", [[-1], [MAX_POSITION_ID + 1], [1, 2 ** 40]])
+def test_out_of_range_ids_are_rejected(ids):
+    with pytest.raises(ValueError):
+        PositionSet.from_ids(ids)
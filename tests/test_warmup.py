@@ -0,0 +1,18 @@
+import threading
+
+from api import warmup
+
+def test_slow_warmup_finishes_in_background(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(warmup, "_steps", lambda: [("slow", lambda: release.wait(5))])
+    monkeypatch.setattr(warmup, "_status", dict(warmup._status, state="not_run", attempts=0))
+
+    warmup.start_warmup(0.05)
+    assert warmup.warmup_status()["state"] == "running"
+    assert not warmup.warmup_status()["ready"]
+
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "warmup":
+            thread.join(5)
+    assert warmup.warmup_status()["ready"]
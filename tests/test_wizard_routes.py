@@ -0,0 +1,59 @@
+import pytest
+from flask import Flask
+
+from api import wizard_routes
+from api.catalog_version import VersionedCache
+
+CATEGORIES = [{"id": cid, "name": f"c{cid}", "description": ""} for cid in range(11, 19)]
+
+class EmptyCursor:
+    def execute(self, query, params=()):
+        pass
+
+    def fetchall(self):
+        return []
+
+@pytest.fixture
+def app(monkeypatch):
+    queries = []
+
+    def fetch_reference(query, params=(), cursor=None):
+        queries.append(params)
+        if "FROM categories" in query:
+            return CATEGORIES
+        return []
+
+    monkeypatch.setattr(wizard_routes, "reference_cache", VersionedCache("wizard_test"))
+    monkeypatch.setattr(wizard_routes, "fetch_reference", fetch_reference)
+    monkeypatch.setattr(wizard_routes, "with_reference_cursor", lambda load: load(EmptyCursor()))
+    app = Flask(__name__)
+    app.register_blueprint(wizard_routes.wizard_routes, url_prefix="/wizard")
+    app.queries = queries
+    return app
+
+def test_category_ids_are_normalized_before_caching(app):
+    client = app.test_client()
+    client.get("/wizard/subjects?ids=12,11")
+    client.get("/wizard/subjects?ids=11,12,12")
+    subject_loads = [params for params in app.queries if params]
+    assert subject_loads == [(11, 12)]
+
+@pytest.mark.parametrize("ids", ["11,12,13,14", "11,999"])
+def test_large_or_unknown_category_sets_are_not_cached(app, ids):
+    client = app.test_client()
+    for _ in range(2):
+        assert client.get(f"/wizard/technical-skills?category_ids={ids}").status_code == 200
+    assert len([params for params in app.queries if params]) == 2
+
+def test_bootstrap_etag_depends_on_since(app):
+    client = app.test_client()
+    full = client.get("/wizard/bootstrap")
+    version = full.get_json()["version"]
+    delta = client.get(f"/wizard/bootstrap?since={version}")
+    assert delta.get_json()["changed"] == []
+    assert delta.headers["ETag"] != full.headers["ETag"]
+    # Each body revalidates against its own ETag only
+    assert client.get(f"/wizard/bootstrap?since={version}",
+                      headers={"If-None-Match": full.headers["ETag"]}).status_code == 200
+    assert client.get(f"/wizard/bootstrap?since={version}",
+                      headers={"If-None-Match": delta.headers["ETag"]}).status_code == 304